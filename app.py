@@ -1,18 +1,53 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, Blueprint, abort, jsonify, make_response
+from flask import Flask, render_template, request, redirect, url_for, flash, Blueprint, abort, jsonify, make_response, session, send_file, g, has_request_context
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as SessaoFlaskSQLAlchemy
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from werkzeug.datastructures import CallbackDict
 from flask_login import LoginManager, login_required, login_user, logout_user, UserMixin, current_user
 from config import Config
-from datetime import datetime
-from sqlalchemy import text
+from datetime import datetime, timedelta
+from sqlalchemy import text, func, or_
+from sqlalchemy.orm import validates, joinedload
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from functools import wraps
 import pytz
+import os
+import re
+import gzip
+import json
+import mimetypes
+import hashlib
+import secrets
+import socket
+import math
+import time
+import sqlite3
+import tempfile
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict, defaultdict
+from difflib import SequenceMatcher
+from types import SimpleNamespace
 from urllib.parse import quote
 import pdfkit
 import pandas as pd
 from io import BytesIO
 from io import BytesIO
 from flask_migrate import Migrate
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from werkzeug.utils import safe_join
+import click
+import assets
+import outbox
+import relatorios_pdf
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -23,18 +58,202 @@ load_dotenv()
 tz = pytz.timezone("America/Sao_Paulo")
 
 
+def agora():
+    """Data/hora atual no horário de Brasília. Usar em todas as colunas de data."""
+    return datetime.now(tz)
+
+
+# ---------------- STATUS DO ATENDIMENTO ------------------
+
+class StatusAtendimento:
+    ABERTO = "Aberto"
+    EM_ATENDIMENTO = "Em Atendimento"
+    ATENDIDO = "Atendido"
+    CANCELADO = "Cancelado"
+    MESCLADO = "Mesclado"  # duplicado incorporado a outro atendimento
+
+    TODOS = (ABERTO, EM_ATENDIMENTO, ATENDIDO, CANCELADO, MESCLADO)
+    FINAIS = (ATENDIDO, CANCELADO, MESCLADO)
+    EM_ABERTO = (ABERTO, EM_ATENDIMENTO)  # ocupam vaga no abrigo
+
+    # ação -> (status de origem permitidos, status de destino)
+    TRANSICOES = {
+        "iniciar": ((ABERTO,), EM_ATENDIMENTO),
+        "finalizar": ((ABERTO, EM_ATENDIMENTO), ATENDIDO),
+        "cancelar": ((ABERTO, EM_ATENDIMENTO), CANCELADO),
+        "mesclar": ((ABERTO, EM_ATENDIMENTO), MESCLADO),
+    }
+
+
+# ---------------- UTILITÁRIOS ------------------
+
+def normalizar_telefone(telefone):
+    """Mantém só os dígitos do telefone, sem o DDI 55 e sem o zero do DDD."""
+    digitos = re.sub(r"\D", "", telefone or "")
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    if len(digitos) in (11, 12) and digitos.startswith("0"):
+        digitos = digitos[1:]
+    return digitos
+
+
 # ---------------- APP / CONFIG ------------------
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
-db = SQLAlchemy(app)
+
+class SessaoComReplica(SessaoFlaskSQLAlchemy):
+    """Nas rotas marcadas com @leitura_replica, manda as consultas para o bind "replica".
+
+    Flush e INSERT/UPDATE/DELETE sempre vão para o banco principal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and has_request_context()
+            and g.get("usar_replica")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and "replica" in self._db.engines
+        ):
+            return self._db.engines["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(app, session_options={"class_": SessaoComReplica})
 migrate = Migrate(app, db)
 
+
+def motor_infraestrutura():
+    """Engine para o que não é trabalho da rota em si (sessões no servidor, manutenção).
+
+    As consultas saem marcadas com execution_options(infraestrutura=True);
+    o benchmark usa a marca para não somá-las ao SQL por requisição.
+    """
+    return db.engine.execution_options(infraestrutura=True)
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
 
+app.jinja_env.globals["StatusAtendimento"] = StatusAtendimento
+
+# ---------------- ARQUIVOS ESTÁTICOS / COMPRESSÃO ------------------
+# Os templates usam asset_url("vendor/leaflet/leaflet.js"). Depois do
+# "flask assets-build" a URL aponta para static/dist (nome com hash, .br/.gz
+# pré-comprimidos, cache imutável). Sem o build, usa static/. O CDN só entra
+# com ASSETS_CDN=1.
+
+_manifesto_assets = assets.carregar_manifesto()
+
+TIPOS_COMPRIMIVEIS = {
+    "text/html", "application/json", "text/css", "text/plain",
+    "text/javascript", "application/javascript",
+}
+
+
+def asset_url(caminho):
+    if app.config["ASSETS_CDN"] and caminho in assets.VENDOR:
+        return assets.VENDOR[caminho]
+    if caminho in _manifesto_assets:
+        return url_for("static_dist", filename=_manifesto_assets[caminho])
+    return url_for("static", filename=caminho)
+
+
+app.jinja_env.globals["asset_url"] = asset_url
+
+
+@app.route("/static/dist/<path:filename>")
+def static_dist(filename):
+    caminho = safe_join(assets.PASTA_DIST, filename)
+    if caminho is None or not os.path.isfile(caminho):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+
+    for encoding, extensao in (("br", ".br"), ("gzip", ".gz")):
+        if request.accept_encodings.quality(encoding) and os.path.isfile(caminho + extensao):
+            resposta = send_file(caminho + extensao, mimetype=mimetype, conditional=True)
+            resposta.headers["Content-Encoding"] = encoding
+            break
+    else:
+        resposta = send_file(caminho, mimetype=mimetype, conditional=True)
+
+    resposta.vary.add("Accept-Encoding")
+    if assets.versionado(filename):
+        resposta.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        resposta.headers["Cache-Control"] = "public, max-age=86400"
+    return resposta
+
+
+@app.after_request
+def comprimir_resposta(response):
+    """Comprime HTML/JSON gerados dinamicamente (brotli se disponível, senão gzip)."""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in TIPOS_COMPRIMIVEIS
+    ):
+        return response
+
+    dados = response.get_data()
+    if len(dados) < 500:
+        return response
+
+    if assets.brotli is not None and request.accept_encodings.quality("br"):
+        response.set_data(assets.brotli.compress(dados, quality=5))
+        response.headers["Content-Encoding"] = "br"
+    elif request.accept_encodings.quality("gzip"):
+        response.set_data(gzip.compress(dados, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+# ---------------- RÉPLICA DE LEITURA ------------------
+
+def leitura_replica(f):
+    """Rota só de leitura: consulta a réplica, se configurada.
+
+    Logo depois de uma gravação do próprio usuário (REPLICA_STICKY_SECONDS)
+    continua no principal, para não mostrar dados atrasados pela replicação.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if session.get("escrita_ate", 0) < time.time():
+            g.usar_replica = True
+        return f(*args, **kwargs)
+    return wrapper
+
+
+@db.event.listens_for(SessaoComReplica, "after_flush")
+def _marca_escrita_flush(sessao, contexto):
+    if has_request_context():
+        g.houve_escrita = True
+
+
+@db.event.listens_for(SessaoComReplica, "do_orm_execute")
+def _marca_escrita_dml(estado):
+    if has_request_context() and (estado.is_insert or estado.is_update or estado.is_delete):
+        g.houve_escrita = True
+
+
+@app.after_request
+def _fixa_leituras_no_principal(response):
+    if g.get("houve_escrita") and app.config["SQLALCHEMY_BINDS"].get("replica"):
+        session["escrita_ate"] = time.time() + app.config["REPLICA_STICKY_SECONDS"]
+    return response
+
+
 # ---------------- USER LOADER ------------------
 
 @login_manager.user_loader
@@ -68,11 +287,50 @@ class Abrigo(db.Model):
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
 
+    # Capacidade (NULL = não informada, sem limite) e vagas reservadas por
+    # atendimentos em aberto. A ocupação é mantida com UPDATEs atômicos na
+    # abertura/encerramento dos atendimentos (ver ocupar_vaga), nunca com COUNT.
+    capacidade = db.Column(db.Integer, nullable=True)
+    ocupacao = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # Incrementada a cada edição pelo ORM (não pela ocupação); identifica a
+    # versão do endereço nos caches, ex. bloco do abrigo nas mensagens
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": versao}
+
+    @property
+    def vagas(self):
+        if self.capacidade is None:
+            return None
+        return max(self.capacidade - self.ocupacao, 0)
 
     def __repr__(self):
         return f"<Abrigo {self.nome}>"
 
 
+# Ranking de disponibilidade: abrigos ativos na ordem das consultas (vagas
+# livres DESC NULLS LAST, nome). O SQLite não aceita NULLS LAST em índice,
+# mas lá o DESC já deixa os NULLs por último.
+_vagas_livres = (Abrigo.capacidade - Abrigo.ocupacao).self_group()
+db.Index(
+    "ix_abrigos_disponibilidade", Abrigo.status, _vagas_livres.desc().nulls_last(), Abrigo.nome
+).ddl_if(dialect="postgresql")
+db.Index(
+    "ix_abrigos_disponibilidade", Abrigo.status, _vagas_livres.desc(), Abrigo.nome
+).ddl_if(callable_=lambda ddl, target, bind, **kw: kw["dialect"].name != "postgresql")
+
+
+# Colunas marcadas com info={"somente_postgresql": True} (ex.: busca_vetor)
+# só entram no CREATE TABLE do PostgreSQL; nos outros bancos o create_all
+# as ignora, como o ddl_if faz com os índices.
+@compiles(CreateColumn)
+def _criar_coluna(elemento, compilador, **kw):
+    if elemento.element.info.get("somente_postgresql") and compilador.dialect.name != "postgresql":
+        return None
+    return compilador.visit_create_column(elemento, **kw)
+
+
 class Atendimento(db.Model):
     __tablename__ = "atendimentos"
 
@@ -86,22 +344,85 @@ class Atendimento(db.Model):
     operador_nome = db.Column(db.String(100), nullable=False)
 
     # Novas colunas
-    criado_em = db.Column(db.DateTime, default=lambda: datetime.now(tz))
+    criado_em = db.Column(db.DateTime, default=agora)
     finalizado_em = db.Column(db.DateTime)
 
     justificativa_cancelamento = db.Column(db.Text)
     conclusao = db.Column(db.Text)
 
-    status = db.Column(db.String(20), default="Aberto", nullable=False)  # Novo campo de status
+    status = db.Column(db.String(20), default=StatusAtendimento.ABERTO, nullable=False)  # Novo campo de status
     editado_por = db.Column(db.String(100))  # quem editou por último, NULL se nunca editado
-    ultima_atualizacao = db.Column(db.DateTime(timezone=True),default=lambda: datetime.now(pytz.timezone('America/Sao_Paulo')))
+    ultima_atualizacao = db.Column(db.DateTime(timezone=True), default=agora)
+
+    # Telefone só com dígitos, indexado para a busca por número
+    telefone_normalizado = db.Column(db.String(20))
+
+    # Busca textual no PostgreSQL (ver buscar_atendimentos). Gerada pelo
+    # banco e fora do mapeamento do ORM: nunca é lida nem gravada pelo modelo
+    busca_vetor = db.Column(
+        TSVECTOR,
+        db.Computed(
+            "setweight(to_tsvector('portuguese', coalesce(solicitante, '')), 'A') || "
+            "setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B') || "
+            "setweight(to_tsvector('portuguese', coalesce(conclusao, '')), 'C') || "
+            "setweight(to_tsvector('portuguese', coalesce(justificativa_cancelamento, '')), 'C') || "
+            "setweight(to_tsvector('simple', coalesce(telefone, '')), 'D')",
+            persisted=True,
+        ),
+        info={"somente_postgresql": True},
+    )
+
+    # Controle de concorrência otimista: todo UPDATE confere e incrementa
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # UUID gerado no navegador: reenvios do mesmo chamado (fila offline,
+    # duplo clique) não criam um segundo atendimento
+    cliente_uuid = db.Column(db.String(36), unique=True, index=True)
+
+    # Atendente que iniciou o chamado (NULL enquanto está aberto na fila)
+    atendente_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), nullable=True)
+
+    # Provável duplicado de outro chamado (detectado na criação). Depois da
+    # mesclagem o chamado fica Mesclado e continua apontando para o principal.
+    duplicado_de_id = db.Column(db.Integer, db.ForeignKey("atendimentos.id"), nullable=True, index=True)
 
     abrigo = db.relationship("Abrigo")
     operador = db.relationship("Usuario", foreign_keys=[operador_id])
+    atendente = db.relationship("Usuario", foreign_keys=[atendente_id])
+    duplicado_de = db.relationship("Atendimento", remote_side=[id], foreign_keys=[duplicado_de_id])
+
+    __table_args__ = (
+        # varchar_pattern_ops permite usar o índice no LIKE 'prefixo%'
+        db.Index(
+            "ix_atendimentos_telefone_normalizado", "telefone_normalizado",
+            postgresql_ops={"telefone_normalizado": "varchar_pattern_ops"},
+        ),
+        db.Index("ix_atendimentos_busca_vetor", "busca_vetor", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+    __mapper_args__ = {"version_id_col": versao, "exclude_properties": ["busca_vetor"]}
+
+    @validates("telefone")
+    def _atualiza_telefone_normalizado(self, key, telefone):
+        self.telefone_normalizado = normalizar_telefone(telefone)
+        return telefone
+
+
+# Filas por usuário: chamados de um operador/atendente filtrados por status
+db.Index("ix_atendimentos_operador_status", Atendimento.operador_id, Atendimento.status)
+db.Index("ix_atendimentos_atendente_status", Atendimento.atendente_id, Atendimento.status)
+# Duplicados: mesmo telefone dentro de uma janela de criação
+db.Index("ix_atendimentos_telefone_criado", Atendimento.telefone_normalizado, Atendimento.criado_em)
 
 # ----------------- REGISTRAR LOG -----------
 
-def registrar_log(acao, descricao=None, usuario=None):
+def registrar_log(acao, descricao=None, usuario=None, commit=True, entidade=None, entidade_id=None, dados=None):
+    """Grava uma linha em logs_sistema.
+
+    `descricao` é o texto para leitura humana; `entidade`/`entidade_id`
+    (ex.: "atendimento", 12) e `dados` (dicionário JSON) são os campos
+    estruturados, indexados para consultas como "edições por chamado".
+    """
     if usuario is None and current_user.is_authenticated:
         usuario = current_user
 
@@ -110,13 +431,17 @@ def registrar_log(acao, descricao=None, usuario=None):
         usuario_login=usuario.login if usuario else "Sistema",
         acao=acao,
         descricao=descricao,
+        entidade=entidade,
+        entidade_id=entidade_id,
+        dados=dados,
         rota=request.path if request else None,
         metodo=request.method if request else None,
         ip=request.remote_addr if request else None
     )
 
     db.session.add(log)
-    db.session.commit()
+    if commit:
+        db.session.commit()
 
 class LogSistema(db.Model):
     __tablename__ = "logs_sistema"
@@ -131,10 +456,191 @@ class LogSistema(db.Model):
     ip = db.Column(db.String(45))
     data_hora = db.Column(
         db.DateTime,
-        default=lambda: datetime.now(pytz.timezone("America/Sao_Paulo"))
+        default=agora
+    )
+
+    # Campos estruturados da auditoria: o que foi afetado e detalhes em JSON
+    entidade = db.Column(db.String(30))  # atendimento / abrigo / usuario
+    entidade_id = db.Column(db.Integer)
+    dados = db.Column(db.JSON)
+
+    __table_args__ = (
+        db.Index("ix_logs_sistema_entidade", "entidade", "entidade_id", "data_hora"),
+        db.Index("ix_logs_sistema_acao_data", "acao", "data_hora"),
     )
 
 
+class ResumoLogDiario(db.Model):
+    """Contagem diária por ação e usuário dos logs já compactados (ver compactar_logs)."""
+    __tablename__ = "logs_resumo_diario"
+
+    dia = db.Column(db.Date, primary_key=True)
+    acao = db.Column(db.String(100), primary_key=True)
+    usuario_id = db.Column(db.Integer, primary_key=True)  # 0 = Sistema
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class HistoricoStatusAtendimento(db.Model):
+    __tablename__ = "historico_status_atendimentos"
+
+    id = db.Column(db.Integer, primary_key=True)
+    atendimento_id = db.Column(db.Integer, db.ForeignKey("atendimentos.id"), nullable=False, index=True)
+    status_anterior = db.Column(db.String(20))  # NULL na criação
+    status_novo = db.Column(db.String(20), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), nullable=True)
+    usuario_login = db.Column(db.String(50))
+    data_hora = db.Column(db.DateTime(timezone=True), nullable=False, default=agora)
+
+
+# ----------------- TABELAS DE RELATÓRIO -----------
+# Agregados mantidos incrementalmente a cada mudança de status (ver
+# seção RELATÓRIOS). O dashboard e /relatorios leem daqui em vez de
+# varrer a tabela de atendimentos.
+
+class RelatorioAtendimentoDiario(db.Model):
+    __tablename__ = "relatorio_atendimentos_diario"
+
+    dia = db.Column(db.Date, primary_key=True)  # dia de criação (horário de Brasília)
+    abrigo_id = db.Column(db.Integer, db.ForeignKey("abrigos.id"), primary_key=True)
+
+    total = db.Column(db.Integer, nullable=False, default=0)
+    abertos = db.Column(db.Integer, nullable=False, default=0)
+    em_atendimento = db.Column(db.Integer, nullable=False, default=0)
+    atendidos = db.Column(db.Integer, nullable=False, default=0)
+    cancelados = db.Column(db.Integer, nullable=False, default=0)
+
+    abrigo = db.relationship("Abrigo")
+
+
+class RelatorioResolucaoOperador(db.Model):
+    __tablename__ = "relatorio_resolucao_operador"
+
+    dia = db.Column(db.Date, primary_key=True)  # dia de finalização (horário de Brasília)
+    operador_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), primary_key=True)
+
+    atendidos = db.Column(db.Integer, nullable=False, default=0)
+    cancelados = db.Column(db.Integer, nullable=False, default=0)
+    segundos_resolucao = db.Column(db.BigInteger, nullable=False, default=0)  # soma, só dos atendidos
+
+    operador = db.relationship("Usuario")
+
+
+# ----------------- OUTBOX DE EVENTOS -----------
+# Toda mudança em Atendimento/Abrigo grava um evento em eventos_outbox na
+# mesma transação (commit junto, rollback junto). O despachante
+# (flask outbox-dispatch) entrega os eventos aos destinos de outbox.py.
+
+class EventoOutbox(db.Model):
+    __tablename__ = "eventos_outbox"
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)  # ex.: atendimento.status_alterado
+    entidade = db.Column(db.String(30), nullable=False)
+    entidade_id = db.Column(db.Integer, nullable=False)
+    dados = db.Column(db.JSON, nullable=False)
+    criado_em = db.Column(db.DateTime(timezone=True), nullable=False, default=agora)
+
+    # Entrega
+    enviado_em = db.Column(db.DateTime(timezone=True))
+    tentativas = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    proxima_tentativa = db.Column(db.DateTime(timezone=True))
+    ultimo_erro = db.Column(db.Text)
+
+    __table_args__ = (
+        # Só os pendentes: o despachante lê sempre por aqui
+        db.Index(
+            "ix_eventos_outbox_pendentes", "id",
+            postgresql_where=db.text("enviado_em IS NULL"),
+            sqlite_where=db.text("enviado_em IS NULL"),
+        ),
+    )
+
+    def como_dict(self):
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "entidade": self.entidade,
+            "entidade_id": self.entidade_id,
+            "dados": self.dados,
+            "criado_em": _como_local(self.criado_em).isoformat(),
+        }
+
+
+def _valor_json(valor):
+    if isinstance(valor, datetime):
+        return _como_local(valor).isoformat()
+    return valor
+
+
+def dados_atendimento(atendimento):
+    campos = ("id", "status", "abrigo_id", "solicitante", "telefone", "descricao", "operador_id",
+              "atendente_id", "duplicado_de_id", "criado_em", "finalizado_em", "versao")
+    return {campo: _valor_json(getattr(atendimento, campo)) for campo in campos}
+
+
+def dados_abrigo(abrigo):
+    campos = ("id", "nome", "status", "logradouro", "bairro", "cep", "cidade", "estado",
+              "latitude", "longitude", "capacidade", "ocupacao")
+    return {campo: _valor_json(getattr(abrigo, campo)) for campo in campos}
+
+
+def registrar_evento(tipo, entidade, entidade_id, dados, conexao=None):
+    """Grava o evento na transação corrente (da sessão ou da `conexao` de um evento do ORM)."""
+    comando = EventoOutbox.__table__.insert().values(
+        tipo=tipo,
+        entidade=entidade,
+        entidade_id=entidade_id,
+        dados=dados,
+        criado_em=agora(),
+    )
+    if conexao is not None:
+        conexao.execute(comando)
+    else:
+        db.session.execute(comando)
+
+
+def _campos_alterados(alvo):
+    estado = db.inspect(alvo)
+    return sorted(
+        atributo.key for atributo in estado.attrs
+        if atributo.key in estado.mapper.columns and atributo.history.has_changes()
+    )
+
+
+# Mudanças via ORM. As feitas com UPDATE direto (transições de status,
+# ocupação dos abrigos) registram o evento no próprio ponto de gravação.
+@db.event.listens_for(Atendimento, "after_insert")
+def _outbox_atendimento_criado(mapper, conexao, alvo):
+    registrar_evento("atendimento.criado", "atendimento", alvo.id, dados_atendimento(alvo), conexao)
+
+
+@db.event.listens_for(Atendimento, "after_update")
+def _outbox_atendimento_atualizado(mapper, conexao, alvo):
+    campos = _campos_alterados(alvo)
+    if campos:
+        registrar_evento("atendimento.atualizado", "atendimento", alvo.id,
+                         {**dados_atendimento(alvo), "campos": campos}, conexao)
+
+
+@db.event.listens_for(Abrigo, "after_insert")
+def _outbox_abrigo_criado(mapper, conexao, alvo):
+    registrar_evento("abrigo.criado", "abrigo", alvo.id, dados_abrigo(alvo), conexao)
+
+
+@db.event.listens_for(Abrigo, "after_update")
+def _outbox_abrigo_atualizado(mapper, conexao, alvo):
+    campos = _campos_alterados(alvo)
+    if campos:
+        registrar_evento("abrigo.atualizado", "abrigo", alvo.id, {**dados_abrigo(alvo), "campos": campos}, conexao)
+
+
+@db.event.listens_for(Atendimento, "after_delete")
+@db.event.listens_for(Abrigo, "after_delete")
+def _outbox_removido(mapper, conexao, alvo):
+    entidade = "atendimento" if isinstance(alvo, Atendimento) else "abrigo"
+    registrar_evento(f"{entidade}.removido", entidade, alvo.id, {"id": alvo.id}, conexao)
+
+
 # -----------------DECORADOR DE PERMISSÃO-----------
 def requer_perfil(*perfis):
     def decorator(func):
@@ -157,6 +663,542 @@ def requer_perfil(*perfis):
     return decorator
 
 
+# ---------------- POLÍTICA DE SENHAS ------------------
+
+_metodo_hash_canonico = None
+
+
+def metodo_hash_atual():
+    """Prefixo que o Werkzeug grava para o método configurado (ex.: "scrypt:32768:8:1")."""
+    global _metodo_hash_canonico
+    if _metodo_hash_canonico is None:
+        exemplo = generate_password_hash("", method=app.config["PASSWORD_HASH_METHOD"])
+        _metodo_hash_canonico = exemplo.split("$", 1)[0]
+    return _metodo_hash_canonico
+
+
+def gerar_hash_senha(senha):
+    return generate_password_hash(senha, method=app.config["PASSWORD_HASH_METHOD"])
+
+
+def hash_desatualizado(hash_senha):
+    return hash_senha.split("$", 1)[0] != metodo_hash_atual()
+
+
+def verificar_senha(usuario, senha):
+    """Confere a senha e, se o hash usar método/custo antigo, regrava com o atual.
+
+    A regravação fica pendente na sessão do banco; quem chama faz o commit.
+    """
+    if not usuario or not senha or not check_password_hash(usuario.senha, senha):
+        return False
+
+    if hash_desatualizado(usuario.senha):
+        usuario.senha = gerar_hash_senha(senha)
+    return True
+
+
+# Confirmação recente: depois de digitar a senha para finalizar/cancelar, um
+# token assinado guardado na sessão dispensa a verificação do hash pelo
+# tempo PASSWORD_CONFIRMATION_TTL. Trocar a senha invalida o token.
+
+def _serializador_confirmacao():
+    return URLSafeTimedSerializer(app.config["SECRET_KEY"], salt="confirmacao-senha")
+
+
+def _impressao_senha(usuario):
+    return hashlib.sha256(usuario.senha.encode()).hexdigest()[:16]
+
+
+def registrar_confirmacao_senha(usuario):
+    session["confirmacao_senha"] = _serializador_confirmacao().dumps(
+        {"u": usuario.id, "h": _impressao_senha(usuario)}
+    )
+
+
+def senha_confirmada_recente():
+    token = session.get("confirmacao_senha")
+    if not token or not current_user.is_authenticated:
+        return False
+
+    try:
+        dados = _serializador_confirmacao().loads(
+            token, max_age=app.config["PASSWORD_CONFIRMATION_TTL"]
+        )
+    except (SignatureExpired, BadSignature):
+        session.pop("confirmacao_senha", None)
+        return False
+
+    return dados.get("u") == current_user.id and dados.get("h") == _impressao_senha(current_user)
+
+
+def confirmar_senha(senha):
+    """Usado nas ações que pedem senha. Aceita confirmação recente ou a senha digitada.
+
+    Só a verificação do hash conta para a regra "confirmacao_senha"; acima
+    dela levanta LimiteExcedido (resposta 429).
+    """
+    if senha_confirmada_recente():
+        return True
+
+    espera = limitador.consumir("confirmacao_senha", current_user.id)
+    if espera:
+        raise LimiteExcedido(espera)
+
+    if not verificar_senha(current_user, senha):
+        return False
+
+    registrar_confirmacao_senha(current_user)
+    return True
+
+
+app.jinja_env.globals["senha_confirmada_recente"] = senha_confirmada_recente
+
+
+# ---------------- LIMITE DE REQUISIÇÕES ------------------
+# Janela deslizante aproximada: soma a contagem da janela atual com a da
+# anterior ponderada pelo tempo que ainda se sobrepõe. A checagem acontece
+# antes do check_password_hash, que é caro de propósito.
+
+def _parse_regra(regra):
+    quantidade, segundos = regra.split("/")
+    return int(quantidade), int(segundos)
+
+
+def _estimativa(anterior, atual, janela, agora):
+    decorrido = agora % janela
+    return anterior * (1 - decorrido / janela) + atual
+
+
+class ArmazenamentoMemoria:
+    """Contadores no próprio processo. Cada worker tem os seus."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.contadores = {}
+        self.operacoes = 0
+
+    def consumir(self, chave, limite, janela, agora):
+        indice = int(agora // janela)
+
+        with self.lock:
+            anterior, _ = self.contadores.get((chave, indice - 1), (0, 0))
+            atual, _ = self.contadores.get((chave, indice), (0, 0))
+
+            if _estimativa(anterior, atual, janela, agora) + 1 > limite:
+                return False
+
+            # (contagem, momento a partir do qual a janela não é mais consultada)
+            self.contadores[(chave, indice)] = (atual + 1, (indice + 2) * janela)
+
+            self.operacoes += 1
+            if self.operacoes % 1000 == 0:
+                self._limpar(agora)
+            return True
+
+    def resetar(self, chave):
+        with self.lock:
+            for item in [k for k in self.contadores if k[0] == chave]:
+                del self.contadores[item]
+
+    def _limpar(self, agora):
+        for item, (_, expira_em) in list(self.contadores.items()):
+            if expira_em < agora:
+                del self.contadores[item]
+
+
+class ConexaoSQLiteLocal:
+    """Uma conexão por thread a um arquivo SQLite local, em modo WAL e autocommit."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.local = threading.local()
+
+    def _conexao(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+
+class ArmazenamentoSQLite(ConexaoSQLiteLocal):
+    """Contadores num arquivo SQLite, compartilhado entre processos da mesma máquina."""
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        self.operacoes = 0
+        with self._conexao() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    chave TEXT NOT NULL,
+                    indice INTEGER NOT NULL,
+                    contagem INTEGER NOT NULL,
+                    expira_em REAL NOT NULL,
+                    PRIMARY KEY (chave, indice)
+                )
+            """)
+
+    def consumir(self, chave, limite, janela, agora):
+        indice = int(agora // janela)
+        conn = self._conexao()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            contagens = dict(conn.execute(
+                "SELECT indice, contagem FROM rate_limit WHERE chave = ? AND indice IN (?, ?)",
+                (chave, indice - 1, indice),
+            ).fetchall())
+
+            if _estimativa(contagens.get(indice - 1, 0), contagens.get(indice, 0), janela, agora) + 1 > limite:
+                conn.execute("COMMIT")
+                return False
+
+            conn.execute("""
+                INSERT INTO rate_limit (chave, indice, contagem, expira_em) VALUES (?, ?, 1, ?)
+                ON CONFLICT (chave, indice) DO UPDATE SET contagem = contagem + 1
+            """, (chave, indice, (indice + 2) * janela))
+
+            # Contagem deste processo; o BEGIN IMMEDIATE já serializa as threads
+            self.operacoes += 1
+            if self.operacoes % 1000 == 0:
+                conn.execute("DELETE FROM rate_limit WHERE expira_em < ?", (agora,))
+
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def resetar(self, chave):
+        self._conexao().execute("DELETE FROM rate_limit WHERE chave = ?", (chave,))
+
+
+class LimitadorTaxa:
+    def __init__(self, armazenamento, regras):
+        self.armazenamento = armazenamento
+        self.regras = {nome: _parse_regra(regra) for nome, regra in regras.items()}
+
+    def _chave(self, nome_regra, identificador):
+        _, janela = self.regras[nome_regra]
+        return f"{nome_regra}:{identificador}:{janela}"
+
+    def consumir(self, nome_regra, identificador):
+        """Registra uma tentativa. Retorna None se permitida ou os segundos até liberar."""
+        limite, janela = self.regras[nome_regra]
+        agora = time.time()
+
+        if self.armazenamento.consumir(self._chave(nome_regra, identificador), limite, janela, agora):
+            return None
+        return max(int(janela - agora % janela), 1)
+
+    def resetar(self, nome_regra, identificador):
+        # Chave exata: identificadores com ":" (IPv6, logins) não alcançam outros
+        self.armazenamento.resetar(self._chave(nome_regra, identificador))
+
+
+def _criar_limitador():
+    if app.config["RATE_LIMIT_BACKEND"] == "sqlite":
+        armazenamento = ArmazenamentoSQLite(app.config["RATE_LIMIT_SQLITE_PATH"])
+    else:
+        armazenamento = ArmazenamentoMemoria()
+    return LimitadorTaxa(armazenamento, app.config["RATE_LIMITS"])
+
+
+limitador = _criar_limitador()
+
+
+class LimiteExcedido(Exception):
+    """Tentativas acima da regra; `espera` é quanto falta (em segundos) para liberar."""
+
+    def __init__(self, espera):
+        super().__init__(espera)
+        self.espera = espera
+
+
+@app.errorhandler(LimiteExcedido)
+def limite_excedido(erro):
+    resposta = jsonify({
+        "success": False,
+        "error": f"Muitas tentativas. Tente novamente em {erro.espera} segundos."
+    })
+    resposta.status_code = 429
+    resposta.headers["Retry-After"] = str(erro.espera)
+    return resposta
+
+
+# ---------------- SESSÕES NO SERVIDOR ------------------
+# O cookie leva só um id aleatório; os dados da sessão (login, flashes,
+# confirmação de senha) ficam no servidor, no banco principal (tabela
+# sessoes) ou num arquivo SQLite local. Cada processo guarda as sessões
+# lidas há pouco num LRU com validade curta (SESSION_CACHE_TTL), então uma
+# sessão revogada ou alterada em outro worker vale aqui no máximo até lá.
+# No banco a chave é o SHA-256 do id, não o id do cookie.
+
+class SessaoUsuario(db.Model):
+    __tablename__ = "sessoes"
+
+    chave = db.Column(db.String(64), primary_key=True)
+    usuario_id = db.Column(db.Integer, index=True)  # sem FK: a revogação apaga as linhas
+    dados = db.Column(db.Text, nullable=False)
+    expira_em = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+
+class ArmazenamentoSessaoBanco:
+    """Tabela sessoes do banco da aplicação (PostgreSQL em produção)."""
+
+    def _executar(self, comando):
+        # Conexão própria: não mistura com a transação da requisição
+        with motor_infraestrutura().begin() as conn:
+            return conn.execute(comando)
+
+    def obter(self, chave):
+        tabela = SessaoUsuario.__table__
+        with motor_infraestrutura().connect() as conn:
+            linha = conn.execute(
+                db.select(tabela.c.dados, tabela.c.usuario_id, tabela.c.expira_em).where(tabela.c.chave == chave)
+            ).first()
+        if linha is None:
+            return None
+        return linha.dados, linha.usuario_id, _como_local(linha.expira_em).timestamp()
+
+    def gravar(self, chave, dados, usuario_id, expira_em):
+        valores = {
+            "chave": chave,
+            "dados": dados,
+            "usuario_id": usuario_id,
+            "expira_em": datetime.fromtimestamp(expira_em, tz),
+        }
+        if db.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        comando = insert(SessaoUsuario.__table__).values(**valores)
+        self._executar(comando.on_conflict_do_update(
+            index_elements=["chave"],
+            set_={"dados": comando.excluded.dados, "usuario_id": comando.excluded.usuario_id,
+                  "expira_em": comando.excluded.expira_em},
+        ))
+
+    def remover(self, chave):
+        self._executar(db.delete(SessaoUsuario).where(SessaoUsuario.chave == chave))
+
+    def remover_usuario(self, usuario_id):
+        self._executar(db.delete(SessaoUsuario).where(SessaoUsuario.usuario_id == usuario_id))
+
+    def limpar_expiradas(self, agora_epoch):
+        resultado = self._executar(
+            db.delete(SessaoUsuario).where(SessaoUsuario.expira_em < datetime.fromtimestamp(agora_epoch, tz))
+        )
+        return resultado.rowcount
+
+
+class ArmazenamentoSessaoSQLite(ConexaoSQLiteLocal):
+    """Arquivo SQLite local, compartilhado entre os workers da mesma máquina."""
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        conn = self._conexao()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessoes (
+                chave TEXT PRIMARY KEY,
+                usuario_id INTEGER,
+                dados TEXT NOT NULL,
+                expira_em REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_sessoes_usuario_id ON sessoes (usuario_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_sessoes_expira_em ON sessoes (expira_em)")
+
+    def obter(self, chave):
+        return self._conexao().execute(
+            "SELECT dados, usuario_id, expira_em FROM sessoes WHERE chave = ?", (chave,)
+        ).fetchone()
+
+    def gravar(self, chave, dados, usuario_id, expira_em):
+        self._conexao().execute("""
+            INSERT INTO sessoes (chave, usuario_id, dados, expira_em) VALUES (?, ?, ?, ?)
+            ON CONFLICT (chave) DO UPDATE SET
+                usuario_id = excluded.usuario_id, dados = excluded.dados, expira_em = excluded.expira_em
+        """, (chave, usuario_id, dados, expira_em))
+
+    def remover(self, chave):
+        self._conexao().execute("DELETE FROM sessoes WHERE chave = ?", (chave,))
+
+    def remover_usuario(self, usuario_id):
+        self._conexao().execute("DELETE FROM sessoes WHERE usuario_id = ?", (usuario_id,))
+
+    def limpar_expiradas(self, agora_epoch):
+        return self._conexao().execute("DELETE FROM sessoes WHERE expira_em < ?", (agora_epoch,)).rowcount
+
+
+class SessaoServidor(CallbackDict, SessionMixin):
+    def __init__(self, dados=None, sid=None, nova=False):
+        def ao_alterar(sessao):
+            sessao.modified = True
+            sessao.accessed = True
+
+        super().__init__(dados, ao_alterar)
+        self.sid = sid
+        self.new = nova
+        self.modified = False
+        self.accessed = False
+        self.regenerar = False  # troca o id no fim da requisição (ex.: após o login)
+
+
+class InterfaceSessaoServidor(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, armazenamento, tamanho_cache=1000, validade_cache=5, intervalo_limpeza=300):
+        self.armazenamento = armazenamento
+        self.tamanho_cache = tamanho_cache
+        self.validade_cache = validade_cache
+        self.intervalo_limpeza = intervalo_limpeza
+        self._cache = OrderedDict()  # chave -> (dados, usuario_id, expira_em, lido_em)
+        self._lock = threading.Lock()
+        self._ultima_limpeza = time.time()
+
+    @staticmethod
+    def _chave(sid):
+        return hashlib.sha256(sid.encode()).hexdigest()
+
+    def _ler(self, chave, agora_epoch):
+        with self._lock:
+            registro = self._cache.get(chave)
+            if registro and agora_epoch - registro[3] < self.validade_cache:
+                self._cache.move_to_end(chave)
+                return registro
+
+        linha = self.armazenamento.obter(chave)
+        if linha is None:
+            return None
+        registro = (*linha, agora_epoch)
+        self._guardar_cache(chave, registro)
+        return registro
+
+    def _guardar_cache(self, chave, registro):
+        with self._lock:
+            self._cache[chave] = registro
+            self._cache.move_to_end(chave)
+            while len(self._cache) > self.tamanho_cache:
+                self._cache.popitem(last=False)
+
+    def _esquecer(self, chave=None, usuario_id=None):
+        with self._lock:
+            for item in [k for k, r in self._cache.items() if k == chave or (usuario_id and r[1] == usuario_id)]:
+                del self._cache[item]
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            agora_epoch = time.time()
+            registro = self._ler(self._chave(sid), agora_epoch)
+            if registro and registro[2] > agora_epoch:
+                sessao = SessaoServidor(self.serializer.loads(registro[0]), sid)
+                sessao.expira_em = registro[2]
+                return sessao
+        return SessaoServidor(sid=secrets.token_urlsafe(32), nova=True)
+
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+        agora_epoch = time.time()
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        # Esvaziada (logout): apaga no servidor e o cookie
+        if not session:
+            if session.modified and not session.new:
+                chave = self._chave(session.sid)
+                self.armazenamento.remover(chave)
+                self._esquecer(chave)
+                response.delete_cookie(nome, domain=dominio, path=caminho)
+            return
+
+        vida = app.permanent_session_lifetime.total_seconds()
+        expira_em = getattr(session, "expira_em", 0)
+        # Sem alteração, só regrava para estender a validade depois de meia vida
+        if not (session.modified or session.regenerar or expira_em - agora_epoch < vida / 2):
+            return
+
+        if session.regenerar and not session.new:
+            chave_antiga = self._chave(session.sid)
+            self.armazenamento.remover(chave_antiga)
+            self._esquecer(chave_antiga)
+            session.sid = secrets.token_urlsafe(32)
+
+        chave = self._chave(session.sid)
+        dados = self.serializer.dumps(dict(session))
+        usuario_id = session.get("_user_id")
+        usuario_id = int(usuario_id) if str(usuario_id).isdigit() else None
+        expira_em = agora_epoch + vida
+
+        self.armazenamento.gravar(chave, dados, usuario_id, expira_em)
+        self._guardar_cache(chave, (dados, usuario_id, expira_em, agora_epoch))
+
+        response.set_cookie(
+            nome,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio,
+            path=caminho,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+        if agora_epoch - self._ultima_limpeza > self.intervalo_limpeza:
+            self._ultima_limpeza = agora_epoch
+            self.limpar_expiradas()
+
+    def limpar_expiradas(self):
+        with self._lock:
+            self._cache.clear()
+        return self.armazenamento.limpar_expiradas(time.time())
+
+    def revogar_usuario(self, usuario_id):
+        """Encerra todas as sessões do usuário (os outros workers em até SESSION_CACHE_TTL)."""
+        self.armazenamento.remover_usuario(usuario_id)
+        self._esquecer(usuario_id=usuario_id)
+
+
+def _configurar_sessoes():
+    backend = app.config["SESSION_BACKEND"]
+    if backend == "cookie":
+        return None  # sessão padrão do Flask, assinada no cookie
+    if backend == "sqlite":
+        armazenamento = ArmazenamentoSessaoSQLite(app.config["SESSION_SQLITE_PATH"])
+    else:
+        armazenamento = ArmazenamentoSessaoBanco()
+
+    interface = InterfaceSessaoServidor(
+        armazenamento,
+        tamanho_cache=app.config["SESSION_CACHE_SIZE"],
+        validade_cache=app.config["SESSION_CACHE_TTL"],
+        intervalo_limpeza=app.config["SESSION_SWEEP_INTERVAL"],
+    )
+    app.session_interface = interface
+    return interface
+
+
+sessoes_servidor = _configurar_sessoes()
+
+
+def regenerar_sessao():
+    """Troca o id da sessão ao final da requisição (evita fixação de sessão no login)."""
+    if sessoes_servidor is not None:
+        session.regenerar = True
+
+
+def revogar_sessoes_usuario(usuario_id):
+    if sessoes_servidor is not None:
+        sessoes_servidor.revogar_usuario(usuario_id)
+
+
 # ---------------- ROTAS DE LOGIN ------------------
 
 from flask import flash
@@ -167,12 +1209,24 @@ def login():
         login_digitado = request.form["login"]
         senha_digitada = request.form["senha"]
 
+        # Rejeita rajadas antes de consultar o banco e verificar o hash
+        espera = (
+            limitador.consumir("login_ip", request.remote_addr)
+            or limitador.consumir("login_usuario", login_digitado.strip().lower())
+        )
+        if espera:
+            flash(f"Muitas tentativas de login. Tente novamente em {espera} segundos.", "error")
+            return redirect(url_for("login"))
+
         # Busca pelo login apenas
         user = Usuario.query.filter_by(login=login_digitado).first()
 
-        if user and check_password_hash(user.senha, senha_digitada):
+        if verificar_senha(user, senha_digitada):
+            limitador.resetar("login_usuario", login_digitado.strip().lower())
+            db.session.commit()  # grava o hash refeito, se houver
             login_user(user)
-            registrar_log("Login", f"Usuário {user.login} realizou login")
+            regenerar_sessao()
+            registrar_log("Login", f"Usuário {user.login} realizou login", entidade="usuario", entidade_id=user.id)
             return redirect(url_for("principal"))
         else:
             flash("Usuário ou senha incorretos!", "error")
@@ -184,24 +1238,31 @@ def login():
 # app.py, na rota principal
 @app.route("/principal")
 @login_required
+@leitura_replica
 def principal():
-    # Estatísticas...
-    total_atendimentos = Atendimento.query.count()
-    abertos = Atendimento.query.filter_by(status="Aberto").count()
-    em_atendimento = Atendimento.query.filter_by(status="Em Atendimento").count()
-    finalizados = Atendimento.query.filter_by(status="Atendido").count()
-    cancelados = Atendimento.query.filter_by(status="Cancelado").count()
+    # Estatísticas (lidas das tabelas de relatório, uma única consulta)
+    totais = totais_por_status()
+    total_atendimentos = totais["total"]
+    abertos = totais["abertos"]
+    em_atendimento = totais["em_atendimento"]
+    finalizados = totais["atendidos"]
+    cancelados = totais["cancelados"]
 
     # Últimos 5 atendimentos
     atendimentos_recentes = Atendimento.query.order_by(Atendimento.criado_em.desc()).limit(5).all()
 
     # CONVERTER abrigos para lista de dicionários simples
-    abrigos = Abrigo.query.all()
+    abrigos = Abrigo.query.order_by(
+        (Abrigo.capacidade - Abrigo.ocupacao).desc().nulls_last(), Abrigo.nome
+    ).all()
     abrigos_json = [
         {
             "id": a.id,
             "nome": a.nome,
             "status": a.status,
+            "capacidade": a.capacidade,
+            "ocupacao": a.ocupacao,
+            "vagas": a.vagas,
             "latitude": a.latitude,
             "longitude": a.longitude,
             "logradouro": a.logradouro,
@@ -253,14 +1314,15 @@ def add_usuario():
 
         novo = Usuario(
             login=login_digitado,
-            senha=generate_password_hash(senha_digitada),
+            senha=gerar_hash_senha(senha_digitada),
             perfil=perfil,
             nome=nome
         )
         db.session.add(novo)
         db.session.commit()
 
-        registrar_log("Cadastro de usuário", f"Usuário criado: {login_digitado}")
+        registrar_log("Cadastro de usuário", f"Usuário criado: {login_digitado}",
+                      entidade="usuario", entidade_id=novo.id, dados={"login": novo.login, "perfil": novo.perfil})
 
         flash("Usuário criado com sucesso!", "success")
         return redirect(url_for("listar_usuarios"))
@@ -282,10 +1344,13 @@ def edit_usuario(id):
 
         # 🔥 Só muda a senha se o campo não estiver vazio
         if nova_senha and nova_senha.strip() != "":
-            usuario.senha = generate_password_hash(nova_senha)
+            usuario.senha = gerar_hash_senha(nova_senha)
 
+        campos = _campos_alterados(usuario)
         db.session.commit()
-        registrar_log("Edição de usuário", f"Usuário editado: {usuario.login}")
+        # Só os nomes dos campos; o hash da senha nunca vai para o log
+        registrar_log("Edição de usuário", f"Usuário editado: {usuario.login}",
+                      entidade="usuario", entidade_id=usuario.id, dados={"campos": campos})
 
         flash("Usuário atualizado com sucesso!", "success")
         return redirect(url_for("listar_usuarios"))
@@ -300,8 +1365,10 @@ def delete_usuario(id):
     usuario = Usuario.query.get_or_404(id)
     db.session.delete(usuario)
     db.session.commit()
+    revogar_sessoes_usuario(id)
 
-    registrar_log("Exclusão de usuário", f"Usuário excluído: {usuario.login}")
+    registrar_log("Exclusão de usuário", f"Usuário excluído: {usuario.login}",
+                  entidade="usuario", entidade_id=id, dados={"login": usuario.login})
     
     flash('Usuário excluído com sucesso!', 'success')
     return redirect(url_for('listar_usuarios'))
@@ -309,11 +1376,112 @@ def delete_usuario(id):
 
 # ---------------- ROTAS - OPERADOR/ATENDIMENTO ------------------
 
+def carga_por_usuario(usuario_id=None):
+    """Chamados em aberto de cada usuário, contados numa consulta só.
+
+    Para cada usuário: os que ele abriu (como operador) e ainda estão abertos
+    ou em atendimento, e os que ele está atendendo (como atendente). Cada
+    lado da união usa o índice (operador_id/atendente_id, status).
+    """
+    A = Atendimento
+    operador = db.select(
+        A.operador_id.label("usuario_id"), A.status, db.literal("operador").label("papel")
+    ).where(A.status.in_(StatusAtendimento.EM_ABERTO))
+    atendente = db.select(
+        A.atendente_id, A.status, db.literal("atendente")
+    ).where(A.atendente_id.isnot(None), A.status == StatusAtendimento.EM_ATENDIMENTO)
+    if usuario_id is not None:
+        operador = operador.where(A.operador_id == usuario_id)
+        atendente = atendente.where(A.atendente_id == usuario_id)
+    fila = db.union_all(operador, atendente).subquery("fila")
+
+    def contar(papel, status):
+        return func.count(fila.c.usuario_id).filter(fila.c.papel == papel, fila.c.status == status)
+
+    consulta = (
+        db.select(
+            Usuario.id,
+            func.coalesce(Usuario.nome, Usuario.login).label("nome"),
+            Usuario.perfil,
+            contar("operador", StatusAtendimento.ABERTO).label("abertos"),
+            contar("operador", StatusAtendimento.EM_ATENDIMENTO).label("em_atendimento"),
+            contar("atendente", StatusAtendimento.EM_ATENDIMENTO).label("atendendo"),
+        )
+        .outerjoin(fila, fila.c.usuario_id == Usuario.id)
+        .group_by(Usuario.id, Usuario.nome, Usuario.login, Usuario.perfil)
+        .order_by(func.coalesce(Usuario.nome, Usuario.login))
+    )
+    if usuario_id is not None:
+        consulta = consulta.where(Usuario.id == usuario_id)
+
+    return [
+        {
+            "usuario_id": linha.id,
+            "usuario": linha.nome,
+            "perfil": linha.perfil,
+            "abertos": linha.abertos,
+            "em_atendimento": linha.em_atendimento,
+            "atendendo": linha.atendendo,
+        }
+        for linha in db.session.execute(consulta)
+    ]
+
+
 @app.route("/operador/chamados")
 @login_required
+@leitura_replica
 def operador_chamados():
-    chamados = Atendimento.query.all()
-    return render_template("operador_chamados.html", chamados=chamados)
+    """Fila do usuário: chamados que abriu (operador) ou que está atendendo (atendente).
+
+    ?papel=operador|atendente troca a fila (padrão pelo perfil), ?status=
+    filtra um status ou "Todos" (padrão: só os em aberto) e o Admin pode ver
+    a fila de outro usuário com ?usuario_id=.
+    """
+    usuario = current_user
+    outro_id = request.args.get("usuario_id", type=int)
+    if outro_id and outro_id != current_user.id:
+        if current_user.perfil != "Admin":
+            abort(403)
+        usuario = db.get_or_404(Usuario, outro_id)
+
+    papel = request.args.get("papel")
+    if papel not in ("operador", "atendente"):
+        papel = "atendente" if usuario.perfil == "Atendente" else "operador"
+    coluna = Atendimento.atendente_id if papel == "atendente" else Atendimento.operador_id
+
+    consulta = Atendimento.query.options(joinedload(Atendimento.abrigo)).filter(coluna == usuario.id)
+    status = request.args.get("status")
+    if status == "Todos":
+        consulta = consulta.order_by(Atendimento.criado_em.desc())
+    elif status in StatusAtendimento.TODOS:
+        consulta = consulta.filter(Atendimento.status == status).order_by(Atendimento.criado_em.desc())
+    else:
+        # Fila: os mais antigos primeiro
+        status = None
+        consulta = consulta.filter(Atendimento.status.in_(StatusAtendimento.EM_ABERTO)).order_by(Atendimento.criado_em)
+
+    carga = carga_por_usuario(usuario.id)
+    return render_template(
+        "operador_chamados.html",
+        chamados=consulta.all(),
+        usuario=usuario,
+        papel=papel,
+        status=status,
+        carga=carga[0] if carga else None,
+    )
+
+
+@app.route("/operador/carga")
+@login_required
+@requer_perfil("Admin")
+@leitura_replica
+def carga_operadores():
+    dados = {"gerado_em": agora().isoformat(), "usuarios": carga_por_usuario()}
+
+    if request.args.get("formato") == "json" or request.accept_mimetypes.best == "application/json":
+        return jsonify(dados)
+
+    return render_template("operador_carga.html", **dados)
 
 
 @app.route('/operador/novo-chamado', methods=['GET', 'POST'])
@@ -324,32 +1492,433 @@ def novo_chamado():
         telefone = request.form.get('telefone')
         abrigo_id = request.form.get('abrigo')
         descricao = request.form.get('descricao')
+        cliente_uuid = uuid_valido(request.form.get('cliente_uuid'))
 
         if not all([solicitante, telefone, abrigo_id, descricao]):
             flash('Todos os campos são obrigatórios!', 'error')
             return redirect(url_for('novo_chamado'))
 
-        atendimento = Atendimento(
-            solicitante=solicitante,
-            telefone=telefone,
-            abrigo_id=abrigo_id,
-            descricao=descricao,
-            operador_id=current_user.id,
-            operador_nome=current_user.nome or current_user.login,
-            status="Aberto" # Definindo o status como "Aberto"
-        )
+        if cliente_uuid and Atendimento.query.filter_by(cliente_uuid=cliente_uuid).first():
+            flash('Este atendimento já tinha sido salvo.', 'success')
+            return redirect(url_for('atendimentos'))
 
-        db.session.add(atendimento)
-        db.session.commit()
+        atendimento = criar_atendimento(solicitante, telefone, abrigo_id, descricao, cliente_uuid=cliente_uuid)
+        if atendimento is None:
+            db.session.rollback()
+            flash('O abrigo selecionado não tem mais vagas. Escolha outro abrigo.', 'error')
+            return redirect(url_for('novo_chamado'))
+        duplicado_de_id = atendimento.duplicado_de_id
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Reenvio simultâneo do mesmo formulário: o outro já gravou
+            db.session.rollback()
+            flash('Este atendimento já tinha sido salvo.', 'success')
+            return redirect(url_for('atendimentos'))
+
+        registrar_log("Criar Atendimento",f"Atendimento criado para '{solicitante}' (Abrigo ID {abrigo_id})",
+                      entidade="atendimento", entidade_id=atendimento.id,
+                      dados={"abrigo_id": int(abrigo_id), "duplicado_de_id": duplicado_de_id})
 
-        registrar_log("Criar Atendimento",f"Atendimento criado para '{solicitante}' (Abrigo ID {abrigo_id})")
+        if duplicado_de_id:
+            flash(f'Atendimento salvo, mas parece duplicado do atendimento #{duplicado_de_id} '
+                  f'(mesmo telefone e descrição parecida). Confira e mescle se for o caso.', 'error')
+            return redirect(url_for('view_atendimento', id=atendimento.id))
 
         flash('Atendimento salvo com sucesso!', 'success')
         return redirect(url_for('atendimentos'))
 
-    abrigos = Abrigo.query.filter_by(status="Ativo").all()
+    return render_template('operador_novo_chamado.html', abrigos=abrigos_por_disponibilidade())
+
+
+# ---------------- SINCRONIZAÇÃO DA FILA OFFLINE ------------------
+# O formulário de novo atendimento guarda os chamados no IndexedDB do
+# navegador e envia em lotes quando há conexão. Cada chamado leva um UUID
+# gerado no cliente, então reenviar um lote (resposta perdida, duas abas)
+# não duplica nada: o que já existe volta como "duplicado".
+
+def uuid_valido(valor):
+    """UUID normalizado (minúsculo, com hífens) ou None se inválido."""
+    try:
+        return str(uuid.UUID(str(valor)))
+    except (TypeError, ValueError):
+        return None
+
+
+def criar_atendimento(solicitante, telefone, abrigo_id, descricao, cliente_uuid=None, criado_em=None):
+    """Cria o atendimento com histórico e relatórios (mesma transação, sem commit).
+
+    Retorna None, sem gravar nada, se o abrigo não tem mais vagas. Se houver
+    um chamado parecido do mesmo telefone, o novo já sai marcado como
+    provável duplicado dele (`duplicado_de_id`).
+    """
+    if not ocupar_vaga(abrigo_id):
+        return None
+
+    duplicados = possiveis_duplicados(telefone, descricao, criado_em)
 
-    return render_template('operador_novo_chamado.html', abrigos=abrigos)
+    atendimento = Atendimento(
+        solicitante=solicitante,
+        telefone=telefone,
+        abrigo_id=abrigo_id,
+        descricao=descricao,
+        operador_id=current_user.id,
+        operador_nome=current_user.nome or current_user.login,
+        status=StatusAtendimento.ABERTO,
+        cliente_uuid=cliente_uuid,
+        duplicado_de_id=duplicados[0].id if duplicados else None,
+    )
+    if criado_em:
+        atendimento.criado_em = criado_em
+        atendimento.ultima_atualizacao = criado_em
+
+    db.session.add(atendimento)
+    db.session.flush()
+    registrar_historico_status(atendimento.id, None, atendimento.status, data_hora=criado_em)
+    relatorio_registrar_abertura(atendimento)
+    return atendimento
+
+
+def _data_do_cliente(valor):
+    """Horário em que o chamado foi registrado offline; nunca no futuro."""
+    momento = agora()
+    if not valor:
+        return momento
+    try:
+        data_hora = datetime.fromisoformat(str(valor))
+    except ValueError:
+        return momento
+    data_hora = _como_local(data_hora)
+    return min(data_hora, momento)
+
+
+def _sincronizar_lote(itens):
+    uuids = [uuid_valido(item.get("uuid")) if isinstance(item, dict) else None for item in itens]
+
+    # Uma consulta para os já gravados e outra para os abrigos referenciados
+    existentes = dict(
+        db.session.query(Atendimento.cliente_uuid, Atendimento.id)
+        .filter(Atendimento.cliente_uuid.in_([u for u in uuids if u]))
+        .all()
+    )
+    ids_abrigo = set()
+    for item in itens:
+        if isinstance(item, dict) and str(item.get("abrigo_id", "")).isdigit():
+            ids_abrigo.add(int(item["abrigo_id"]))
+    abrigos_validos = {
+        id_ for (id_,) in db.session.query(Abrigo.id).filter(Abrigo.id.in_(ids_abrigo)).all()
+    }
+
+    resultados = []
+    for item, cliente_uuid in zip(itens, uuids):
+        if not cliente_uuid:
+            resultados.append({"uuid": item.get("uuid") if isinstance(item, dict) else None,
+                               "status": "invalido", "erro": "UUID ausente ou inválido"})
+            continue
+
+        if cliente_uuid in existentes:
+            resultados.append({"uuid": cliente_uuid, "status": "duplicado", "id": existentes[cliente_uuid]})
+            continue
+
+        campos = {campo: str(item.get(campo) or "").strip()
+                  for campo in ("solicitante", "telefone", "abrigo_id", "descricao")}
+        if not all(campos.values()):
+            resultados.append({"uuid": cliente_uuid, "status": "invalido", "erro": "Todos os campos são obrigatórios"})
+            continue
+        if not campos["abrigo_id"].isdigit() or int(campos["abrigo_id"]) not in abrigos_validos:
+            resultados.append({"uuid": cliente_uuid, "status": "invalido", "erro": "Abrigo não encontrado"})
+            continue
+
+        atendimento = criar_atendimento(
+            campos["solicitante"][:255],
+            campos["telefone"][:20],
+            int(campos["abrigo_id"]),
+            campos["descricao"][:1000],
+            cliente_uuid=cliente_uuid,
+            criado_em=_data_do_cliente(item.get("criado_em")),
+        )
+        if atendimento is None:
+            resultados.append({"uuid": cliente_uuid, "status": "invalido", "erro": "Abrigo sem vagas"})
+            continue
+        existentes[cliente_uuid] = atendimento.id
+        resultados.append({"uuid": cliente_uuid, "status": "criado", "id": atendimento.id,
+                           "duplicado_de": atendimento.duplicado_de_id})
+
+    criados = [r["id"] for r in resultados if r["status"] == "criado"]
+    if criados:
+        registrar_log(
+            "Sincronizar Atendimentos",
+            f"{len(criados)} atendimento(s) criado(s) pela fila offline",
+            commit=False,
+            entidade="atendimento",
+            dados={"ids": criados},
+        )
+    return resultados
+
+
+@app.route("/api/atendimentos/lote", methods=["POST"])
+@login_required
+def api_atendimentos_lote():
+    """Cria vários atendimentos numa transação. Idempotente pelo `uuid` de cada item.
+
+    Entrada: {"atendimentos": [{"uuid", "solicitante", "telefone", "abrigo_id",
+    "descricao", "criado_em"}]}. Saída: um resultado por item, na mesma ordem,
+    com status "criado", "duplicado" ou "invalido". Os criados trazem também
+    `duplicado_de`: o chamado em aberto do mesmo telefone de que este parece
+    ser uma repetição (ou null).
+    """
+    dados = request.get_json(silent=True) or {}
+    itens = dados.get("atendimentos")
+    if not isinstance(itens, list):
+        return jsonify({"erro": "Envie a lista em 'atendimentos'."}), 400
+    if len(itens) > app.config["SYNC_BATCH_MAX"]:
+        return jsonify({"erro": f"No máximo {app.config['SYNC_BATCH_MAX']} atendimentos por lote."}), 413
+
+    for tentativa in range(2):
+        try:
+            resultados = _sincronizar_lote(itens)
+            db.session.commit()
+            break
+        except IntegrityError:
+            # Outro envio gravou algum desses UUIDs entre a consulta e o commit;
+            # na segunda passada eles aparecem como duplicados
+            db.session.rollback()
+            if tentativa:
+                raise
+
+    return jsonify({"resultados": resultados})
+
+
+# ---------------- CHAMADOS DUPLICADOS ------------------
+# Em enchentes o mesmo telefone abre vários chamados quase iguais. Na
+# criação, os chamados em aberto do mesmo telefone dentro da janela
+# (índice telefone_normalizado + criado_em, sem varrer a tabela) têm a
+# descrição comparada com a do novo; o mais parecido acima do limite vira
+# o `duplicado_de` do novo. O operador confere e mescla (ou descarta).
+
+def _texto_comparavel(texto):
+    return " ".join(_sem_acento(texto or "").lower().split())
+
+
+def similaridade_texto(a, b):
+    """Semelhança entre 0 e 1 de dois textos, sem diferenciar acentos e maiúsculas."""
+    a, b = _texto_comparavel(a), _texto_comparavel(b)
+    if not a or not b:
+        return 0.0
+    if a in b or b in a:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def possiveis_duplicados(telefone, descricao, criado_em=None, excluir_id=None):
+    """Chamados em aberto do mesmo telefone na janela, do mais parecido ao menos."""
+    telefone_normalizado = normalizar_telefone(telefone)
+    if not telefone_normalizado:
+        return []
+
+    referencia = criado_em or agora()
+    janela = timedelta(hours=app.config["DUPLICATE_WINDOW_HOURS"])
+    consulta = (
+        Atendimento.query
+        .filter(
+            Atendimento.telefone_normalizado == telefone_normalizado,
+            Atendimento.criado_em >= referencia - janela,
+            Atendimento.criado_em <= referencia + janela,
+            Atendimento.status.in_(StatusAtendimento.EM_ABERTO),
+        )
+        .order_by(Atendimento.criado_em.desc())
+        .limit(app.config["DUPLICATE_MAX_CANDIDATES"])
+    )
+    if excluir_id is not None:
+        consulta = consulta.filter(Atendimento.id != excluir_id)
+
+    limite = app.config["DUPLICATE_SIMILARITY"]
+    pontuados = [(similaridade_texto(descricao, candidato.descricao), candidato) for candidato in consulta]
+    return [candidato for nota, candidato in sorted(pontuados, key=lambda p: -p[0]) if nota >= limite]
+
+
+def mesclar_atendimentos(principal_id, duplicado_id):
+    """Mescla o duplicado no principal (mesma transação, sem commit).
+
+    A descrição do duplicado é acrescentada à do principal (se trouxer algo
+    novo) e ele passa para o status Mesclado apontando para o principal, o
+    que libera a vaga no abrigo. Cada um mantém o seu histórico e ganha um
+    log da mesclagem. Mesclado não conta como cancelamento nos relatórios.
+    Retorna o principal, ou None se algum dos dois não está mais em aberto
+    ou foi alterado por outro usuário no meio; nesse caso quem chamou deve
+    fazer rollback.
+    """
+    if principal_id == duplicado_id:
+        return None
+
+    principal = db.session.get(Atendimento, principal_id, with_for_update=True)
+    duplicado = db.session.get(Atendimento, duplicado_id)
+    if principal is None or duplicado is None:
+        return None
+    if principal.status not in StatusAtendimento.EM_ABERTO or duplicado.status not in StatusAtendimento.EM_ABERTO:
+        return None
+    descricao_duplicado = duplicado.descricao
+
+    if not executar_transicao(duplicado_id, "mesclar", duplicado_de_id=principal_id):
+        return None
+
+    if _texto_comparavel(descricao_duplicado) not in _texto_comparavel(principal.descricao):
+        principal.descricao = f"{principal.descricao}\n[Atendimento #{duplicado_id}] {descricao_duplicado}"[:1000]
+    if principal.duplicado_de_id == duplicado_id:
+        principal.duplicado_de_id = None
+    principal.editado_por = current_user.login
+    principal.ultima_atualizacao = agora()
+
+    # Quem apontava para o duplicado passa a apontar para o principal
+    for outro in Atendimento.query.filter(
+        Atendimento.duplicado_de_id == duplicado_id,
+        Atendimento.id != principal_id,
+        Atendimento.status.in_(StatusAtendimento.EM_ABERTO),
+    ):
+        outro.duplicado_de_id = principal_id
+
+    descricao_log = f"Atendimento #{duplicado_id} mesclado no atendimento #{principal_id}"
+    registrar_log("Mesclar Atendimentos", descricao_log, commit=False,
+                  entidade="atendimento", entidade_id=principal_id, dados={"duplicado_id": duplicado_id})
+    registrar_log("Mesclar Atendimentos", descricao_log, commit=False,
+                  entidade="atendimento", entidade_id=duplicado_id, dados={"principal_id": principal_id})
+    return principal
+
+
+@app.post("/atendimento/<int:id>/mesclar")
+@login_required
+def mesclar_atendimento(id):
+    if current_user.perfil not in ['Admin', 'Operador']:
+        flash("Você não tem permissão para mesclar atendimentos.", "error")
+        return redirect(url_for("view_atendimento", id=id))
+
+    duplicado = Atendimento.query.get_or_404(id)
+    principal_id = request.form.get("principal_id", type=int) or duplicado.duplicado_de_id
+    if not principal_id:
+        flash("Informe o atendimento principal.", "error")
+        return redirect(url_for("view_atendimento", id=id))
+
+    try:
+        principal = mesclar_atendimentos(principal_id, id)
+        if principal is None:
+            db.session.rollback()
+            flash("Não foi possível mesclar: os dois atendimentos precisam estar em aberto. "
+                  "Recarregue a página e tente novamente.", "error")
+            return redirect(url_for("view_atendimento", id=id))
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        flash(MENSAGEM_CONFLITO, "error")
+        return redirect(url_for("view_atendimento", id=id))
+
+    flash(f"Atendimento #{id} mesclado no atendimento #{principal_id}.", "success")
+    return redirect(url_for("view_atendimento", id=principal_id))
+
+
+@app.post("/atendimento/<int:id>/nao-duplicado")
+@login_required
+def descartar_duplicado(id):
+    if current_user.perfil not in ['Admin', 'Operador']:
+        flash("Você não tem permissão para alterar este atendimento.", "error")
+        return redirect(url_for("view_atendimento", id=id))
+
+    atendimento = Atendimento.query.get_or_404(id)
+    if atendimento.duplicado_de_id and atendimento.status in StatusAtendimento.EM_ABERTO:
+        anterior = atendimento.duplicado_de_id
+        atendimento.duplicado_de_id = None
+        registrar_log("Descartar Duplicado", f"Atendimento #{id} não é duplicado do atendimento #{anterior}",
+                      commit=False, entidade="atendimento", entidade_id=id, dados={"duplicado_de_id": anterior})
+        db.session.commit()
+        flash("Marcação de duplicado removida.", "success")
+    return redirect(url_for("view_atendimento", id=id))
+
+
+# ---------------- OCUPAÇÃO DOS ABRIGOS ------------------
+# Cada atendimento em aberto reserva uma vaga no seu abrigo. A reserva é um
+# UPDATE condicional na linha do abrigo: o banco serializa as gravações na
+# mesma linha, então duas aberturas simultâneas não passam da capacidade.
+
+def _registrar_ocupacao(linhas):
+    """Evento abrigo.ocupacao_alterada para cada linha (id, ocupacao, capacidade) do RETURNING."""
+    conexao = db.session.connection()
+    for linha in linhas:
+        registrar_evento("abrigo.ocupacao_alterada", "abrigo", linha.id, {
+            "id": linha.id,
+            "ocupacao": linha.ocupacao,
+            "capacidade": linha.capacidade,
+        }, conexao=conexao)
+
+
+def ocupar_vaga(abrigo_id):
+    """Reserva uma vaga no abrigo (mesma transação). False se está lotado."""
+    tabela = Abrigo.__table__
+    linha = db.session.execute(
+        tabela.update()
+        .where(
+            tabela.c.id == abrigo_id,
+            or_(tabela.c.capacidade.is_(None), tabela.c.ocupacao < tabela.c.capacidade),
+        )
+        .values(ocupacao=tabela.c.ocupacao + 1)
+        .returning(tabela.c.id, tabela.c.ocupacao, tabela.c.capacidade)
+    ).first()
+    if linha is None:
+        return False
+    _registrar_ocupacao([linha])
+    return True
+
+
+def liberar_vaga(abrigo_id):
+    tabela = Abrigo.__table__
+    linhas = db.session.execute(
+        tabela.update()
+        .where(tabela.c.id == abrigo_id, tabela.c.ocupacao > 0)
+        .values(ocupacao=tabela.c.ocupacao - 1)
+        .returning(tabela.c.id, tabela.c.ocupacao, tabela.c.capacidade)
+    ).all()
+    _registrar_ocupacao(linhas)
+
+
+def abrigos_por_disponibilidade():
+    """Abrigos ativos do que tem mais vagas livres para o que tem menos.
+
+    Os sem capacidade informada vêm por último. Ordena pela mesma expressão
+    do índice ix_abrigos_disponibilidade.
+    """
+    return (
+        Abrigo.query.filter_by(status="Ativo")
+        .order_by(_vagas_livres.desc().nulls_last(), Abrigo.nome)
+        .all()
+    )
+
+
+def recalcular_ocupacao():
+    """Refaz a ocupação de todos os abrigos contando os atendimentos em aberto.
+
+    Trava as linhas dos abrigos (SELECT ... FOR UPDATE) antes de contar:
+    quem já reservou ou liberou vaga termina antes, e a contagem, um comando
+    posterior, enxerga o resultado; quem chegar depois espera o commit e
+    aplica o seu +1/-1 sobre o valor recalculado.
+    """
+    db.session.execute(db.select(Abrigo.id).order_by(Abrigo.id).with_for_update()).all()
+    em_aberto = (
+        db.select(func.count(Atendimento.id))
+        .where(
+            Atendimento.abrigo_id == Abrigo.id,
+            Atendimento.status.in_(StatusAtendimento.EM_ABERTO),
+        )
+        .scalar_subquery()
+    )
+    # Só os abrigos cuja contagem mudou geram evento
+    tabela = Abrigo.__table__
+    linhas = db.session.execute(
+        tabela.update()
+        .where(tabela.c.ocupacao != em_aberto)
+        .values(ocupacao=em_aberto)
+        .returning(tabela.c.id, tabela.c.ocupacao, tabela.c.capacidade)
+    ).all()
+    _registrar_ocupacao(linhas)
+    db.session.commit()
 
 
 @app.route("/api/abrigo/<id>")
@@ -368,6 +1937,7 @@ def api_abrigo(id):
 
 @app.route("/atendimentos")
 @login_required
+@leitura_replica
 def atendimentos():
     chamados = Atendimento.query.all()
     return render_template("atendimentos.html", chamados=chamados)
@@ -381,26 +1951,48 @@ def editar_atendimento(id):
     atendimento = Atendimento.query.get_or_404(id)
 
     if request.method == "POST":
-        if atendimento.status != 'Aberto':
+        if atendimento.status != StatusAtendimento.ABERTO:
             flash("Este chamado não pode ser editado porque não está aberto.", "error")
             return redirect(url_for("atendimentos"))
 
+        # Outro usuário salvou depois que este formulário foi aberto
+        versao_formulario = request.form.get("versao", type=int)
+        if versao_formulario is not None and versao_formulario != atendimento.versao:
+            flash(MENSAGEM_CONFLITO, "error")
+            return redirect(url_for("editar_atendimento", id=id))
+
+        abrigo_anterior_id = atendimento.abrigo_id
+
         # Atualiza apenas os campos editáveis
         atendimento.solicitante = request.form.get("solicitante")
         atendimento.telefone = request.form.get("telefone")
-        atendimento.abrigo_id = request.form.get("abrigo")
+        atendimento.abrigo_id = request.form.get("abrigo", type=int)
         atendimento.descricao = request.form.get("descricao")
-        atendimento.ultima_atualizacao = datetime.now(pytz.timezone('America/Sao_Paulo'))
-
-        db.session.commit()
-
-        registrar_log("Editar Atendimento",f"Atendimento #{atendimento.id} atualizado")
+        atendimento.ultima_atualizacao = agora()
+
+        if str(atendimento.abrigo_id) != str(abrigo_anterior_id):
+            if not ocupar_vaga(atendimento.abrigo_id):
+                db.session.rollback()
+                flash("O abrigo selecionado não tem mais vagas.", "error")
+                return redirect(url_for("editar_atendimento", id=id))
+            liberar_vaga(abrigo_anterior_id)
+
+        relatorio_mover_abrigo(atendimento, abrigo_anterior_id)
+        campos = _campos_alterados(atendimento)
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            flash(MENSAGEM_CONFLITO, "error")
+            return redirect(url_for("editar_atendimento", id=id))
+
+        registrar_log("Editar Atendimento",f"Atendimento #{atendimento.id} atualizado",
+                      entidade="atendimento", entidade_id=id, dados={"campos": campos})
 
         flash("Atendimento atualizado com sucesso!", "success")
         return redirect(url_for("atendimentos"))
 
-    abrigos = Abrigo.query.filter_by(status="Ativo").all()
-    return render_template("operador_editar_chamado.html", atendimento=atendimento, abrigos=abrigos)
+    return render_template("operador_editar_chamado.html", atendimento=atendimento, abrigos=abrigos_por_disponibilidade())
 
 
 
@@ -409,7 +2001,260 @@ def editar_atendimento(id):
 @login_required
 def view_atendimento(id):
     atendimento = Atendimento.query.get_or_404(id)
-    return render_template("atendimento_view.html", atendimento=atendimento)
+    # Chamados marcados como prováveis duplicados deste (índice em duplicado_de_id)
+    duplicados = (
+        Atendimento.query
+        .filter(
+            Atendimento.duplicado_de_id == id,
+            Atendimento.status.in_(StatusAtendimento.EM_ABERTO),
+        )
+        .order_by(Atendimento.criado_em)
+        .all()
+    )
+    return render_template("atendimento_view.html", atendimento=atendimento, duplicados=duplicados)
+
+# ----------------- BUSCA DE ATENDIMENTOS ------------------
+# No PostgreSQL a busca usa a coluna gerada "busca_vetor" (tsvector com
+# stemming em português) e o seu índice GIN, declarados em Atendimento. Em
+# outros bancos (SQLite nos testes) cai no índice invertido em memória abaixo.
+
+CAMPOS_BUSCA = ("solicitante", "telefone", "descricao", "conclusao", "justificativa_cancelamento")
+
+PALAVRAS_VAZIAS = {
+    "a", "o", "as", "os", "um", "uma", "de", "da", "do", "das", "dos", "e",
+    "em", "na", "no", "nas", "nos", "por", "para", "com", "sem", "que", "se",
+    "ao", "aos", "ou", "foi", "esta", "sua", "seu", "mais", "muito",
+}
+
+SUFIXOS_STEM = (
+    "amentos", "imentos", "amento", "imento", "mente", "acoes", "icoes",
+    "acao", "icao", "oes", "aes", "ais", "eis", "ando", "endo", "indo",
+    "ados", "idos", "adas", "idas", "ado", "ido", "ada", "ida",
+    "ar", "er", "ir", "as", "es", "os", "a", "e", "o", "s",
+)
+
+
+def _sem_acento(texto):
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _stem(palavra):
+    # Stemmer leve: corta o maior sufixo conhecido mantendo ao menos 3 letras
+    for sufixo in SUFIXOS_STEM:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 3:
+            return palavra[:-len(sufixo)]
+    return palavra
+
+
+def tokenizar(texto):
+    palavras = re.findall(r"\w+", _sem_acento((texto or "").lower()))
+    return [_stem(p) for p in palavras if p not in PALAVRAS_VAZIAS]
+
+
+class IndiceInvertido:
+    """Índice invertido em memória (termo -> {id do atendimento: frequência})."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.carregado = False
+        self.postings = defaultdict(dict)
+        self.termos_por_doc = {}
+        self.telefones = {}
+
+    def _indexar(self, atendimento):
+        self._remover(atendimento.id)
+
+        frequencias = defaultdict(int)
+        for campo in CAMPOS_BUSCA:
+            for termo in tokenizar(getattr(atendimento, campo)):
+                frequencias[termo] += 1
+
+        for termo, freq in frequencias.items():
+            self.postings[termo][atendimento.id] = freq
+
+        self.termos_por_doc[atendimento.id] = list(frequencias)
+        self.telefones[atendimento.id] = atendimento.telefone_normalizado or ""
+
+    def _remover(self, atendimento_id):
+        for termo in self.termos_por_doc.pop(atendimento_id, ()):
+            docs = self.postings.get(termo)
+            if docs is not None:
+                docs.pop(atendimento_id, None)
+                if not docs:
+                    del self.postings[termo]
+        self.telefones.pop(atendimento_id, None)
+
+    def carregar(self):
+        with self.lock:
+            if self.carregado:
+                return
+            for atendimento in Atendimento.query.yield_per(500):
+                self._indexar(atendimento)
+            self.carregado = True
+
+    def indexar(self, atendimento):
+        with self.lock:
+            if self.carregado:
+                self._indexar(atendimento)
+
+    def remover(self, atendimento_id):
+        with self.lock:
+            if self.carregado:
+                self._remover(atendimento_id)
+
+    def buscar(self, termo_busca):
+        """Retorna [(id, score)] ordenado por relevância (TF-IDF simples)."""
+        self.carregar()
+
+        termos = tokenizar(termo_busca)
+        digitos = normalizar_telefone(termo_busca)
+        total_docs = max(len(self.termos_por_doc), 1)
+        scores = defaultdict(float)
+
+        with self.lock:
+            for termo in termos:
+                docs = self.postings.get(termo, {})
+                if not docs:
+                    continue
+                idf = math.log(1 + total_docs / len(docs))
+                for doc_id, freq in docs.items():
+                    scores[doc_id] += (1 + math.log(freq)) * idf
+
+            if len(digitos) >= 4:
+                for doc_id, telefone in self.telefones.items():
+                    if telefone.startswith(digitos):
+                        scores[doc_id] += 10.0
+
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+indice_busca = IndiceInvertido()
+
+
+def _usa_busca_postgres():
+    return db.engine.dialect.name == "postgresql"
+
+
+# O índice em memória só recebe o que foi de fato gravado: as mudanças ficam
+# pendentes na sessão (session.info) e entram no after_commit; um rollback
+# as descarta.
+
+def _pendencias_indice_busca(sessao):
+    return sessao.info.setdefault("indice_busca_pendente", {})
+
+
+def agendar_indexacao(sessao, atendimento):
+    # Cópia dos campos: depois do commit os objetos expiram e não dá mais para ir ao banco
+    _pendencias_indice_busca(sessao)[atendimento.id] = SimpleNamespace(
+        id=atendimento.id,
+        telefone_normalizado=atendimento.telefone_normalizado,
+        **{campo: getattr(atendimento, campo) for campo in CAMPOS_BUSCA},
+    )
+
+
+@db.event.listens_for(Atendimento, "after_insert")
+@db.event.listens_for(Atendimento, "after_update")
+def _atualiza_indice_busca(mapper, connection, target):
+    if connection.dialect.name != "postgresql":
+        agendar_indexacao(db.inspect(target).session, target)
+
+
+@db.event.listens_for(Atendimento, "after_delete")
+def _remove_do_indice_busca(mapper, connection, target):
+    if connection.dialect.name != "postgresql":
+        _pendencias_indice_busca(db.inspect(target).session)[target.id] = None
+
+
+@db.event.listens_for(SessaoComReplica, "after_commit")
+def _aplica_indice_busca(sessao):
+    for atendimento_id, copia in sessao.info.pop("indice_busca_pendente", {}).items():
+        if copia is None:
+            indice_busca.remover(atendimento_id)
+        else:
+            indice_busca.indexar(copia)
+
+
+@db.event.listens_for(SessaoComReplica, "after_rollback")
+def _descarta_indice_busca(sessao):
+    sessao.info.pop("indice_busca_pendente", None)
+
+
+def buscar_atendimentos(termo_busca, pagina=1, por_pagina=20):
+    """Busca ranqueada e paginada. Retorna (total, [(atendimento, rank)])."""
+    inicio = (pagina - 1) * por_pagina
+
+    if _usa_busca_postgres():
+        consulta = func.websearch_to_tsquery("portuguese", termo_busca)
+        vetor = Atendimento.__table__.c.busca_vetor
+        rank = func.ts_rank_cd(vetor, consulta)
+
+        filtros = [vetor.op("@@")(consulta)]
+        digitos = normalizar_telefone(termo_busca)
+        if len(digitos) >= 4:
+            filtros.append(Atendimento.telefone_normalizado.like(f"{digitos}%"))
+            # Número de telefone conta mais que uma palavra solta
+            rank = rank + db.case(
+                (Atendimento.telefone_normalizado.like(f"{digitos}%"), 10.0),
+                else_=0.0
+            )
+
+        query = (
+            db.session.query(Atendimento, rank.label("rank"))
+            .options(joinedload(Atendimento.abrigo))
+            .filter(or_(*filtros))
+        )
+        total = query.order_by(None).count()
+        resultados = (
+            query.order_by(rank.desc(), Atendimento.id.desc())
+            .offset(inicio)
+            .limit(por_pagina)
+            .all()
+        )
+        return total, [(a, float(r)) for a, r in resultados]
+
+    ranqueados = indice_busca.buscar(termo_busca)
+    pagina_ids = ranqueados[inicio:inicio + por_pagina]
+    atendimentos = {
+        a.id: a for a in Atendimento.query.options(joinedload(Atendimento.abrigo)).filter(
+            Atendimento.id.in_([doc_id for doc_id, _ in pagina_ids])
+        )
+    }
+    resultados = [(atendimentos[doc_id], score) for doc_id, score in pagina_ids if doc_id in atendimentos]
+    return len(ranqueados), resultados
+
+
+@app.route("/api/atendimentos/search")
+@login_required
+@leitura_replica
+def api_buscar_atendimentos():
+    termo_busca = (request.args.get("q") or "").strip()
+    pagina = max(request.args.get("page", 1, type=int), 1)
+    por_pagina = min(max(request.args.get("per_page", 20, type=int), 1), 100)
+
+    if not termo_busca:
+        return jsonify({"erro": "Informe o termo de busca (q)."}), 400
+
+    total, resultados = buscar_atendimentos(termo_busca, pagina, por_pagina)
+
+    return jsonify({
+        "total": total,
+        "page": pagina,
+        "per_page": por_pagina,
+        "resultados": [
+            {
+                "id": a.id,
+                "solicitante": a.solicitante,
+                "telefone": a.telefone,
+                "abrigo": a.abrigo.nome if a.abrigo else None,
+                "status": a.status,
+                "descricao": a.descricao,
+                "criado_em": a.criado_em.strftime("%d/%m/%Y %H:%M:%S") if a.criado_em else None,
+                "rank": round(rank, 4),
+            }
+            for a, rank in resultados
+        ],
+    })
 
 # ---------------- ROTAS - ABRIGOS ------------------
 
@@ -433,13 +2278,15 @@ def add_abrigo():
             estado=estado,
             status=request.form.get("status"),
             latitude=request.form.get("latitude") or None,
-            longitude=request.form.get("longitude") or None
+            longitude=request.form.get("longitude") or None,
+            capacidade=request.form.get("capacidade", type=int)
         )
 
         db.session.add(novo_abrigo)
         db.session.commit()
 
-        registrar_log("Criar Abrigo", f"Abrigo '{novo_abrigo.nome}' cadastrado")
+        registrar_log("Criar Abrigo", f"Abrigo '{novo_abrigo.nome}' cadastrado",
+                      entidade="abrigo", entidade_id=novo_abrigo.id, dados={"capacidade": novo_abrigo.capacidade})
 
 
         # ====== TOAST ======
@@ -465,10 +2312,18 @@ def edit_abrigo(id):
         abrigo.status = request.form.get("status")
         abrigo.latitude = request.form.get("latitude") or None
         abrigo.longitude = request.form.get("longitude") or None
+        abrigo.capacidade = request.form.get("capacidade", type=int)
+        campos = _campos_alterados(abrigo)
 
-        db.session.commit()
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            flash("Outro usuário alterou este abrigo enquanto você editava. Confira os dados e salve de novo.", "error")
+            return redirect(url_for("edit_abrigo", id=id))
 
-        registrar_log("Editar Abrigo", f"Abrigo '{abrigo.nome}' atualizado")
+        registrar_log("Editar Abrigo", f"Abrigo '{abrigo.nome}' atualizado",
+                      entidade="abrigo", entidade_id=id, dados={"campos": campos})
 
         # ====== TOAST ======
         flash("Abrigo atualizado com sucesso!", "success")
@@ -492,6 +2347,144 @@ def listar_abrigos():
     return render_template("config_abrigos.html", abrigos=abrigos)
 
 
+# ----------------- TRANSIÇÕES DE STATUS ------------------
+# As transições permitidas ficam em StatusAtendimento.TRANSICOES. Cada uma é
+# um UPDATE condicional com RETURNING: só altera a linha se o status atual é
+# uma origem permitida e ninguém mudou o chamado (mesma versão). Se outro
+# operador chegou antes, nenhuma linha volta e a rota responde com conflito,
+# sem lock e sem carregar o objeto antes. Quando o chamado simplesmente já
+# está num status que não admite a ação (ex.: finalizar um cancelado), a
+# mensagem diz isso em vez de falar em alteração concorrente.
+
+MENSAGEM_CONFLITO = "Este atendimento foi alterado por outro usuário. Recarregue a página e tente novamente."
+MENSAGEM_TRANSICAO_INVALIDA = "Transição inválida para o status atual do atendimento ({status})."
+
+
+def registrar_historico_status(atendimento_id, status_anterior, status_novo, data_hora=None):
+    usuario = current_user if current_user and current_user.is_authenticated else None
+    db.session.add(HistoricoStatusAtendimento(
+        atendimento_id=atendimento_id,
+        status_anterior=status_anterior,
+        status_novo=status_novo,
+        usuario_id=usuario.id if usuario else None,
+        usuario_login=usuario.login if usuario else "Sistema",
+        data_hora=data_hora or agora(),
+    ))
+
+
+def executar_transicao(atendimento_id, acao, **valores):
+    """Aplica a transição `acao` ao atendimento (mesma transação, sem commit).
+
+    Retorna os dados da linha atualizada (com `status_anterior`) ou None se
+    o atendimento não existe ou não está num status de origem permitido.
+    """
+    origens, destino = StatusAtendimento.TRANSICOES[acao]
+    momento = agora()
+
+    tabela = Atendimento.__table__
+    valores = {
+        "status": destino,
+        "versao": tabela.c.versao + 1,
+        "ultima_atualizacao": momento,
+        **valores
+    }
+    if destino in StatusAtendimento.FINAIS:
+        valores.setdefault("finalizado_em", momento)
+
+    retorno = (
+        tabela.c.id, tabela.c.status, tabela.c.versao, tabela.c.criado_em,
+        tabela.c.finalizado_em, tabela.c.abrigo_id, tabela.c.operador_id,
+        tabela.c.atendente_id,
+    )
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        # Um único comando: o status anterior vem do próprio snapshot do UPDATE
+        anterior = (
+            db.select(tabela.c.id, tabela.c.status, tabela.c.versao)
+            .where(tabela.c.id == atendimento_id)
+            .subquery("anterior")
+        )
+        linha = db.session.execute(
+            tabela.update()
+            .where(
+                tabela.c.id == anterior.c.id,
+                tabela.c.status == anterior.c.status,
+                tabela.c.versao == anterior.c.versao,
+                anterior.c.status.in_(origens),
+            )
+            .values(**valores)
+            .returning(*retorno, anterior.c.status.label("status_anterior"))
+        ).first()
+        if linha is None:
+            return None
+        resultado = SimpleNamespace(**linha._mapping)
+    else:
+        # SQLite não deixa o RETURNING ler a tabela do FROM: lê o status antes
+        atual = db.session.execute(
+            db.select(tabela.c.status, tabela.c.versao).where(tabela.c.id == atendimento_id)
+        ).first()
+        if atual is None or atual.status not in origens:
+            return None
+
+        linha = db.session.execute(
+            tabela.update()
+            .where(
+                tabela.c.id == atendimento_id,
+                tabela.c.status == atual.status,
+                tabela.c.versao == atual.versao,
+            )
+            .values(**valores)
+            .returning(*retorno)
+        ).first()
+        if linha is None:
+            return None
+        resultado = SimpleNamespace(**linha._mapping, status_anterior=atual.status)
+
+        # UPDATE direto não passa pelos eventos do ORM que mantêm o índice de busca
+        agendar_indexacao(db.session, db.session.get(Atendimento, atendimento_id, populate_existing=True))
+
+    registrar_historico_status(resultado.id, resultado.status_anterior, resultado.status, momento)
+    relatorio_registrar_transicao(resultado, resultado.status_anterior)
+    registrar_evento("atendimento.status_alterado", "atendimento", resultado.id, {
+        "id": resultado.id,
+        "status": resultado.status,
+        "status_anterior": resultado.status_anterior,
+        "abrigo_id": resultado.abrigo_id,
+        "operador_id": resultado.operador_id,
+        "atendente_id": resultado.atendente_id,
+        "finalizado_em": _valor_json(resultado.finalizado_em),
+        "versao": resultado.versao,
+    })
+    if destino not in StatusAtendimento.EM_ABERTO:
+        liberar_vaga(resultado.abrigo_id)
+    return resultado
+
+
+def motivo_falha_transicao(atendimento_id, acao):
+    """Mensagem para quando executar_transicao retornou None.
+
+    Relê o status: fora das origens da ação é transição inválida; ainda numa
+    origem permitida, a versão mudou no meio (outro usuário). Retorna None se
+    o atendimento não existe.
+    """
+    origens, _ = StatusAtendimento.TRANSICOES[acao]
+    tabela = Atendimento.__table__
+    status = db.session.execute(
+        db.select(tabela.c.status).where(tabela.c.id == atendimento_id)
+    ).scalar()
+    if status is None:
+        return None
+    if status not in origens:
+        return MENSAGEM_TRANSICAO_INVALIDA.format(status=status)
+    return MENSAGEM_CONFLITO
+
+
+def resposta_conflito(mensagem=MENSAGEM_CONFLITO):
+    resposta = jsonify({"success": False, "error": mensagem})
+    resposta.status_code = 409
+    return resposta
+
+
 # ----------------- INICIAR ATENDIMENTOS ------------------
 @app.route("/atendimento/iniciar/<int:id>")
 @login_required
@@ -511,19 +2504,17 @@ def finalizar_atendimento_ajax(id):
     conclusao = data.get("conclusao")
     senha = data.get("senha")
 
-    if not check_password_hash(current_user.senha, senha):
+    if not confirmar_senha(senha):
         return jsonify({"success": False, "error": "Senha incorreta."})
 
-    atendimento = Atendimento.query.get(id)
-    if not atendimento:
-        return jsonify({"success": False, "error": "Atendimento não encontrado."})
+    # Status "Atendido" e data de finalização num único UPDATE
+    if not executar_transicao(id, "finalizar", conclusao=conclusao):
+        motivo = motivo_falha_transicao(id, "finalizar")
+        db.session.rollback()
+        if motivo is None:
+            return jsonify({"success": False, "error": "Atendimento não encontrado."})
+        return resposta_conflito(motivo)
 
-    atendimento.conclusao = conclusao
-    atendimento.status = "Atendido"
-
-    # Quando o status for alterado para "Atendido" ou "Cancelado"
-    atendimento.finalizado_em = datetime.utcnow()  # Salva a data e hora atual
-    
     db.session.commit()
 
     return jsonify({"success": True})
@@ -533,72 +2524,109 @@ def finalizar_atendimento_ajax(id):
 @app.route("/atendimento/cancelar/<int:id>/ajax", methods=["POST"])
 @login_required
 def cancelar_atendimento_ajax(id):
-    atendimento = Atendimento.query.get_or_404(id)
     data = request.get_json()
 
     justificativa = data.get("justificativa", "").strip()
     senha = data.get("senha", "").strip()
 
-    if not justificativa or not senha:
+    if not justificativa or not (senha or senha_confirmada_recente()):
         return jsonify({"success": False, "error": "Justificativa e senha são obrigatórios."})
 
-    # Valida senha do usuário logado
-    if not check_password_hash(current_user.senha, senha):
+    # Valida senha do usuário logado (ou confirmação recente)
+    if not confirmar_senha(senha):
         return jsonify({"success": False, "error": "Senha incorreta."})
 
-    # Atualiza status
-    atendimento.status = "Cancelado"
-    atendimento.justificativa_cancelamento = justificativa
+    # Atualiza status (e a data de finalização)
+    if not executar_transicao(id, "cancelar", justificativa_cancelamento=justificativa):
+        motivo = motivo_falha_transicao(id, "cancelar")
+        db.session.rollback()
+        if motivo is None:
+            abort(404)
+        return resposta_conflito(motivo)
 
-    # Quando o status for alterado para "Atendido" ou "Cancelado"
-    atendimento.finalizado_em = datetime.utcnow()  # Salva a data e hora atual
-    
     db.session.commit()
 
     
     return jsonify({"success": True})
 
-# ------------------ Rota Flask para atualizar status e abrir WhatsApp ------------------
+# ------------------ MENSAGENS DO WHATSAPP ------------------
+# Os textos ficam em templates/mensagens (configuráveis em
+# WHATSAPP_TEMPLATE_*); o Jinja compila cada template uma vez e guarda.
+# O bloco com os dados do abrigo se repete em todo chamado do mesmo
+# abrigo, então é renderizado uma vez por versão do abrigo.
+
+class CacheBlocosAbrigo:
+    """LRU em memória: (abrigo_id, versao) -> bloco de texto e link do mapa."""
+
+    def __init__(self, limite=512):
+        self.limite = limite
+        self._blocos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, abrigo):
+        chave = (abrigo.id, abrigo.versao) if abrigo else None
+        with self._lock:
+            if chave in self._blocos:
+                self._blocos.move_to_end(chave)
+                return self._blocos[chave]
+
+        bloco = SimpleNamespace(
+            bloco=render_template(app.config["WHATSAPP_TEMPLATE_ABRIGO"], abrigo=abrigo),
+            mapa_url=(
+                f"https://www.google.com/maps/search/?api=1&query={abrigo.latitude},{abrigo.longitude}"
+                if abrigo and abrigo.latitude and abrigo.longitude
+                else "Não informado"
+            ),
+        )
 
-@app.route("/atendimento/whatsapp/<int:id>", methods=["GET"])
-@login_required
-def iniciar_atendimento_whatsapp(id):
-    atendimento = Atendimento.query.get_or_404(id)
+        with self._lock:
+            self._blocos[chave] = bloco
+            while len(self._blocos) > self.limite:
+                self._blocos.popitem(last=False)
+        return bloco
 
-    if current_user.perfil not in ['Admin', 'Atendente']:
-        flash("Você não tem permissão para iniciar atendimentos.", "error")
-        return redirect(url_for("atendimentos"))
 
-    # Atualiza status
-    atendimento.status = "Em Atendimento"
-    db.session.commit()
+blocos_abrigo = CacheBlocosAbrigo()
+
 
-    # Prepara todas as informações
-    abrigo = atendimento.abrigo
-    mapa_url = (
-        f"https://www.google.com/maps/search/?api=1&query={abrigo.latitude},{abrigo.longitude}"
-        if abrigo and abrigo.latitude and abrigo.longitude
-        else "Não informado"
+def mensagem_whatsapp(atendimento, status=None):
+    """Texto do chamado para o WhatsApp. `status` substitui o do objeto (ex.: logo após a transição)."""
+    return render_template(
+        app.config["WHATSAPP_TEMPLATE_ATENDIMENTO"],
+        atendimento=atendimento,
+        abrigo=blocos_abrigo.obter(atendimento.abrigo),
+        status=status or atendimento.status,
     )
 
-    mensagem = f"""OPERAÇÃO ABRIGO AMIGO
 
-Seguem os dados do chamado e orientações para atendimento:
+def link_whatsapp(mensagem):
+    return app.config["WHATSAPP_SHARE_URL"] + quote(mensagem)
+
 
-Atendimento ID: {atendimento.id}
-Solicitante: {atendimento.solicitante}
-Contato: {atendimento.telefone}
-Abrigo: {abrigo.nome}
-Endereço: {abrigo.logradouro}, {abrigo.bairro}, CEP {abrigo.cep}
-Latitude: {abrigo.latitude}
-Longitude: {abrigo.longitude}
-Descrição: {atendimento.descricao}
-Status: {atendimento.status}
-Mapa: {mapa_url}
-"""
+@app.route("/atendimento/whatsapp/<int:id>", methods=["GET"])
+@login_required
+def iniciar_atendimento_whatsapp(id):
+    if current_user.perfil not in ['Admin', 'Atendente']:
+        flash("Você não tem permissão para iniciar atendimentos.", "error")
+        return redirect(url_for("atendimentos"))
+
+    # Atendimento e abrigo numa consulta só
+    atendimento = Atendimento.query.options(joinedload(Atendimento.abrigo)).filter_by(id=id).first_or_404()
+    status = atendimento.status
+
+    # Atualiza status (se já está em atendimento, só reenvia a mensagem)
+    if status != StatusAtendimento.EM_ATENDIMENTO:
+        resultado = executar_transicao(id, "iniciar", atendente_id=current_user.id)
+        if not resultado:
+            motivo = motivo_falha_transicao(id, "iniciar") or MENSAGEM_CONFLITO
+            db.session.rollback()
+            flash(motivo, "error")
+            return redirect(url_for("atendimentos"))
+        status = resultado.status
 
-    # URL encode
-    url_whatsapp = f"https://api.whatsapp.com/send?text={quote(mensagem)}"
+    # Monta a mensagem antes do commit, que expiraria os objetos já carregados
+    url_whatsapp = link_whatsapp(mensagem_whatsapp(atendimento, status))
+    db.session.commit()
 
     return redirect(url_whatsapp)
 
@@ -608,41 +2636,41 @@ Mapa: {mapa_url}
 
 @app.route("/atendimentos/export/whatsapp/<int:id>")
 @login_required
+@leitura_replica
 def export_whatsapp(id):
-    atendimento = Atendimento.query.get_or_404(id)
-    mensagem = f"""OPERAÇÃO ABRIGO AMIGO
-
-Seguem os dados do chamado e orientações para atendimento:
-
-Atendimento ID: {atendimento.id}
-Solicitante: {atendimento.cliente_nome}
-Contato: {atendimento.cliente_contato}
-Abrigo: {atendimento.abrigo.nome if atendimento.abrigo else 'Não informado'}
-Endereço: {atendimento.logradouro}, {atendimento.bairro}, CEP {atendimento.cep}
-Latitude: {atendimento.latitude}
-Longitude: {atendimento.longitude}
-Descrição: {atendimento.descricao}
-Status: {atendimento.status}
-"""
-    # URL encode e direciona para WhatsApp Web
-    import urllib.parse
-    url = f"https://wa.me/?text={urllib.parse.quote(mensagem)}"
-    return redirect(url)
-
-@app.route("/atendimentos/export/pdf/<int:id>")
-@login_required
-def export_pdf(id):
-    atendimento = Atendimento.query.get_or_404(id)
-    # Aqui você pode gerar um PDF usando ReportLab ou WeasyPrint
-    # Exemplo simplificado:
-    from flask import make_response
-    pdf_content = f"Atendimento #{atendimento.id}\nCliente: {atendimento.cliente_nome}\nStatus: {atendimento.status}\nDescrição: {atendimento.descricao}"
-    response = make_response(pdf_content)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=atendimento_{atendimento.id}.pdf'
-    return response
+    atendimento = Atendimento.query.options(joinedload(Atendimento.abrigo)).filter_by(id=id).first_or_404()
+    return redirect(link_whatsapp(mensagem_whatsapp(atendimento)))
+
+
+@app.route("/api/atendimentos/whatsapp", methods=["GET", "POST"])
+@login_required
+@leitura_replica
+def api_links_whatsapp():
+    """Links de compartilhamento para vários atendimentos (`ids`), sem mudar o status.
+
+    Aceita ?ids=1&ids=2, formulário ou JSON {"ids": [...]}.
+    """
+    dados = request.get_json(silent=True) or {}
+    ids = dados.get("ids") if isinstance(dados.get("ids"), list) else request.values.getlist("ids")
+    ids = list(dict.fromkeys(int(i) for i in ids if str(i).isdigit()))
+    if len(ids) > app.config["SYNC_BATCH_MAX"]:
+        return jsonify({"erro": f"No máximo {app.config['SYNC_BATCH_MAX']} atendimentos por vez."}), 413
+
+    atendimentos = (
+        Atendimento.query.options(joinedload(Atendimento.abrigo))
+        .filter(Atendimento.id.in_(ids))
+        .all()
+    )
+    links = {a.id: link_whatsapp(mensagem_whatsapp(a)) for a in atendimentos}
+
+    return jsonify({
+        "links": [{"id": i, "url": links[i]} for i in ids if i in links],
+        "nao_encontrados": [i for i in ids if i not in links],
+    })
 
 @app.route('/atendimento/<int:id>/pdf')
+@login_required
+@leitura_replica
 def exportar_atendimento_pdf(id):
     atendimento = Atendimento.query.get_or_404(id)
 
@@ -666,6 +2694,365 @@ def exportar_atendimento_pdf(id):
     response.headers['Content-Disposition'] = f'inline; filename=atendimento_{id}.pdf'
     return response
 
+# --------------- RELATÓRIOS EM PDF ------------------
+# Relatórios com muitos registros são renderizados em partes de
+# PDF_CHUNK_SIZE registros, convertidas em paralelo e juntadas no fim
+# (ver relatorios_pdf.py). A resposta é enviada direto do arquivo gerado.
+
+def paginar(query, coluna_id, tamanho, decrescente=False):
+    """Percorre a consulta em listas de `tamanho` registros, ordenadas por `coluna_id`.
+
+    Usa paginação por chave (id > último), então cada página custa o mesmo
+    independente da posição, e tira da sessão os registros já entregues.
+    """
+    ultimo = None
+    while True:
+        pagina = query
+        if ultimo is not None:
+            pagina = pagina.filter(coluna_id < ultimo if decrescente else coluna_id > ultimo)
+        registros = pagina.order_by(coluna_id.desc() if decrescente else coluna_id).limit(tamanho).all()
+        if not registros:
+            return
+
+        yield registros
+
+        ultimo = registros[-1].id
+        for registro in registros:
+            db.session.expunge(registro)
+        if len(registros) < tamanho:
+            return
+
+
+def resposta_pdf(partes_html, nome_arquivo, voltar_para):
+    """PDF gerado das partes; sem nenhum registro, avisa e volta para `voltar_para`."""
+    arquivo = tempfile.NamedTemporaryFile(prefix="relatorio-", suffix=".pdf", delete=False)
+    arquivo.close()
+
+    try:
+        gerou = relatorios_pdf.gerar_pdf_em_partes(partes_html, arquivo.name, processos=app.config["PDF_WORKERS"])
+    except Exception:
+        os.remove(arquivo.name)
+        raise
+
+    if not gerou:
+        os.remove(arquivo.name)
+        flash("Nenhum registro para exportar.", "error")
+        return redirect(voltar_para)
+
+    # Envia em blocos e apaga o arquivo no fim (ou se o cliente desconectar)
+    def ler_e_apagar():
+        try:
+            with open(arquivo.name, "rb") as pdf:
+                while bloco := pdf.read(64 * 1024):
+                    yield bloco
+        finally:
+            os.remove(arquivo.name)
+
+    response = app.response_class(ler_e_apagar(), mimetype="application/pdf")
+    response.headers["Content-Length"] = str(os.path.getsize(arquivo.name))
+    response.headers["Content-Disposition"] = f"inline; filename={nome_arquivo}"
+    return response
+
+
+@app.route("/atendimentos/relatorio/pdf", methods=["GET", "POST"])
+@login_required
+@leitura_replica
+def exportar_atendimentos_pdf():
+    """Um PDF com vários atendimentos: os marcados na lista (`ids`) ou todos,
+    opcionalmente filtrados por `status` e `abrigo_id`."""
+    consulta = Atendimento.query.options(joinedload(Atendimento.abrigo))
+
+    ids = [int(i) for i in request.values.getlist("ids") if i.isdigit()]
+    if ids:
+        consulta = consulta.filter(Atendimento.id.in_(ids))
+    if request.values.get("status") in StatusAtendimento.TODOS:
+        consulta = consulta.filter(Atendimento.status == request.values["status"])
+    if request.values.get("abrigo_id", "").isdigit():
+        consulta = consulta.filter(Atendimento.abrigo_id == int(request.values["abrigo_id"]))
+
+    paginas = paginar(consulta, Atendimento.id, app.config["PDF_CHUNK_SIZE"])
+    partes = (render_template("atendimentos_pdf.html", atendimentos=pagina) for pagina in paginas)
+    return resposta_pdf(partes, "atendimentos.pdf", url_for("atendimentos"))
+
+
+# --------------- RELATÓRIOS ------------------
+
+# Mesclado não tem coluna: o duplicado sai das contagens (inclusive do
+# total), já que não é um chamado a mais nem um cancelamento
+COLUNA_STATUS = {
+    StatusAtendimento.ABERTO: "abertos",
+    StatusAtendimento.EM_ATENDIMENTO: "em_atendimento",
+    StatusAtendimento.ATENDIDO: "atendidos",
+    StatusAtendimento.CANCELADO: "cancelados",
+}
+
+
+def _como_local(data_hora):
+    """Converte para o horário de Brasília. Datas sem fuso já estão nele."""
+    if data_hora is None:
+        return None
+    if data_hora.tzinfo is None:
+        data_hora = tz.localize(data_hora)
+    return data_hora.astimezone(tz)
+
+
+def _duracao_resolucao(atendimento):
+    criado = _como_local(atendimento.criado_em)
+    finalizado = _como_local(atendimento.finalizado_em)
+    return max(int((finalizado - criado).total_seconds()), 0)
+
+
+def _incrementar_relatorio(modelo, chaves, incrementos):
+    """UPSERT somando `incrementos` na linha identificada por `chaves`."""
+    tabela = modelo.__table__
+    dialeto = db.session.get_bind().dialect.name
+
+    if dialeto in ("postgresql", "sqlite"):
+        if dialeto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(tabela).values(**chaves, **incrementos)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(chaves),
+            set_={col: tabela.c[col] + stmt.excluded[col] for col in incrementos},
+        )
+        db.session.execute(stmt)
+        return
+
+    filtro = [tabela.c[col] == valor for col, valor in chaves.items()]
+    resultado = db.session.execute(
+        tabela.update().where(*filtro).values(
+            {col: tabela.c[col] + valor for col, valor in incrementos.items()}
+        )
+    )
+    if resultado.rowcount == 0:
+        db.session.execute(tabela.insert().values(**chaves, **incrementos))
+
+
+def relatorio_registrar_abertura(atendimento):
+    """Chamar após o flush do novo atendimento, antes do commit."""
+    _incrementar_relatorio(
+        RelatorioAtendimentoDiario,
+        {"dia": _como_local(atendimento.criado_em).date(), "abrigo_id": int(atendimento.abrigo_id)},
+        {"total": 1, COLUNA_STATUS[atendimento.status]: 1},
+    )
+
+
+def relatorio_registrar_transicao(atendimento, status_anterior):
+    """Move a contagem de `status_anterior` para o status atual (mesma transação)."""
+    if status_anterior == atendimento.status:
+        return
+
+    chaves = {"dia": _como_local(atendimento.criado_em).date(), "abrigo_id": int(atendimento.abrigo_id)}
+    if atendimento.status == StatusAtendimento.MESCLADO:
+        _incrementar_relatorio(RelatorioAtendimentoDiario, chaves, {"total": -1, COLUNA_STATUS[status_anterior]: -1})
+        return
+
+    _incrementar_relatorio(
+        RelatorioAtendimentoDiario,
+        chaves,
+        {COLUNA_STATUS[status_anterior]: -1, COLUNA_STATUS[atendimento.status]: 1},
+    )
+
+    if atendimento.status in StatusAtendimento.FINAIS and atendimento.finalizado_em:
+        incrementos = {"atendidos": 1, "segundos_resolucao": _duracao_resolucao(atendimento)}
+        if atendimento.status == StatusAtendimento.CANCELADO:
+            incrementos = {"cancelados": 1}
+
+        _incrementar_relatorio(
+            RelatorioResolucaoOperador,
+            {
+                "dia": _como_local(atendimento.finalizado_em).date(),
+                "operador_id": atendimento.operador_id,
+            },
+            incrementos,
+        )
+
+
+def relatorio_mover_abrigo(atendimento, abrigo_anterior_id):
+    """Quando a edição troca o abrigo, transfere a contagem entre abrigos."""
+    if int(abrigo_anterior_id) == int(atendimento.abrigo_id) or atendimento.status not in COLUNA_STATUS:
+        return
+
+    dia = _como_local(atendimento.criado_em).date()
+    coluna = COLUNA_STATUS[atendimento.status]
+
+    _incrementar_relatorio(
+        RelatorioAtendimentoDiario,
+        {"dia": dia, "abrigo_id": int(abrigo_anterior_id)},
+        {"total": -1, coluna: -1},
+    )
+    _incrementar_relatorio(
+        RelatorioAtendimentoDiario,
+        {"dia": dia, "abrigo_id": int(atendimento.abrigo_id)},
+        {"total": 1, coluna: 1},
+    )
+
+
+def _como_data(valor):
+    # func.date() devolve string no SQLite e date no PostgreSQL
+    if isinstance(valor, str):
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    return valor
+
+
+def reconstruir_relatorios():
+    """Recalcula as tabelas de relatório do zero (usado pelo CLI relatorios-refresh)."""
+    db.session.query(RelatorioAtendimentoDiario).delete()
+    db.session.query(RelatorioResolucaoOperador).delete()
+
+    # Volume por abrigo/dia agregado no próprio banco
+    dia = func.date(Atendimento.criado_em)
+    contagens = [
+        func.sum(db.case((Atendimento.status == status, 1), else_=0)).label(coluna)
+        for status, coluna in COLUNA_STATUS.items()
+    ]
+    linhas = (
+        db.session.query(dia, Atendimento.abrigo_id, func.count(Atendimento.id), *contagens)
+        .filter(Atendimento.status.in_(COLUNA_STATUS))
+        .group_by(dia, Atendimento.abrigo_id)
+    )
+    for dia_valor, abrigo_id, total, *por_status in linhas:
+        db.session.add(RelatorioAtendimentoDiario(
+            dia=_como_data(dia_valor),
+            abrigo_id=abrigo_id,
+            total=total,
+            **dict(zip(COLUNA_STATUS.values(), por_status))
+        ))
+
+    # Tempo de resolução depende da conversão de fuso, então é somado aqui,
+    # lendo só as colunas necessárias em lotes
+    resolucao = defaultdict(lambda: {"atendidos": 0, "cancelados": 0, "segundos_resolucao": 0})
+    finalizados = (
+        db.session.query(Atendimento.operador_id, Atendimento.status, Atendimento.criado_em, Atendimento.finalizado_em)
+        .filter(
+            Atendimento.finalizado_em.isnot(None),
+            Atendimento.status.in_((StatusAtendimento.ATENDIDO, StatusAtendimento.CANCELADO)),
+        )
+        .yield_per(1000)
+    )
+    for a in finalizados:
+        chave = (_como_local(a.finalizado_em).date(), a.operador_id)
+        if a.status == StatusAtendimento.ATENDIDO:
+            resolucao[chave]["atendidos"] += 1
+            resolucao[chave]["segundos_resolucao"] += _duracao_resolucao(a)
+        else:
+            resolucao[chave]["cancelados"] += 1
+
+    for (dia_valor, operador_id), valores in resolucao.items():
+        db.session.add(RelatorioResolucaoOperador(dia=dia_valor, operador_id=operador_id, **valores))
+
+    db.session.commit()
+
+
+def totais_por_status(inicio=None, fim=None):
+    R = RelatorioAtendimentoDiario
+    query = db.session.query(
+        func.coalesce(func.sum(R.total), 0),
+        func.coalesce(func.sum(R.abertos), 0),
+        func.coalesce(func.sum(R.em_atendimento), 0),
+        func.coalesce(func.sum(R.atendidos), 0),
+        func.coalesce(func.sum(R.cancelados), 0),
+    )
+    if inicio:
+        query = query.filter(R.dia >= inicio)
+    if fim:
+        query = query.filter(R.dia <= fim)
+
+    total, abertos, em_atendimento, atendidos, cancelados = query.one()
+    return {
+        "total": int(total),
+        "abertos": int(abertos),
+        "em_atendimento": int(em_atendimento),
+        "atendidos": int(atendidos),
+        "cancelados": int(cancelados),
+    }
+
+
+def _periodo_relatorio():
+    hoje = agora().date()
+    try:
+        fim = datetime.strptime(request.args["ate"], "%Y-%m-%d").date() if request.args.get("ate") else hoje
+        inicio = (
+            datetime.strptime(request.args["de"], "%Y-%m-%d").date()
+            if request.args.get("de")
+            else fim - timedelta(days=30)
+        )
+    except ValueError:
+        abort(400)
+    return inicio, fim
+
+
+@app.route("/relatorios")
+@login_required
+@requer_perfil("Admin")
+@leitura_replica
+def relatorios():
+    inicio, fim = _periodo_relatorio()
+
+    D = RelatorioAtendimentoDiario
+    por_abrigo_dia = (
+        db.session.query(D, Abrigo.nome)
+        .join(Abrigo, Abrigo.id == D.abrigo_id)
+        .filter(D.dia >= inicio, D.dia <= fim)
+        .order_by(D.dia.desc(), Abrigo.nome)
+        .all()
+    )
+
+    O = RelatorioResolucaoOperador
+    por_operador = (
+        db.session.query(
+            Usuario.id,
+            func.coalesce(Usuario.nome, Usuario.login),
+            func.sum(O.atendidos),
+            func.sum(O.cancelados),
+            func.sum(O.segundos_resolucao),
+        )
+        .join(Usuario, Usuario.id == O.operador_id)
+        .filter(O.dia >= inicio, O.dia <= fim)
+        .group_by(Usuario.id, Usuario.nome, Usuario.login)
+        .order_by(func.sum(O.atendidos).desc())
+        .all()
+    )
+
+    dados = {
+        "periodo": {"de": inicio.isoformat(), "ate": fim.isoformat()},
+        "status": totais_por_status(inicio, fim),
+        "por_abrigo_dia": [
+            {
+                "dia": linha.dia.isoformat(),
+                "abrigo_id": linha.abrigo_id,
+                "abrigo": nome,
+                "total": linha.total,
+                "abertos": linha.abertos,
+                "em_atendimento": linha.em_atendimento,
+                "atendidos": linha.atendidos,
+                "cancelados": linha.cancelados,
+            }
+            for linha, nome in por_abrigo_dia
+        ],
+        "por_operador": [
+            {
+                "operador_id": operador_id,
+                "operador": nome,
+                "atendidos": int(atendidos or 0),
+                "cancelados": int(cancelados or 0),
+                "tempo_medio_resolucao_min": (
+                    round(segundos / atendidos / 60, 1) if atendidos else None
+                ),
+            }
+            for operador_id, nome, atendidos, cancelados, segundos in por_operador
+        ],
+    }
+
+    if request.args.get("formato") == "json" or request.accept_mimetypes.best == "application/json":
+        return jsonify(dados)
+
+    return render_template("relatorios.html", **dados)
+
+
 # --------------- LOGS ------------------
 
 
@@ -673,31 +3060,52 @@ def exportar_atendimento_pdf(id):
 @app.route("/logs")
 @login_required
 @requer_perfil("Admin")
+@leitura_replica
 def logs_sistema():
-    logs = LogSistema.query.order_by(LogSistema.data_hora.desc()).limit(500).all()
+    # Filtros opcionais pelos campos estruturados, ex. ?entidade=atendimento&entidade_id=12
+    consulta = LogSistema.query
+    if request.args.get("entidade"):
+        consulta = consulta.filter(LogSistema.entidade == request.args["entidade"])
+        if request.args.get("entidade_id", type=int) is not None:
+            consulta = consulta.filter(LogSistema.entidade_id == request.args.get("entidade_id", type=int))
+    if request.args.get("acao"):
+        consulta = consulta.filter(LogSistema.acao == request.args["acao"])
+    logs = consulta.order_by(LogSistema.data_hora.desc()).limit(500).all()
     return render_template("logs.html", logs=logs)
 
 
 @app.route("/logs/export/pdf")
 @login_required
 @requer_perfil("Admin")
+@leitura_replica
 def export_logs_pdf():
-    logs = LogSistema.query.order_by(LogSistema.data_hora.desc()).all()
-
-    html = render_template("logs_pdf.html", logs=logs)
-    pdf = pdfkit.from_string(html, False)
-
-    response = make_response(pdf)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = 'inline; filename=logs.pdf'
-    return response
+    # Mais recentes primeiro; o id cresce junto com data_hora
+    paginas = paginar(LogSistema.query, LogSistema.id, app.config["PDF_CHUNK_SIZE"], decrescente=True)
+    partes = (
+        render_template("logs_pdf.html", logs=pagina, primeira_parte=(numero == 0))
+        for numero, pagina in enumerate(paginas)
+    )
+    return resposta_pdf(partes, "logs.pdf", url_for("logs_sistema"))
 
 
 @app.route("/logs/export/xlsx")
 @login_required
 @requer_perfil("Admin")
+@leitura_replica
 def export_logs_xlsx():
-    logs = LogSistema.query.order_by(LogSistema.data_hora.desc()).all()
+    # Só as colunas da planilha: sem montar objetos do ORM nem decodificar o JSON de "dados"
+    logs = db.session.query(
+        LogSistema.id,
+        LogSistema.usuario_login,
+        LogSistema.acao,
+        LogSistema.descricao,
+        LogSistema.rota,
+        LogSistema.metodo,
+        LogSistema.ip,
+        LogSistema.data_hora,
+        LogSistema.entidade,
+        LogSistema.entidade_id,
+    ).order_by(LogSistema.data_hora.desc())
     data = [{
         "ID": l.id,
         "Usuário": l.usuario_login,
@@ -706,12 +3114,28 @@ def export_logs_xlsx():
         "Rota": l.rota,
         "Método": l.metodo,
         "IP": l.ip,
-        "Data/Hora": l.data_hora.strftime("%d/%m/%Y %H:%M:%S")
+        "Data/Hora": l.data_hora.strftime("%d/%m/%Y %H:%M:%S"),
+        "Entidade": l.entidade,
+        "ID da Entidade": l.entidade_id,
     } for l in logs]
 
-    df = pd.DataFrame(data)
+    # Logins/logouts antigos já compactados: contagem por dia
+    resumo = [{
+        "Dia": r.dia.strftime("%d/%m/%Y"),
+        "Ação": r.acao,
+        "Usuário": login or (f"#{r.usuario_id}" if r.usuario_id else "Sistema"),
+        "Total": r.total,
+    } for r, login in (
+        db.session.query(ResumoLogDiario, Usuario.login)
+        .outerjoin(Usuario, Usuario.id == ResumoLogDiario.usuario_id)
+        .order_by(ResumoLogDiario.dia.desc(), ResumoLogDiario.acao)
+    )]
+
     output = BytesIO()
-    df.to_excel(output, index=False)
+    with pd.ExcelWriter(output) as planilha:
+        pd.DataFrame(data).to_excel(planilha, sheet_name="Logs", index=False)
+        if resumo:
+            pd.DataFrame(resumo).to_excel(planilha, sheet_name="Resumo diário", index=False)
     output.seek(0)
 
     return make_response(
@@ -722,6 +3146,504 @@ def export_logs_xlsx():
     )
 
 
+def compactar_logs(antes_de=None, acoes=None):
+    """Troca os logs de alto volume anteriores a `antes_de` por contagens diárias.
+
+    As ações vêm de LOG_COMPACT_ACTIONS (padrão Login e Logout) e o corte
+    padrão é LOG_COMPACT_AFTER_DAYS dias atrás. Cada dia é somado em
+    logs_resumo_diario e apagado numa transação própria, então o comando
+    pode ser interrompido e rodado de novo. Retorna as linhas removidas.
+    """
+    if acoes is None:
+        acoes = [acao.strip() for acao in app.config["LOG_COMPACT_ACTIONS"].split(",") if acao.strip()]
+    if antes_de is None:
+        antes_de = agora().date() - timedelta(days=app.config["LOG_COMPACT_AFTER_DAYS"])
+    # data_hora é gravada sem fuso, no horário local
+    limite = datetime.combine(antes_de, datetime.min.time())
+
+    removidas = 0
+    while True:
+        primeira = (
+            db.session.query(func.min(LogSistema.data_hora))
+            .filter(LogSistema.acao.in_(acoes), LogSistema.data_hora < limite)
+            .scalar()
+        )
+        if primeira is None:
+            break
+
+        inicio = datetime.combine(primeira.date(), datetime.min.time())
+        fim = min(inicio + timedelta(days=1), limite)
+        do_dia = (LogSistema.acao.in_(acoes), LogSistema.data_hora >= inicio, LogSistema.data_hora < fim)
+
+        contagens = (
+            db.session.query(LogSistema.acao, LogSistema.usuario_id, func.count())
+            .filter(*do_dia)
+            .group_by(LogSistema.acao, LogSistema.usuario_id)
+            .all()
+        )
+        for acao, usuario_id, total in contagens:
+            _incrementar_relatorio(
+                ResumoLogDiario,
+                {"dia": inicio.date(), "acao": acao, "usuario_id": usuario_id or 0},
+                {"total": total},
+            )
+        removidas += db.session.execute(db.delete(LogSistema).where(*do_dia)).rowcount
+        db.session.commit()
+
+    return removidas
+
+
+# ---------------- DESPACHANTE DO OUTBOX ------------------
+
+def despachar_outbox(destinos, tamanho_lote=None):
+    """Entrega o próximo lote de eventos pendentes a todos os destinos.
+
+    Retorna quantos foram entregues, o erro (se o lote falhou) e o maior
+    atraso entre a gravação e a entrega. Com PostgreSQL as linhas do lote
+    ficam travadas (SKIP LOCKED), então dá para rodar mais de um despachante.
+    """
+    tamanho_lote = tamanho_lote or app.config["OUTBOX_BATCH_SIZE"]
+    eventos = (
+        EventoOutbox.query
+        .filter(
+            EventoOutbox.enviado_em.is_(None),
+            or_(EventoOutbox.proxima_tentativa.is_(None), EventoOutbox.proxima_tentativa <= agora()),
+        )
+        .order_by(EventoOutbox.id)
+        .limit(tamanho_lote)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not eventos:
+        db.session.commit()
+        return SimpleNamespace(entregues=0, erro=None, atraso=None)
+
+    lote = [evento.como_dict() for evento in eventos]
+    for nome, destino in destinos:
+        try:
+            destino.enviar(lote)
+        except Exception as erro:
+            # Nada é marcado como enviado: o lote inteiro volta depois da espera
+            for evento in eventos:
+                evento.tentativas += 1
+                evento.proxima_tentativa = agora() + outbox.proxima_tentativa(
+                    evento.tentativas, app.config["OUTBOX_BACKOFF_BASE"], app.config["OUTBOX_BACKOFF_MAX"]
+                )
+                evento.ultimo_erro = f"{nome}: {erro}"[:1000]
+            db.session.commit()
+            return SimpleNamespace(entregues=0, erro=f"{nome}: {erro}", atraso=None)
+
+    enviado_em = agora()
+    atraso = max((enviado_em - _como_local(evento.criado_em)).total_seconds() for evento in eventos)
+    db.session.execute(
+        db.update(EventoOutbox)
+        .where(EventoOutbox.id.in_([evento.id for evento in eventos]))
+        .values(enviado_em=enviado_em, proxima_tentativa=None)
+    )
+    db.session.commit()
+    return SimpleNamespace(entregues=len(eventos), erro=None, atraso=atraso)
+
+
+def metricas_outbox():
+    """Pendentes, quantos deles já falharam e há quanto tempo espera o mais antigo."""
+    pendentes, com_falha, mais_antigo = (
+        db.session.query(
+            func.count(EventoOutbox.id),
+            func.count(EventoOutbox.ultimo_erro),
+            func.min(EventoOutbox.criado_em),
+        )
+        .filter(EventoOutbox.enviado_em.is_(None))
+        .one()
+    )
+    atraso = (agora() - _como_local(mais_antigo)).total_seconds() if mais_antigo else 0
+    return {"pendentes": pendentes, "com_falha": com_falha, "atraso_segundos": round(atraso, 1)}
+
+
+@app.route("/outbox/metricas")
+@login_required
+@requer_perfil("Admin")
+def outbox_metricas():
+    # Sem réplica de propósito: o atraso dela somaria ao do outbox
+    return jsonify(metricas_outbox())
+
+
+# ---------------- MANUTENÇÃO AGENDADA ------------------
+# Tarefas periódicas registradas com @tarefa_manutencao e intervalos em
+# MAINTENANCE_INTERVALS. O agendador roda como processo separado
+# (flask manutencao) ou numa thread de cada worker (MAINTENANCE_IN_PROCESS).
+# Cada tarefa compartilhada tem uma linha em tarefas_manutencao que serve
+# de trava (UPDATE condicional, como ocupar_vaga) e guarda as métricas de
+# duração; as tarefas "por processo" (aquecer caches em memória) rodam em
+# todo worker, sem trava.
+
+class TarefaManutencao(db.Model):
+    """Trava e métricas de uma tarefa periódica."""
+    __tablename__ = "tarefas_manutencao"
+
+    nome = db.Column(db.String(50), primary_key=True)
+
+    # Trava: quem está rodando e até quando ela vale. Enquanto a tarefa roda
+    # a validade é renovada; se o processo morrer, outro assume depois de
+    # MAINTENANCE_LOCK_TTL
+    travada_por = db.Column(db.String(100))
+    travada_ate = db.Column(db.DateTime(timezone=True))
+    proxima_execucao = db.Column(db.DateTime(timezone=True))
+
+    # Métricas
+    ultimo_inicio = db.Column(db.DateTime(timezone=True))
+    ultima_duracao_ms = db.Column(db.Integer)
+    maior_duracao_ms = db.Column(db.Integer)
+    duracao_total_ms = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+    execucoes = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    falhas = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    ultimo_resultado = db.Column(db.String(200))
+    ultimo_erro = db.Column(db.Text)
+
+
+TAREFAS_MANUTENCAO = {}
+
+# Última execução das tarefas por processo neste processo (nome -> time.monotonic())
+_execucoes_no_processo = {}
+
+
+def tarefa_manutencao(nome, por_processo=False):
+    """Registra a função como tarefa periódica; o intervalo vem de MAINTENANCE_INTERVALS[nome]."""
+    def registrar(funcao):
+        TAREFAS_MANUTENCAO[nome] = SimpleNamespace(nome=nome, funcao=funcao, por_processo=por_processo)
+        return funcao
+    return registrar
+
+
+def _identidade_processo():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def _intervalo_tarefa(nome):
+    return int(app.config["MAINTENANCE_INTERVALS"].get(nome) or 0)
+
+
+def _travar_tarefa(nome, forcar=False):
+    """Tenta pegar a trava da tarefa; True se este processo deve rodá-la agora."""
+    tabela = TarefaManutencao.__table__
+    momento = agora()
+
+    with motor_infraestrutura().begin() as conexao:
+        # Primeira execução: cria a linha (se dois criarem juntos, um é ignorado)
+        dialeto = conexao.dialect.name
+        if dialeto in ("postgresql", "sqlite"):
+            if dialeto == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            conexao.execute(insert(tabela).values(nome=nome).on_conflict_do_nothing(index_elements=["nome"]))
+        elif conexao.execute(db.select(tabela.c.nome).where(tabela.c.nome == nome)).first() is None:
+            conexao.execute(tabela.insert().values(nome=nome))
+
+        condicoes = [
+            tabela.c.nome == nome,
+            or_(tabela.c.travada_ate.is_(None), tabela.c.travada_ate < momento),
+        ]
+        if not forcar:
+            condicoes.append(or_(tabela.c.proxima_execucao.is_(None), tabela.c.proxima_execucao <= momento))
+
+        resultado = conexao.execute(
+            tabela.update().where(*condicoes).values(
+                travada_por=_identidade_processo(),
+                travada_ate=momento + timedelta(seconds=app.config["MAINTENANCE_LOCK_TTL"]),
+                ultimo_inicio=momento,
+            )
+        )
+        return resultado.rowcount == 1
+
+
+def _manter_trava(nome):
+    """Renova a trava da tarefa a cada terço de MAINTENANCE_LOCK_TTL enquanto ela roda.
+
+    Só estende enquanto travada_por ainda é este processo. Retorna o
+    threading.Event que encerra a renovação.
+    """
+    tabela = TarefaManutencao.__table__
+    motor = motor_infraestrutura()
+    identidade = _identidade_processo()
+    validade = app.config["MAINTENANCE_LOCK_TTL"]
+    parar = threading.Event()
+
+    def renovar():
+        while not parar.wait(validade / 3):
+            try:
+                with motor.begin() as conexao:
+                    conexao.execute(
+                        tabela.update()
+                        .where(tabela.c.nome == nome, tabela.c.travada_por == identidade)
+                        .values(travada_ate=agora() + timedelta(seconds=validade))
+                    )
+            except Exception:
+                app.logger.exception("Não foi possível renovar a trava da tarefa %s", nome)
+
+    threading.Thread(target=renovar, name=f"trava-{nome}", daemon=True).start()
+    return parar
+
+
+def _liberar_tarefa(nome, inicio, duracao_ms, resultado=None, erro=None):
+    """Solta a trava, agenda a próxima execução e acumula as métricas."""
+    tabela = TarefaManutencao.__table__
+    intervalo = _intervalo_tarefa(nome)
+    # Depois de uma falha tenta de novo em até 5 minutos
+    proxima = agora() + timedelta(seconds=min(intervalo, 300)) if erro else inicio + timedelta(seconds=intervalo)
+
+    with motor_infraestrutura().begin() as conexao:
+        conexao.execute(
+            tabela.update()
+            .where(tabela.c.nome == nome, tabela.c.travada_por == _identidade_processo())
+            .values(
+                travada_por=None,
+                travada_ate=None,
+                proxima_execucao=proxima,
+                ultima_duracao_ms=duracao_ms,
+                maior_duracao_ms=db.case(
+                    (or_(tabela.c.maior_duracao_ms.is_(None), tabela.c.maior_duracao_ms < duracao_ms), duracao_ms),
+                    else_=tabela.c.maior_duracao_ms,
+                ),
+                duracao_total_ms=tabela.c.duracao_total_ms + duracao_ms,
+                execucoes=tabela.c.execucoes + 1,
+                falhas=tabela.c.falhas + (1 if erro else 0),
+                ultimo_resultado=None if resultado is None else str(resultado)[:200],
+                ultimo_erro=erro,
+            )
+        )
+
+
+def executar_tarefa(nome, forcar=False):
+    """Roda a tarefa se estiver na hora e nenhum outro processo estiver com ela.
+
+    Retorna True se rodou (com ou sem erro). `forcar` ignora o horário, mas
+    não a trava: uma tarefa em andamento em outro processo nunca roda em dobro.
+    """
+    tarefa = TAREFAS_MANUTENCAO[nome]
+    intervalo = _intervalo_tarefa(nome)
+
+    if tarefa.por_processo:
+        ultima = _execucoes_no_processo.get(nome)
+        if not forcar and ultima is not None and time.monotonic() - ultima < intervalo:
+            return False
+        _execucoes_no_processo[nome] = time.monotonic()
+    elif not _travar_tarefa(nome, forcar):
+        return False
+
+    renovacao = None if tarefa.por_processo else _manter_trava(nome)
+    inicio = agora()
+    cronometro = time.perf_counter()
+    resultado = erro = None
+    try:
+        resultado = tarefa.funcao()
+    except Exception as excecao:
+        db.session.rollback()
+        erro = f"{type(excecao).__name__}: {excecao}"
+        app.logger.exception("Tarefa de manutenção %s falhou", nome)
+    finally:
+        db.session.remove()
+        if renovacao is not None:
+            renovacao.set()
+    duracao_ms = int((time.perf_counter() - cronometro) * 1000)
+
+    if tarefa.por_processo:
+        app.logger.info("Tarefa de manutenção %s: %s em %d ms", nome, erro or resultado, duracao_ms)
+    else:
+        _liberar_tarefa(nome, inicio, duracao_ms, resultado, erro)
+    return True
+
+
+def rodar_agendador(nomes=None, uma_vez=False, forcar=False, parar=None):
+    """Laço do agendador: a cada MAINTENANCE_TICK segundos roda o que estiver na hora.
+
+    `nomes` limita as tarefas (padrão: todas com intervalo > 0); `parar` é
+    um threading.Event opcional para encerrar o laço.
+    """
+    nomes = nomes or [nome for nome in TAREFAS_MANUTENCAO if _intervalo_tarefa(nome) > 0]
+    while True:
+        for nome in nomes:
+            with app.app_context():
+                executar_tarefa(nome, forcar)
+        if uma_vez or (parar is not None and parar.is_set()):
+            return
+        if parar is not None:
+            parar.wait(app.config["MAINTENANCE_TICK"])
+        else:
+            time.sleep(app.config["MAINTENANCE_TICK"])
+
+
+_agendador_pid = None
+_agendador_lock = threading.Lock()
+
+
+@app.before_request
+def _iniciar_agendador_no_processo():
+    # Com MAINTENANCE_IN_PROCESS cada worker sobe sua thread na primeira
+    # requisição (depois do fork do gunicorn, por isso o pid)
+    global _agendador_pid
+    if not app.config["MAINTENANCE_IN_PROCESS"] or _agendador_pid == os.getpid():
+        return
+    with _agendador_lock:
+        if _agendador_pid == os.getpid():
+            return
+        _agendador_pid = os.getpid()
+        threading.Thread(target=rodar_agendador, name="agendador-manutencao", daemon=True).start()
+
+
+def metricas_manutencao():
+    tarefas = {t.nome: t for t in TarefaManutencao.query.all()}
+    metricas = []
+    for nome, registro in TAREFAS_MANUTENCAO.items():
+        linha = tarefas.get(nome)
+        execucoes = linha.execucoes if linha else 0
+        metricas.append({
+            "tarefa": nome,
+            "intervalo_segundos": _intervalo_tarefa(nome),
+            "por_processo": registro.por_processo,
+            "execucoes": execucoes,
+            "falhas": linha.falhas if linha else 0,
+            "ultima_duracao_ms": linha.ultima_duracao_ms if linha else None,
+            "maior_duracao_ms": linha.maior_duracao_ms if linha else None,
+            "media_duracao_ms": round(linha.duracao_total_ms / execucoes) if execucoes else None,
+            "ultimo_inicio": _valor_json(linha.ultimo_inicio) if linha else None,
+            "proxima_execucao": _valor_json(linha.proxima_execucao) if linha else None,
+            "travada_por": linha.travada_por if linha else None,
+            "ultimo_resultado": linha.ultimo_resultado if linha else None,
+            "ultimo_erro": linha.ultimo_erro if linha else None,
+        })
+    return metricas
+
+
+@app.route("/manutencao/metricas")
+@login_required
+@requer_perfil("Admin")
+def manutencao_metricas():
+    return jsonify({"tarefas": metricas_manutencao()})
+
+
+# Tabelas com mais escrita: estatísticas do planejador desatualizadas nelas
+# fazem as consultas das filas e relatórios trocarem índice por varredura
+TABELAS_QUENTES = (
+    Atendimento.__tablename__,
+    Abrigo.__tablename__,
+    HistoricoStatusAtendimento.__tablename__,
+    LogSistema.__tablename__,
+    EventoOutbox.__tablename__,
+    SessaoUsuario.__tablename__,
+    RelatorioAtendimentoDiario.__tablename__,
+    RelatorioResolucaoOperador.__tablename__,
+)
+
+
+@tarefa_manutencao("estatisticas")
+def atualizar_estatisticas():
+    """VACUUM (ANALYZE) das tabelas quentes no PostgreSQL; ANALYZE e PRAGMA optimize no SQLite."""
+    # VACUUM não roda dentro de transação
+    with motor_infraestrutura().connect().execution_options(isolation_level="AUTOCOMMIT") as conexao:
+        if conexao.dialect.name == "postgresql":
+            for tabela in TABELAS_QUENTES:
+                conexao.execute(text(f'VACUUM (ANALYZE) "{tabela}"'))
+            return f"{len(TABELAS_QUENTES)} tabelas"
+        if conexao.dialect.name == "sqlite":
+            conexao.execute(text("ANALYZE"))
+            conexao.execute(text("PRAGMA optimize"))
+            return "ANALYZE"
+    return "sem suporte neste banco"
+
+
+@tarefa_manutencao("logs-compactar")
+def _tarefa_compactar_logs():
+    return compactar_logs()
+
+
+@tarefa_manutencao("logs-arquivar")
+def arquivar_logs(antes_de=None):
+    """Move os logs com mais de LOG_RETENTION_DAYS dias para LOG_ARCHIVE_DIR.
+
+    Cada página vai para logs-AAAA-MM.jsonl.gz (mês do registro) e só é
+    apagada do banco depois de gravada no disco. Retorna as linhas movidas.
+    """
+    if antes_de is None:
+        if app.config["LOG_RETENTION_DAYS"] <= 0:
+            return 0
+        antes_de = agora().date() - timedelta(days=app.config["LOG_RETENTION_DAYS"])
+    limite = datetime.combine(antes_de, datetime.min.time())
+
+    pasta = app.config["LOG_ARCHIVE_DIR"]
+    os.makedirs(pasta, exist_ok=True)
+    movidas = 0
+    while True:
+        # As linhas saem da tabela a cada volta, então sempre a primeira página
+        pagina = LogSistema.query.filter(LogSistema.data_hora < limite).order_by(LogSistema.id).limit(1000).all()
+        if not pagina:
+            break
+
+        por_mes = defaultdict(list)
+        for log in pagina:
+            por_mes[log.data_hora.strftime("%Y-%m")].append({
+                "id": log.id,
+                "usuario_id": log.usuario_id,
+                "usuario_login": log.usuario_login,
+                "acao": log.acao,
+                "descricao": log.descricao,
+                "rota": log.rota,
+                "metodo": log.metodo,
+                "ip": log.ip,
+                "data_hora": log.data_hora.isoformat(),
+                "entidade": log.entidade,
+                "entidade_id": log.entidade_id,
+                "dados": log.dados,
+            })
+        for mes, linhas in por_mes.items():
+            with gzip.open(os.path.join(pasta, f"logs-{mes}.jsonl.gz"), "at", encoding="utf-8") as arquivo:
+                for linha in linhas:
+                    arquivo.write(json.dumps(linha, ensure_ascii=False) + "\n")
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+
+        ids = [log.id for log in pagina]
+        db.session.execute(db.delete(LogSistema).where(LogSistema.id.in_(ids)), execution_options={"synchronize_session": False})
+        db.session.commit()
+        db.session.expunge_all()
+        movidas += len(ids)
+    return movidas
+
+
+@tarefa_manutencao("relatorios")
+def _tarefa_relatorios():
+    reconstruir_relatorios()
+    recalcular_ocupacao()
+    return "ok"
+
+
+@tarefa_manutencao("sessoes-limpar")
+def _tarefa_sessoes_limpar():
+    return sessoes_servidor.limpar_expiradas() if sessoes_servidor is not None else 0
+
+
+@tarefa_manutencao("outbox-limpar")
+def limpar_outbox():
+    """Apaga os eventos entregues há mais de OUTBOX_RETENTION_DAYS dias."""
+    limite = agora() - timedelta(days=app.config["OUTBOX_RETENTION_DAYS"])
+    removidos = db.session.execute(
+        db.delete(EventoOutbox).where(EventoOutbox.enviado_em.isnot(None), EventoOutbox.enviado_em < limite),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.session.commit()
+    return removidos
+
+
+@tarefa_manutencao("aquecer-caches", por_processo=True)
+def aquecer_caches():
+    """Preenche os caches em memória deste processo (blocos do WhatsApp, índice de busca)."""
+    abrigos = abrigos_por_disponibilidade()
+    for abrigo in abrigos:
+        blocos_abrigo.obter(abrigo)
+    if not _usa_busca_postgres():
+        indice_busca.carregar()
+    return f"{len(abrigos)} abrigos"
+
+
 # ---------------- LOGOUT ------------------
 
 @app.route("/logout")
@@ -732,10 +3654,15 @@ def logout():
     registrar_log(
         acao="Logout",
         descricao=f"Usuário {usuario.login} realizou logout",
-        usuario=usuario
+        usuario=usuario,
+        entidade="usuario",
+        entidade_id=usuario.id,
     )
 
     logout_user()
+    # Descarta a sessão inteira no servidor, não só os dados do login
+    session.clear()
+    regenerar_sessao()
     return redirect(url_for("login"))
 
 
@@ -749,6 +3676,119 @@ def create_db():
     print("Banco criado com sucesso!")
 
 
+@app.cli.command("assets-build")
+@click.option("--sem-download", is_flag=True, help="Não tenta baixar bibliotecas que faltam em static/vendor.")
+def assets_build(sem_download):
+    """Baixa as bibliotecas, versiona e pré-comprime os arquivos estáticos."""
+    if not sem_download:
+        for caminho in assets.baixar_vendor():
+            print(f"Baixado: {caminho}")
+
+    manifesto = assets.construir()
+    print(f"{len(manifesto)} arquivos gerados em static/dist")
+
+
+@app.cli.command("relatorios-refresh")
+def relatorios_refresh():
+    """Recalcula as tabelas de relatório e a ocupação dos abrigos a partir dos atendimentos."""
+    reconstruir_relatorios()
+    recalcular_ocupacao()
+    print("Relatórios recalculados com sucesso!")
+
+
+@app.cli.command("sessoes-limpar")
+def sessoes_limpar():
+    """Apaga as sessões expiradas do armazenamento de sessões."""
+    if sessoes_servidor is None:
+        print("SESSION_BACKEND=cookie: nada a limpar.")
+        return
+    print(f"{sessoes_servidor.limpar_expiradas()} sessões expiradas removidas.")
+
+
+@app.cli.command("logs-compactar")
+@click.option("--dias", type=int, default=None, help="Compacta os logs com mais de N dias (padrão: LOG_COMPACT_AFTER_DAYS).")
+def logs_compactar(dias):
+    """Troca logins/logouts antigos por contagens diárias em logs_resumo_diario."""
+    antes_de = agora().date() - timedelta(days=dias) if dias is not None else None
+    print(f"{compactar_logs(antes_de)} linhas de log compactadas.")
+
+
+@app.cli.command("outbox-dispatch")
+@click.option("--uma-vez", is_flag=True, help="Entrega o que estiver pendente e sai.")
+@click.option("--intervalo", default=2.0, show_default=True, help="Segundos de espera quando não há lote cheio.")
+def outbox_dispatch(uma_vez, intervalo):
+    """Entrega os eventos do outbox aos destinos de OUTBOX_SINKS."""
+    destinos = outbox.carregar_destinos(app.config)
+    if not destinos:
+        raise click.UsageError("Nenhum destino configurado em OUTBOX_SINKS.")
+    print(f"Destinos: {', '.join(nome for nome, _ in destinos)}")
+
+    tamanho_lote = app.config["OUTBOX_BATCH_SIZE"]
+    ultimas_metricas = 0
+    try:
+        while True:
+            resultado = despachar_outbox(destinos, tamanho_lote)
+            if resultado.erro:
+                print(f"Falha na entrega, nova tentativa mais tarde: {resultado.erro}")
+            elif resultado.entregues:
+                print(f"{resultado.entregues} evento(s) entregue(s), atraso máximo {resultado.atraso:.1f}s")
+
+            if time.monotonic() - ultimas_metricas >= 60:
+                metricas = metricas_outbox()
+                print(f"Pendentes: {metricas['pendentes']} ({metricas['com_falha']} com falha), "
+                      f"mais antigo há {metricas['atraso_segundos']}s")
+                ultimas_metricas = time.monotonic()
+
+            # Lote cheio: provavelmente tem mais, segue sem esperar
+            if resultado.entregues < tamanho_lote:
+                if uma_vez:
+                    break
+                time.sleep(intervalo)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.cli.command("outbox-status")
+def outbox_status():
+    """Mostra pendentes e atraso do outbox."""
+    metricas = metricas_outbox()
+    print(f"Pendentes: {metricas['pendentes']}")
+    print(f"Com falha: {metricas['com_falha']}")
+    print(f"Atraso do mais antigo: {metricas['atraso_segundos']}s")
+
+
+@app.cli.command("manutencao")
+@click.option("--tarefa", "tarefas", multiple=True, type=click.Choice(sorted(TAREFAS_MANUTENCAO)),
+              help="Roda só estas tarefas (pode repetir).")
+@click.option("--uma-vez", is_flag=True, help="Roda o que estiver na hora e sai.")
+@click.option("--forcar", is_flag=True, help="Ignora o horário agendado (a trava continua valendo).")
+def manutencao(tarefas, uma_vez, forcar):
+    """Agendador das tarefas de manutenção (estatísticas, logs, relatórios, limpezas)."""
+    if not tarefas:
+        # Caches em memória só adiantam dentro dos workers (MAINTENANCE_IN_PROCESS)
+        tarefas = [nome for nome, tarefa in TAREFAS_MANUTENCAO.items()
+                   if not tarefa.por_processo and _intervalo_tarefa(nome) > 0]
+    print(f"Tarefas: {', '.join(tarefas)}")
+    try:
+        rodar_agendador(list(tarefas), uma_vez=uma_vez, forcar=forcar)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.cli.command("manutencao-status")
+def manutencao_status():
+    """Mostra execuções, falhas e duração de cada tarefa de manutenção."""
+    for m in metricas_manutencao():
+        if m["por_processo"]:
+            print(f"{m['tarefa']}: por processo, a cada {m['intervalo_segundos']}s (métricas no log de cada worker)")
+            continue
+        print(f"{m['tarefa']}: {m['execucoes']} execuções, {m['falhas']} falhas, "
+              f"última {m['ultima_duracao_ms']} ms, média {m['media_duracao_ms']} ms, máx {m['maior_duracao_ms']} ms; "
+              f"próxima {m['proxima_execucao'] or 'na próxima volta'}"
+              + (f"; rodando em {m['travada_por']}" if m["travada_por"] else "")
+              + (f"; último erro: {m['ultimo_erro']}" if m["ultimo_erro"] else ""))
+
+
 # ---------------- RUN ------------------
 
 if __name__ == "__main__":
@@ -765,11 +3805,9 @@ if __name__ == "__main__":
 
 @app.cli.command("seed")
 def seed():
-    from werkzeug.security import generate_password_hash
-
     admin = Usuario(
         login="admin",
-        senha=generate_password_hash("123"),
+        senha=gerar_hash_senha("123"),
         perfil="Admin",
         nome="Administrador"
     )
@@ -0,0 +1,194 @@
+"""Pipeline de arquivos estáticos: bibliotecas locais, versões com hash e pré-compressão.
+
+Uso (a partir da raiz do projeto):
+
+    flask assets-build
+
+1. Baixa para static/vendor/ as bibliotecas listadas em VENDOR que estiverem
+   faltando. Elas já vêm no repositório, então isso só age se alguém apagar
+   um arquivo; o build funciona offline.
+2. Copia cada arquivo de static/ para static/dist/ com o hash do conteúdo
+   no nome (theme.css -> theme.3f2a9c1b7d4e.css), reescrevendo os url()
+   dos CSS para os nomes novos.
+3. Grava ao lado as versões .br (brotli) e .gz (zopfli, ou gzip nível 9).
+4. Gera static/dist/manifest.json com caminho lógico -> caminho com hash.
+"""
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import urllib.request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gera .gz
+    brotli = None
+
+try:
+    import zopfli.gzip
+except ImportError:
+    zopfli = None
+
+
+PASTA_STATIC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+PASTA_DIST = os.path.join(PASTA_STATIC, "dist")
+ARQUIVO_MANIFESTO = os.path.join(PASTA_DIST, "manifest.json")
+
+# caminho em static/ -> URL de origem (versões fixas). Os arquivos ficam no
+# repositório; as URLs servem para baixar de novo e para ASSETS_CDN=1.
+VENDOR = {
+    "vendor/leaflet/leaflet.js": "https://unpkg.com/leaflet@1.9.4/dist/leaflet.js",
+    "vendor/leaflet/leaflet.css": "https://unpkg.com/leaflet@1.9.4/dist/leaflet.css",
+    "vendor/leaflet/images/layers.png": "https://unpkg.com/leaflet@1.9.4/dist/images/layers.png",
+    "vendor/leaflet/images/layers-2x.png": "https://unpkg.com/leaflet@1.9.4/dist/images/layers-2x.png",
+    "vendor/leaflet/images/marker-icon.png": "https://unpkg.com/leaflet@1.9.4/dist/images/marker-icon.png",
+    "vendor/leaflet/images/marker-icon-2x.png": "https://unpkg.com/leaflet@1.9.4/dist/images/marker-icon-2x.png",
+    "vendor/leaflet/images/marker-shadow.png": "https://unpkg.com/leaflet@1.9.4/dist/images/marker-shadow.png",
+    "vendor/jquery/jquery.min.js": "https://code.jquery.com/jquery-3.7.1.min.js",
+    "vendor/datatables/jquery.dataTables.min.js": "https://cdn.datatables.net/1.13.11/js/jquery.dataTables.min.js",
+    "vendor/datatables/jquery.dataTables.min.css": "https://cdn.datatables.net/1.13.11/css/jquery.dataTables.min.css",
+    "vendor/bootstrap/bootstrap.min.css": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css",
+    "vendor/bootstrap/popper.min.js": "https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.8/dist/umd/popper.min.js",
+    "vendor/bootstrap/bootstrap.min.js": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.min.js",
+    "vendor/fontawesome/css/all.min.css": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css",
+    "vendor/fontawesome/webfonts/fa-solid-900.woff2": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-solid-900.woff2",
+    "vendor/fontawesome/webfonts/fa-solid-900.ttf": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-solid-900.ttf",
+    "vendor/fontawesome/webfonts/fa-regular-400.woff2": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-regular-400.woff2",
+    "vendor/fontawesome/webfonts/fa-regular-400.ttf": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-regular-400.ttf",
+    "vendor/fontawesome/webfonts/fa-brands-400.woff2": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-brands-400.woff2",
+    "vendor/fontawesome/webfonts/fa-brands-400.ttf": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-brands-400.ttf",
+    "vendor/fontawesome/webfonts/fa-v4compatibility.woff2": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-v4compatibility.woff2",
+    "vendor/fontawesome/webfonts/fa-v4compatibility.ttf": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-v4compatibility.ttf",
+}
+
+# O Leaflet descobre a pasta dos ícones pelo nome "marker-icon.png" no CSS,
+# então esses arquivos mantêm o nome original (e cache curto)
+SEM_HASH = {"marker-icon.png", "marker-icon-2x.png", "marker-shadow.png"}
+
+# Formatos que já vêm comprimidos não ganham nada com brotli/gzip
+SEM_COMPRESSAO = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff", ".woff2", ".br", ".gz"}
+
+RE_HASH = re.compile(r"\.[0-9a-f]{12}\.")
+RE_URL_CSS = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def baixar_vendor(forcar=False):
+    """Baixa as bibliotecas de VENDOR que ainda não estão em static/vendor."""
+    baixados = []
+    for destino, url in VENDOR.items():
+        caminho = os.path.join(PASTA_STATIC, destino)
+        if os.path.exists(caminho) and not forcar:
+            continue
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as resposta, open(caminho, "wb") as saida:
+            shutil.copyfileobj(resposta, saida)
+        baixados.append(destino)
+    return baixados
+
+
+def _arquivos_fonte():
+    for raiz, pastas, arquivos in os.walk(PASTA_STATIC):
+        if os.path.abspath(raiz).startswith(PASTA_DIST):
+            pastas[:] = []
+            continue
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            yield os.path.relpath(caminho, PASTA_STATIC).replace(os.sep, "/"), caminho
+
+
+def _nome_com_hash(logico, conteudo):
+    if posixpath.basename(logico) in SEM_HASH:
+        return logico
+    base, ext = posixpath.splitext(logico)
+    return f"{base}.{hashlib.sha256(conteudo).hexdigest()[:12]}{ext}"
+
+
+def _reescrever_css(logico, conteudo, manifesto):
+    # O nome com hash fica na mesma pasta, então os caminhos relativos continuam valendo
+    pasta = posixpath.dirname(logico)
+
+    def trocar(match):
+        aspas, alvo = match.groups()
+        if alvo.startswith(("data:", "http:", "https:", "/", "#")):
+            return match.group(0)
+
+        caminho, _, sufixo = alvo.partition("?")
+        caminho, _, ancora = caminho.partition("#")
+        referido = posixpath.normpath(posixpath.join(pasta, caminho))
+        if referido not in manifesto:
+            return match.group(0)
+
+        novo = posixpath.relpath(manifesto[referido], pasta)
+        if sufixo:
+            novo += "?" + sufixo
+        if ancora:
+            novo += "#" + ancora
+        return f"url({aspas}{novo}{aspas})"
+
+    return RE_URL_CSS.sub(trocar, conteudo.decode("utf-8")).encode("utf-8")
+
+
+def _comprimir(caminho, conteudo):
+    if os.path.splitext(caminho)[1].lower() in SEM_COMPRESSAO:
+        return
+
+    if brotli is not None:
+        with open(caminho + ".br", "wb") as saida:
+            saida.write(brotli.compress(conteudo, quality=11))
+
+    if zopfli is not None:
+        comprimido = zopfli.gzip.compress(conteudo)
+    else:
+        comprimido = gzip.compress(conteudo, compresslevel=9, mtime=0)
+    with open(caminho + ".gz", "wb") as saida:
+        saida.write(comprimido)
+
+
+def construir():
+    """Gera static/dist e o manifest.json. Retorna o manifesto."""
+    if os.path.isdir(PASTA_DIST):
+        shutil.rmtree(PASTA_DIST)
+    os.makedirs(PASTA_DIST)
+
+    fontes = dict(_arquivos_fonte())
+    manifesto = {}
+
+    # Primeiro tudo que não é CSS, para os url() já apontarem para o nome final
+    ordem = sorted(fontes, key=lambda logico: logico.endswith(".css"))
+    for logico in ordem:
+        with open(fontes[logico], "rb") as arquivo:
+            conteudo = arquivo.read()
+
+        if logico.endswith(".css"):
+            # o hash é calculado depois de reescrever os url()
+            conteudo = _reescrever_css(logico, conteudo, manifesto)
+
+        manifesto[logico] = _nome_com_hash(logico, conteudo)
+
+        destino = os.path.join(PASTA_DIST, manifesto[logico])
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, "wb") as saida:
+            saida.write(conteudo)
+        _comprimir(destino, conteudo)
+
+    with open(ARQUIVO_MANIFESTO, "w", encoding="utf-8") as saida:
+        json.dump(manifesto, saida, indent=2, sort_keys=True)
+
+    return manifesto
+
+
+def carregar_manifesto():
+    try:
+        with open(ARQUIVO_MANIFESTO, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+def versionado(nome_arquivo):
+    """True se o arquivo de static/dist tem hash no nome (pode ter cache imutável)."""
+    return bool(RE_HASH.search(posixpath.basename(nome_arquivo)))
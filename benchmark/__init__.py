@@ -0,0 +1,10 @@
+"""Benchmark de ponta a ponta do Abrigo Amigo.
+
+Gera dados sintéticos (benchmark.dados), percorre as rotas principais com o
+test client do Flask e mede latência (p50/p95/p99), quantidade de comandos SQL
+e pico de memória por rota (benchmark.executar). O resultado é comparado com
+benchmark/baseline.json e o processo sai com erro se houver regressão.
+
+    python -m benchmark                      # roda e compara com o baseline
+    python -m benchmark --salvar-baseline    # grava um novo baseline
+"""
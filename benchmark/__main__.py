@@ -0,0 +1,3 @@
+from benchmark.executar import main
+
+raise SystemExit(main())
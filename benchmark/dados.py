@@ -0,0 +1,170 @@
+"""Gerador de dados sintéticos com distribuições parecidas com as de produção."""
+import random
+from datetime import timedelta
+
+NOMES = [
+    "Maria", "José", "Ana", "João", "Antônio", "Francisca", "Carlos", "Paulo",
+    "Adriana", "Lucas", "Juliana", "Marcos", "Patrícia", "Pedro", "Aline",
+    "Rafael", "Fernanda", "Luiz", "Camila", "Gabriel", "Sandra", "Bruno",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+]
+BAIRROS = [
+    "Centro", "Vila Nova", "Jardim América", "São José", "Santa Luzia",
+    "Boa Vista", "Industrial", "Planalto", "Bela Vista", "Ribeirão",
+]
+OCORRENCIAS = [
+    "Alagamento na residência, família precisa de abrigo",
+    "Deslizamento de terra atingiu a casa, moradores desalojados",
+    "Casa destelhada pela chuva, idosos no local",
+    "Família com crianças pequenas sem ter para onde ir após enchente",
+    "Água subiu dentro de casa, precisa de remoção urgente",
+    "Pessoa com mobilidade reduzida ilhada pela enchente",
+    "Desabrigados após incêndio, solicitam vaga em abrigo",
+    "Rua interditada pela defesa civil, moradores precisam sair",
+]
+CONCLUSOES = [
+    "Família encaminhada ao abrigo e acolhida",
+    "Transporte realizado pela equipe de resgate",
+    "Solicitante foi para casa de parentes",
+    "Atendimento concluído com entrega de kit de higiene",
+]
+CANCELAMENTOS = [
+    "Chamado duplicado",
+    "Solicitante não atendeu o telefone",
+    "Situação resolvida antes do atendimento",
+]
+ACOES_LOG = [
+    # (ação, peso) - login/logout dominam o volume, como em produção
+    ("Login", 45), ("Logout", 35), ("Criar Atendimento", 8),
+    ("Editar Atendimento", 6), ("Editar Abrigo", 2), ("Criar Abrigo", 1),
+    ("Cadastro de usuário", 1), ("Edição de usuário", 2),
+]
+
+# Distribuição de status dos atendimentos
+PESOS_STATUS = [
+    ("Aberto", 20), ("Em Atendimento", 15), ("Atendido", 55), ("Cancelado", 10),
+]
+
+
+def _telefone(rng):
+    return f"({rng.randint(11, 99)}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+
+
+def _momento(rng, inicio, dias):
+    # Mais chamados à tarde/noite que de madrugada
+    dia = inicio + timedelta(days=rng.randrange(dias))
+    hora = min(int(rng.triangular(0, 24, 17)), 23)
+    return dia.replace(hour=hora, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+
+
+def gerar_dados(app_module, usuarios=25, abrigos=40, atendimentos=5000, logs=20000, dias=60, semente=42):
+    """Insere os volumes pedidos no banco configurado em app_module e recalcula os relatórios.
+
+    app_module é o módulo `app` já importado (modelos, db, gerar_hash_senha).
+    Retorna o login/senha de um administrador para as requisições do benchmark.
+    """
+    rng = random.Random(semente)
+    db = app_module.db
+    inicio = app_module.agora().replace(tzinfo=None) - timedelta(days=dias)
+
+    # Hash calculado uma vez só; o custo de senha não é o que se mede aqui
+    senha = app_module.gerar_hash_senha("benchmark")
+    linhas_usuarios = [{"login": "bench-admin", "senha": senha, "perfil": "Admin", "nome": "Benchmark"}]
+    for i in range(1, usuarios):
+        perfil = rng.choices(["Operador", "Atendente", "Admin"], weights=[60, 35, 5])[0]
+        linhas_usuarios.append({
+            "login": f"usuario{i}",
+            "senha": senha,
+            "perfil": perfil,
+            "nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+        })
+    db.session.execute(db.insert(app_module.Usuario), linhas_usuarios)
+
+    linhas_abrigos = []
+    for i in range(abrigos):
+        linhas_abrigos.append({
+            "nome": f"Abrigo {rng.choice(['Escola', 'Ginásio', 'Igreja', 'Centro Comunitário'])} {i + 1}",
+            "status": "Ativo" if rng.random() < 0.85 else "Inativo",
+            "logradouro": f"Rua {rng.choice(SOBRENOMES)}, {rng.randint(1, 2000)}",
+            "bairro": rng.choice(BAIRROS),
+            "cep": f"{rng.randint(10000, 99999)}-{rng.randint(100, 999)}",
+            "cidade": "Cidade",
+            "estado": "SP",
+            "latitude": -23.5 + rng.uniform(-0.3, 0.3),
+            "longitude": -46.6 + rng.uniform(-0.3, 0.3),
+            "capacidade": rng.choice([None, 50, 80, 120, 200, 300]),
+        })
+    db.session.execute(db.insert(app_module.Abrigo), linhas_abrigos)
+    db.session.flush()
+
+    ids_usuarios = [u.id for u in app_module.Usuario.query.with_entities(app_module.Usuario.id)]
+    nomes_usuarios = dict(app_module.Usuario.query.with_entities(app_module.Usuario.id, app_module.Usuario.nome))
+    ids_abrigos = [a.id for a in app_module.Abrigo.query.with_entities(app_module.Abrigo.id)]
+    # Poucos abrigos concentram a maior parte dos chamados (Zipf)
+    pesos_abrigos = [1 / (posicao + 1) for posicao in range(len(ids_abrigos))]
+
+    status, pesos = zip(*PESOS_STATUS)
+    linhas_atendimentos = []
+    for _ in range(atendimentos):
+        criado_em = _momento(rng, inicio, dias)
+        situacao = rng.choices(status, weights=pesos)[0]
+        operador_id = rng.choice(ids_usuarios)
+        telefone = _telefone(rng)
+        linha = {
+            "solicitante": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+            "telefone": telefone,
+            "telefone_normalizado": app_module.normalizar_telefone(telefone),
+            "abrigo_id": rng.choices(ids_abrigos, weights=pesos_abrigos)[0],
+            "descricao": rng.choice(OCORRENCIAS),
+            "operador_id": operador_id,
+            "operador_nome": nomes_usuarios[operador_id],
+            "criado_em": criado_em,
+            "ultima_atualizacao": criado_em,
+            "status": situacao,
+            "versao": 1,
+            "finalizado_em": None,
+            "conclusao": None,
+            "justificativa_cancelamento": None,
+        }
+        if situacao in ("Atendido", "Cancelado"):
+            # Tempo de resolução log-normal: mediana ~1h30, cauda de alguns dias
+            linha["finalizado_em"] = criado_em + timedelta(minutes=rng.lognormvariate(4.5, 1.0))
+            if situacao == "Atendido":
+                linha["conclusao"] = rng.choice(CONCLUSOES)
+            else:
+                linha["justificativa_cancelamento"] = rng.choice(CANCELAMENTOS)
+        linhas_atendimentos.append(linha)
+
+    for i in range(0, len(linhas_atendimentos), 1000):
+        db.session.execute(db.insert(app_module.Atendimento), linhas_atendimentos[i:i + 1000])
+
+    acoes, pesos_acoes = zip(*ACOES_LOG)
+    logins = dict(app_module.Usuario.query.with_entities(app_module.Usuario.id, app_module.Usuario.login))
+    linhas_logs = []
+    for i in range(logs):
+        usuario_id = rng.choice(ids_usuarios)
+        acao = rng.choices(acoes, weights=pesos_acoes)[0]
+        linhas_logs.append({
+            "usuario_id": usuario_id,
+            "usuario_login": logins[usuario_id],
+            "acao": acao,
+            "descricao": f"{acao} por {logins[usuario_id]}",
+            "rota": "/",
+            "metodo": "POST",
+            "ip": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            "data_hora": _momento(rng, inicio, dias),
+        })
+        if len(linhas_logs) == 1000:
+            db.session.execute(db.insert(app_module.LogSistema), linhas_logs)
+            linhas_logs = []
+    if linhas_logs:
+        db.session.execute(db.insert(app_module.LogSistema), linhas_logs)
+
+    db.session.commit()
+    app_module.reconstruir_relatorios()
+    app_module.recalcular_ocupacao()
+
+    return "bench-admin", "benchmark"
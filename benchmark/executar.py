@@ -0,0 +1,224 @@
+"""Executa o benchmark e compara com o baseline gravado."""
+import argparse
+import atexit
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_BASELINE = os.path.join(PASTA, "baseline.json")
+
+# (nome, URL). As exportações em PDF dependem do wkhtmltopdf e só entram com --incluir-pdf.
+ROTAS = [
+    ("principal", "/principal"),
+    ("atendimentos", "/atendimentos"),
+    ("busca", "/api/atendimentos/search?q=alagamento"),
+    ("relatorios", "/relatorios?formato=json"),
+    ("logs", "/logs"),
+    ("logs_xlsx", "/logs/export/xlsx"),
+]
+ROTAS_PDF = [
+    ("logs_pdf", "/logs/export/pdf"),
+    ("atendimento_pdf", "/atendimento/1/pdf"),
+]
+
+# Folga permitida antes de considerar regressão. Latência varia bastante de
+# uma máquina (e de uma execução) para outra, então só a mediana é comparada;
+# SQL por requisição é determinístico e não tem folga.
+TOLERANCIA_LATENCIA = 0.50
+TOLERANCIA_MEMORIA = 0.30
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)
+    return ordenados[indice]
+
+
+def _preparar_app(database_url):
+    # A configuração é lida na importação do app, então o ambiente vem antes
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "memoria")
+    sys.path.insert(0, os.path.dirname(PASTA))
+
+    import app as app_module
+
+    app_module.app.config["TESTING"] = True
+    return app_module
+
+
+def medir_rota(cliente, engine, url, repeticoes):
+    contagem_sql = {"n": 0}
+
+    def contar(conn, *_args, **_kwargs):
+        # Sessões no servidor e manutenção usam conexões próprias marcadas
+        # com infraestrutura=True (ver motor_infraestrutura no app). A leitura
+        # da sessão depende da validade do cache, não da rota, e tornaria a
+        # contagem fracionária e dependente do tempo.
+        if conn.get_execution_options().get("infraestrutura"):
+            return
+        contagem_sql["n"] += 1
+
+    from sqlalchemy import event
+
+    # Primeira chamada aquece caches (templates, índice de busca) e não entra na conta
+    resposta = cliente.get(url)
+    if resposta.status_code != 200:
+        raise RuntimeError(f"{url} respondeu {resposta.status_code}")
+
+    latencias = []
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resposta = cliente.get(url)
+            resposta.get_data()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+
+    gc.collect()
+    tracemalloc.start()
+    cliente.get(url).get_data()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(statistics.median(latencias), 2),
+        "p95_ms": round(_percentil(latencias, 95), 2),
+        "p99_ms": round(_percentil(latencias, 99), 2),
+        "sql_por_requisicao": round(contagem_sql["n"] / repeticoes, 2),
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def comparar(resultado, baseline, tolerancia_latencia=TOLERANCIA_LATENCIA, tolerancia_memoria=TOLERANCIA_MEMORIA):
+    """Lista de mensagens de regressão (vazia se está tudo dentro da folga)."""
+    regressoes = []
+    for rota, atual in resultado["rotas"].items():
+        anterior = baseline.get("rotas", {}).get(rota)
+        if not anterior:
+            continue
+
+        if atual["sql_por_requisicao"] > anterior["sql_por_requisicao"]:
+            regressoes.append(
+                f"{rota}: SQL por requisição {anterior['sql_por_requisicao']} -> {atual['sql_por_requisicao']}"
+            )
+        if atual["p50_ms"] > anterior["p50_ms"] * (1 + tolerancia_latencia):
+            regressoes.append(f"{rota}: p50 {anterior['p50_ms']} ms -> {atual['p50_ms']} ms")
+        if atual["pico_memoria_kb"] > anterior["pico_memoria_kb"] * (1 + tolerancia_memoria):
+            regressoes.append(
+                f"{rota}: pico de memória {anterior['pico_memoria_kb']} KB -> {atual['pico_memoria_kb']} KB"
+            )
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description=__doc__)
+    parser.add_argument("--database-url", help="Banco a usar (padrão: SQLite temporário). Ele é recriado!")
+    parser.add_argument("--usuarios", type=int, default=25)
+    parser.add_argument("--abrigos", type=int, default=40)
+    parser.add_argument("--atendimentos", type=int, default=5000)
+    parser.add_argument("--logs", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--incluir-pdf", action="store_true", help="Mede também as exportações em PDF")
+    parser.add_argument("--baseline", default=ARQUIVO_BASELINE)
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava o resultado como novo baseline")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_LATENCIA,
+                        help="Aumento relativo aceito na latência p50 (padrão: %(default)s)")
+    parser.add_argument("--saida", help="Grava o resultado desta execução em JSON")
+    args = parser.parse_args(argv)
+
+    pasta_temporaria = None
+    database_url = args.database_url
+    if not database_url:
+        pasta_temporaria = tempfile.mkdtemp(prefix="abrigo-bench-")
+        atexit.register(shutil.rmtree, pasta_temporaria, ignore_errors=True)
+        database_url = f"sqlite:///{os.path.join(pasta_temporaria, 'bench.db')}"
+
+    app_module = _preparar_app(database_url)
+    from benchmark.dados import gerar_dados
+
+    with app_module.app.app_context():
+        app_module.db.drop_all()
+        app_module.db.create_all()
+
+        inicio = time.perf_counter()
+        login, senha = gerar_dados(
+            app_module,
+            usuarios=args.usuarios,
+            abrigos=args.abrigos,
+            atendimentos=args.atendimentos,
+            logs=args.logs,
+        )
+        print(f"Dados gerados em {time.perf_counter() - inicio:.1f}s")
+
+        engine = app_module.db.engine
+
+    cliente = app_module.app.test_client()
+    resposta = cliente.post("/", data={"login": login, "senha": senha})
+    if resposta.status_code != 302 or "/principal" not in resposta.headers.get("Location", ""):
+        print("Falha no login do benchmark", file=sys.stderr)
+        return 2
+
+    rotas = ROTAS + (ROTAS_PDF if args.incluir_pdf else [])
+    resultado = {
+        "volumes": {
+            "usuarios": args.usuarios,
+            "abrigos": args.abrigos,
+            "atendimentos": args.atendimentos,
+            "logs": args.logs,
+        },
+        "dialeto": engine.dialect.name,
+        "rotas": {},
+    }
+
+    print(f"{'rota':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'SQL':>8}{'pico KB':>12}")
+    for nome, url in rotas:
+        metricas = medir_rota(cliente, engine, url, args.repeticoes)
+        resultado["rotas"][nome] = metricas
+        print(
+            f"{nome:<16}{metricas['p50_ms']:>10}{metricas['p95_ms']:>10}{metricas['p99_ms']:>10}"
+            f"{metricas['sql_por_requisicao']:>8}{metricas['pico_memoria_kb']:>12}"
+        )
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    if args.salvar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write("\n")
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sem baseline para comparar; rode com --salvar-baseline.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        baseline = json.load(arquivo)
+
+    if baseline.get("volumes") != resultado["volumes"] or baseline.get("dialeto") != resultado["dialeto"]:
+        print("Aviso: volumes/banco diferentes do baseline; a comparação é só indicativa.")
+
+    regressoes = comparar(resultado, baseline, tolerancia_latencia=args.tolerancia)
+    if regressoes:
+        print("\nREGRESSÕES EM RELAÇÃO AO BASELINE:", file=sys.stderr)
+        for mensagem in regressoes:
+            print(f"  - {mensagem}", file=sys.stderr)
+        return 1
+
+    print("\nSem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
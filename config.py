@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
@@ -9,3 +10,109 @@ class Config:
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Réplica de leitura opcional. As rotas só de leitura (dashboard, listagens,
+    # logs, exportações) consultam a réplica, exceto por alguns segundos depois
+    # de o próprio usuário gravar algo (para ele enxergar o que acabou de salvar).
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS") or 10)
+
+    # Política de senhas: método/custo passado ao generate_password_hash do
+    # Werkzeug. Hashes gravados com outro método são refeitos no próximo login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD") or "scrypt:32768:8:1"
+
+    # Por quantos segundos a senha confirmada vale para finalizar/cancelar
+    # outros atendimentos sem digitar de novo
+    PASSWORD_CONFIRMATION_TTL = int(os.getenv("PASSWORD_CONFIRMATION_TTL") or 300)
+
+    # Bibliotecas de front-end (Bootstrap, jQuery, Leaflet...): por padrão saem
+    # de static/vendor. Com ASSETS_CDN=1 os templates usam as URLs públicas de
+    # assets.VENDOR (só faz sentido com acesso à internet).
+    ASSETS_CDN = os.getenv("ASSETS_CDN", "0") == "1"
+
+    # Limite de requisições: "memoria" (por processo) ou "sqlite" (compartilhado
+    # entre os workers da mesma máquina, no arquivo RATE_LIMIT_SQLITE_PATH)
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND") or "memoria"
+    RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH") or "rate_limit.sqlite3"
+
+    # Regras no formato "quantidade/segundos"
+    RATE_LIMITS = {
+        "login_ip": os.getenv("RATE_LIMIT_LOGIN_IP") or "20/300",
+        "login_usuario": os.getenv("RATE_LIMIT_LOGIN_USUARIO") or "5/300",
+        "confirmacao_senha": os.getenv("RATE_LIMIT_CONFIRMACAO_SENHA") or "10/300",
+    }
+
+    # Sincronização da fila offline do formulário de novo atendimento:
+    # máximo de chamados aceitos por requisição em /api/atendimentos/lote
+    SYNC_BATCH_MAX = int(os.getenv("SYNC_BATCH_MAX") or 100)
+
+    # Relatórios em PDF grandes (logs, vários atendimentos): registros por
+    # parte e processos convertendo partes em paralelo (padrão: nº de CPUs)
+    PDF_CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE") or 500)
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS") or os.cpu_count() or 1)
+
+    # Outbox de eventos (flask outbox-dispatch): destinos separados por
+    # vírgula ("arquivo", "webhook" ou "modulo:Classe"), tamanho do lote e
+    # espera entre retentativas (exponencial, de BASE até MAX segundos)
+    OUTBOX_SINKS = os.getenv("OUTBOX_SINKS") or "arquivo"
+    OUTBOX_FILE_PATH = os.getenv("OUTBOX_FILE_PATH") or "outbox_eventos.jsonl"
+    OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL")
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE") or 100)
+    OUTBOX_BACKOFF_BASE = int(os.getenv("OUTBOX_BACKOFF_BASE") or 5)
+    OUTBOX_BACKOFF_MAX = int(os.getenv("OUTBOX_BACKOFF_MAX") or 600)
+
+    # Mensagens do WhatsApp: templates em templates/ (texto puro, Jinja) e
+    # endereço usado nos links de compartilhamento
+    WHATSAPP_TEMPLATE_ATENDIMENTO = os.getenv("WHATSAPP_TEMPLATE_ATENDIMENTO") or "mensagens/whatsapp_atendimento.txt"
+    WHATSAPP_TEMPLATE_ABRIGO = os.getenv("WHATSAPP_TEMPLATE_ABRIGO") or "mensagens/whatsapp_abrigo.txt"
+    WHATSAPP_SHARE_URL = os.getenv("WHATSAPP_SHARE_URL") or "https://api.whatsapp.com/send?text="
+
+    # Sessões no servidor: "banco" (tabela sessoes do banco principal),
+    # "sqlite" (arquivo local SESSION_SQLITE_PATH) ou "cookie" (padrão do
+    # Flask, tudo assinado no cookie). O cache em memória de cada processo
+    # guarda até SESSION_CACHE_SIZE sessões por SESSION_CACHE_TTL segundos.
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND") or "banco"
+    SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH") or "sessoes.sqlite3"
+    SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE") or 1000)
+    SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL") or 5)
+    SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL") or 300)
+    PERMANENT_SESSION_LIFETIME = timedelta(hours=int(os.getenv("SESSION_LIFETIME_HOURS") or 12))
+
+    # Detecção de chamados duplicados: mesmo telefone, aberto há no máximo
+    # DUPLICATE_WINDOW_HOURS e descrição com similaridade (0 a 1) de pelo
+    # menos DUPLICATE_SIMILARITY. Só os DUPLICATE_MAX_CANDIDATES mais
+    # recentes do telefone são comparados.
+    DUPLICATE_WINDOW_HOURS = int(os.getenv("DUPLICATE_WINDOW_HOURS") or 24)
+    DUPLICATE_SIMILARITY = float(os.getenv("DUPLICATE_SIMILARITY") or 0.6)
+    DUPLICATE_MAX_CANDIDATES = int(os.getenv("DUPLICATE_MAX_CANDIDATES") or 20)
+
+    # Compactação dos logs (flask logs-compactar): ações de alto volume que,
+    # depois de LOG_COMPACT_AFTER_DAYS dias, viram contagens diárias por usuário
+    LOG_COMPACT_ACTIONS = os.getenv("LOG_COMPACT_ACTIONS") or "Login,Logout"
+    LOG_COMPACT_AFTER_DAYS = int(os.getenv("LOG_COMPACT_AFTER_DAYS") or 30)
+
+    # Manutenção agendada (flask manutencao): intervalo em segundos de cada
+    # tarefa (0 desliga). MAINTENANCE_IN_PROCESS=1 roda o agendador numa
+    # thread de cada worker em vez do processo separado; a trava no banco
+    # garante um worker por tarefa. Ela é renovada enquanto a tarefa roda e,
+    # se o processo morrer, expira em MAINTENANCE_LOCK_TTL segundos.
+    MAINTENANCE_INTERVALS = {
+        "estatisticas": int(os.getenv("MAINTENANCE_ESTATISTICAS") or 6 * 3600),
+        "logs-compactar": int(os.getenv("MAINTENANCE_LOGS_COMPACTAR") or 24 * 3600),
+        "logs-arquivar": int(os.getenv("MAINTENANCE_LOGS_ARQUIVAR") or 24 * 3600),
+        "relatorios": int(os.getenv("MAINTENANCE_RELATORIOS") or 24 * 3600),
+        "sessoes-limpar": int(os.getenv("MAINTENANCE_SESSOES_LIMPAR") or 3600),
+        "outbox-limpar": int(os.getenv("MAINTENANCE_OUTBOX_LIMPAR") or 24 * 3600),
+        "aquecer-caches": int(os.getenv("MAINTENANCE_AQUECER_CACHES") or 3600),
+    }
+    MAINTENANCE_IN_PROCESS = os.getenv("MAINTENANCE_IN_PROCESS", "0") == "1"
+    MAINTENANCE_TICK = int(os.getenv("MAINTENANCE_TICK") or 30)
+    MAINTENANCE_LOCK_TTL = int(os.getenv("MAINTENANCE_LOCK_TTL") or 300)
+
+    # Retenção: logs com mais de LOG_RETENTION_DAYS dias (0 = nunca) saem
+    # do banco para arquivos .jsonl.gz em LOG_ARCHIVE_DIR; eventos do outbox
+    # já entregues são apagados depois de OUTBOX_RETENTION_DAYS dias
+    LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS") or 0)
+    LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR") or "arquivo_logs"
+    OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS") or 7)
@@ -0,0 +1,89 @@
+"""busca de atendimentos
+
+Revision ID: 3c1f7a2b9d10
+Revises: a92404d45082
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import re
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f7a2b9d10'
+down_revision = 'a92404d45082'
+branch_labels = None
+depends_on = None
+
+
+def _normalizar_telefone(telefone):
+    digitos = re.sub(r"\D", "", telefone or "")
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    if len(digitos) in (11, 12) and digitos.startswith("0"):
+        digitos = digitos[1:]
+    return digitos
+
+
+def upgrade():
+    bind = op.get_bind()
+    postgres = bind.dialect.name == 'postgresql'
+
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('telefone_normalizado', sa.String(length=20), nullable=True))
+
+    # Preenche o telefone normalizado dos atendimentos existentes
+    atendimentos = sa.table(
+        'atendimentos',
+        sa.column('id', sa.Integer),
+        sa.column('telefone', sa.String),
+        sa.column('telefone_normalizado', sa.String),
+    )
+    for id_, telefone in bind.execute(sa.select(atendimentos.c.id, atendimentos.c.telefone)).all():
+        bind.execute(
+            atendimentos.update()
+            .where(atendimentos.c.id == id_)
+            .values(telefone_normalizado=_normalizar_telefone(telefone))
+        )
+
+    # varchar_pattern_ops permite usar o índice no LIKE 'prefixo%'
+    op.create_index(
+        'ix_atendimentos_telefone_normalizado',
+        'atendimentos',
+        ['telefone_normalizado'],
+        unique=False,
+        postgresql_ops={'telefone_normalizado': 'varchar_pattern_ops'},
+    )
+
+    if postgres:
+        op.execute("""
+            ALTER TABLE atendimentos ADD COLUMN busca_vetor tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese', coalesce(solicitante, '')), 'A') ||
+                setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B') ||
+                setweight(to_tsvector('portuguese', coalesce(conclusao, '')), 'C') ||
+                setweight(to_tsvector('portuguese', coalesce(justificativa_cancelamento, '')), 'C') ||
+                setweight(to_tsvector('simple', coalesce(telefone, '')), 'D')
+            ) STORED
+        """)
+        op.create_index(
+            'ix_atendimentos_busca_vetor',
+            'atendimentos',
+            ['busca_vetor'],
+            unique=False,
+            postgresql_using='gin',
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_atendimentos_busca_vetor', table_name='atendimentos')
+        op.execute("ALTER TABLE atendimentos DROP COLUMN busca_vetor")
+
+    op.drop_index('ix_atendimentos_telefone_normalizado', table_name='atendimentos')
+
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_column('telefone_normalizado')
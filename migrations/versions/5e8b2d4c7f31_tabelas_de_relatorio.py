@@ -0,0 +1,62 @@
+"""tabelas de relatorio
+
+Revision ID: 5e8b2d4c7f31
+Revises: 3c1f7a2b9d10
+Create Date: 2026-10-19 10:47:03.552918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b2d4c7f31'
+down_revision = '3c1f7a2b9d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('relatorio_atendimentos_diario',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('abrigo_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('abertos', sa.Integer(), nullable=False),
+    sa.Column('em_atendimento', sa.Integer(), nullable=False),
+    sa.Column('atendidos', sa.Integer(), nullable=False),
+    sa.Column('cancelados', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['abrigo_id'], ['abrigos.id'], ),
+    sa.PrimaryKeyConstraint('dia', 'abrigo_id')
+    )
+    op.create_table('relatorio_resolucao_operador',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('operador_id', sa.Integer(), nullable=False),
+    sa.Column('atendidos', sa.Integer(), nullable=False),
+    sa.Column('cancelados', sa.Integer(), nullable=False),
+    sa.Column('segundos_resolucao', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['operador_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('dia', 'operador_id')
+    )
+
+    # Volume por abrigo/dia dos atendimentos já existentes. O tempo de
+    # resolução por operador é preenchido com "flask relatorios-refresh".
+    op.execute("""
+        INSERT INTO relatorio_atendimentos_diario
+            (dia, abrigo_id, total, abertos, em_atendimento, atendidos, cancelados)
+        SELECT
+            date(criado_em),
+            abrigo_id,
+            count(*),
+            sum(CASE WHEN status = 'Aberto' THEN 1 ELSE 0 END),
+            sum(CASE WHEN status = 'Em Atendimento' THEN 1 ELSE 0 END),
+            sum(CASE WHEN status = 'Atendido' THEN 1 ELSE 0 END),
+            sum(CASE WHEN status = 'Cancelado' THEN 1 ELSE 0 END)
+        FROM atendimentos
+        WHERE criado_em IS NOT NULL
+        GROUP BY date(criado_em), abrigo_id
+    """)
+
+
+def downgrade():
+    op.drop_table('relatorio_resolucao_operador')
+    op.drop_table('relatorio_atendimentos_diario')
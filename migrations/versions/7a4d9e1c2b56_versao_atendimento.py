@@ -0,0 +1,26 @@
+"""versao do atendimento (concorrencia otimista)
+
+Revision ID: 7a4d9e1c2b56
+Revises: 5e8b2d4c7f31
+Create Date: 2026-10-19 13:05:18.904126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4d9e1c2b56'
+down_revision = '5e8b2d4c7f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_column('versao')
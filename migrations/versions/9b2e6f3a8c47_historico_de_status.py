@@ -0,0 +1,70 @@
+"""historico de status e finalizado_em no horario de Brasilia
+
+Revision ID: 9b2e6f3a8c47
+Revises: 7a4d9e1c2b56
+Create Date: 2026-10-19 15:21:36.207815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import pytz
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e6f3a8c47'
+down_revision = '7a4d9e1c2b56'
+branch_labels = None
+depends_on = None
+
+
+tz = pytz.timezone('America/Sao_Paulo')
+
+atendimentos = sa.table(
+    'atendimentos',
+    sa.column('id', sa.Integer),
+    sa.column('finalizado_em', sa.DateTime),
+)
+
+
+def _converter_finalizado_em(bind, de, para):
+    linhas = bind.execute(
+        sa.select(atendimentos.c.id, atendimentos.c.finalizado_em)
+        .where(atendimentos.c.finalizado_em.isnot(None))
+    ).all()
+    for id_, finalizado_em in linhas:
+        convertido = de.localize(finalizado_em).astimezone(para).replace(tzinfo=None)
+        bind.execute(
+            atendimentos.update()
+            .where(atendimentos.c.id == id_)
+            .values(finalizado_em=convertido)
+        )
+
+
+def upgrade():
+    op.create_table('historico_status_atendimentos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('atendimento_id', sa.Integer(), nullable=False),
+    sa.Column('status_anterior', sa.String(length=20), nullable=True),
+    sa.Column('status_novo', sa.String(length=20), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('usuario_login', sa.String(length=50), nullable=True),
+    sa.Column('data_hora', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['atendimento_id'], ['atendimentos.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('historico_status_atendimentos', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_historico_status_atendimentos_atendimento_id'), ['atendimento_id'], unique=False)
+
+    # finalizado_em era gravado com utcnow(); passa a usar o mesmo fuso de
+    # criado_em. Depois desta migração rode "flask relatorios-refresh".
+    _converter_finalizado_em(op.get_bind(), pytz.utc, tz)
+
+
+def downgrade():
+    _converter_finalizado_em(op.get_bind(), tz, pytz.utc)
+
+    with op.batch_alter_table('historico_status_atendimentos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_historico_status_atendimentos_atendimento_id'))
+
+    op.drop_table('historico_status_atendimentos')
@@ -0,0 +1,43 @@
+"""filas por usuario
+
+Revision ID: a3e7c9f1b5d8
+Revises: f8b3d1e6a2c9
+Create Date: 2026-10-19 19:32:05.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e7c9f1b5d8'
+down_revision = 'f8b3d1e6a2c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('atendente_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_atendimentos_atendente_id_usuarios', 'usuarios', ['atendente_id'], ['id'])
+        batch_op.create_index('ix_atendimentos_operador_status', ['operador_id', 'status'], unique=False)
+        batch_op.create_index('ix_atendimentos_atendente_status', ['atendente_id', 'status'], unique=False)
+
+    # Chamados já iniciados: atendente = quem registrou a última ida para "Em Atendimento"
+    op.execute("""
+        UPDATE atendimentos SET atendente_id = (
+            SELECT h.usuario_id FROM historico_status_atendimentos h
+            WHERE h.atendimento_id = atendimentos.id AND h.status_novo = 'Em Atendimento'
+            ORDER BY h.data_hora DESC, h.id DESC
+            LIMIT 1
+        )
+        WHERE status <> 'Aberto'
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_index('ix_atendimentos_atendente_status')
+        batch_op.drop_index('ix_atendimentos_operador_status')
+        batch_op.drop_constraint('fk_atendimentos_atendente_id_usuarios', type_='foreignkey')
+        batch_op.drop_column('atendente_id')
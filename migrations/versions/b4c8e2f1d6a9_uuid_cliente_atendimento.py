@@ -0,0 +1,28 @@
+"""uuid gerado no cliente (sincronizacao offline)
+
+Revision ID: b4c8e2f1d6a9
+Revises: 9b2e6f3a8c47
+Create Date: 2026-10-19 15:02:41.318270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c8e2f1d6a9'
+down_revision = '9b2e6f3a8c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cliente_uuid', sa.String(length=36), nullable=True))
+        batch_op.create_index(batch_op.f('ix_atendimentos_cliente_uuid'), ['cliente_uuid'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_atendimentos_cliente_uuid'))
+        batch_op.drop_column('cliente_uuid')
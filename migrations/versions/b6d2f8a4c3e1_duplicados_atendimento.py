@@ -0,0 +1,32 @@
+"""duplicados atendimento
+
+Revision ID: b6d2f8a4c3e1
+Revises: a3e7c9f1b5d8
+Create Date: 2026-10-19 20:14:38.402917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d2f8a4c3e1'
+down_revision = 'a3e7c9f1b5d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duplicado_de_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_atendimentos_duplicado_de_id_atendimentos', 'atendimentos', ['duplicado_de_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_atendimentos_duplicado_de_id'), ['duplicado_de_id'], unique=False)
+        batch_op.create_index('ix_atendimentos_telefone_criado', ['telefone_normalizado', 'criado_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_index('ix_atendimentos_telefone_criado')
+        batch_op.drop_index(batch_op.f('ix_atendimentos_duplicado_de_id'))
+        batch_op.drop_constraint('fk_atendimentos_duplicado_de_id_atendimentos', type_='foreignkey')
+        batch_op.drop_column('duplicado_de_id')
@@ -0,0 +1,47 @@
+"""capacidade e ocupacao dos abrigos
+
+Revision ID: c7d1a5e9f2b3
+Revises: b4c8e2f1d6a9
+Create Date: 2026-10-19 16:10:27.542913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d1a5e9f2b3'
+down_revision = 'b4c8e2f1d6a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('abrigos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('capacidade', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('ocupacao', sa.Integer(), server_default='0', nullable=False))
+
+    # Ocupação inicial = atendimentos ainda em aberto em cada abrigo
+    op.execute(
+        "UPDATE abrigos SET ocupacao = ("
+        " SELECT COUNT(*) FROM atendimentos"
+        " WHERE atendimentos.abrigo_id = abrigos.id"
+        " AND atendimentos.status IN ('Aberto', 'Em Atendimento'))"
+    )
+
+    # Mesma ordem das consultas: vagas DESC NULLS LAST, nome. O SQLite não
+    # aceita NULLS LAST em índice, mas lá o DESC já deixa os NULLs por último.
+    vagas = '(capacidade - ocupacao) DESC'
+    if op.get_context().dialect.name == 'postgresql':
+        vagas += ' NULLS LAST'
+    op.create_index(
+        'ix_abrigos_disponibilidade', 'abrigos',
+        ['status', sa.text(vagas), 'nome'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_abrigos_disponibilidade', table_name='abrigos')
+    with op.batch_alter_table('abrigos', schema=None) as batch_op:
+        batch_op.drop_column('ocupacao')
+        batch_op.drop_column('capacidade')
@@ -0,0 +1,51 @@
+"""auditoria estruturada
+
+Revision ID: c9e4a2d7f1b3
+Revises: b6d2f8a4c3e1
+Create Date: 2026-10-19 20:58:21.734062
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e4a2d7f1b3'
+down_revision = 'b6d2f8a4c3e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('logs_sistema', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('entidade', sa.String(length=30), nullable=True))
+        batch_op.add_column(sa.Column('entidade_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('dados', sa.JSON(), nullable=True))
+        batch_op.create_index('ix_logs_sistema_entidade', ['entidade', 'entidade_id', 'data_hora'], unique=False)
+        batch_op.create_index('ix_logs_sistema_acao_data', ['acao', 'data_hora'], unique=False)
+
+    op.create_table('logs_resumo_diario',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('acao', sa.String(length=100), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'acao', 'usuario_id')
+    )
+
+    # Logins/logouts antigos: a entidade é o próprio usuário. Os demais
+    # ficam só com a descrição em texto.
+    op.execute("""
+        UPDATE logs_sistema SET entidade = 'usuario', entidade_id = usuario_id
+        WHERE acao IN ('Login', 'Logout') AND usuario_id IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.drop_table('logs_resumo_diario')
+
+    with op.batch_alter_table('logs_sistema', schema=None) as batch_op:
+        batch_op.drop_index('ix_logs_sistema_acao_data')
+        batch_op.drop_index('ix_logs_sistema_entidade')
+        batch_op.drop_column('dados')
+        batch_op.drop_column('entidade_id')
+        batch_op.drop_column('entidade')
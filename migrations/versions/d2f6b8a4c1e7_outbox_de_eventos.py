@@ -0,0 +1,42 @@
+"""outbox de eventos
+
+Revision ID: d2f6b8a4c1e7
+Revises: c7d1a5e9f2b3
+Create Date: 2026-10-19 17:21:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6b8a4c1e7'
+down_revision = 'c7d1a5e9f2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('eventos_outbox',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('entidade', sa.String(length=30), nullable=False),
+    sa.Column('entidade_id', sa.Integer(), nullable=False),
+    sa.Column('dados', sa.JSON(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('enviado_em', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('tentativas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('proxima_tentativa', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('ultimo_erro', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_eventos_outbox_pendentes', 'eventos_outbox', ['id'],
+        postgresql_where=sa.text('enviado_em IS NULL'),
+        sqlite_where=sa.text('enviado_em IS NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_eventos_outbox_pendentes', table_name='eventos_outbox')
+    op.drop_table('eventos_outbox')
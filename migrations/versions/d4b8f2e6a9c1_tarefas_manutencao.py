@@ -0,0 +1,38 @@
+"""tarefas manutencao
+
+Revision ID: d4b8f2e6a9c1
+Revises: c9e4a2d7f1b3
+Create Date: 2026-10-19 21:41:09.265318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8f2e6a9c1'
+down_revision = 'c9e4a2d7f1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tarefas_manutencao',
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('travada_por', sa.String(length=100), nullable=True),
+    sa.Column('travada_ate', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('proxima_execucao', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('ultimo_inicio', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('ultima_duracao_ms', sa.Integer(), nullable=True),
+    sa.Column('maior_duracao_ms', sa.Integer(), nullable=True),
+    sa.Column('duracao_total_ms', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('execucoes', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('falhas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('ultimo_resultado', sa.String(length=200), nullable=True),
+    sa.Column('ultimo_erro', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('nome')
+    )
+
+
+def downgrade():
+    op.drop_table('tarefas_manutencao')
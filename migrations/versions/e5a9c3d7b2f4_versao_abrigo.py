@@ -0,0 +1,26 @@
+"""versao do abrigo (cache do bloco de endereco)
+
+Revision ID: e5a9c3d7b2f4
+Revises: d2f6b8a4c1e7
+Create Date: 2026-10-19 18:02:44.906351
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c3d7b2f4'
+down_revision = 'd2f6b8a4c1e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('abrigos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('abrigos', schema=None) as batch_op:
+        batch_op.drop_column('versao')
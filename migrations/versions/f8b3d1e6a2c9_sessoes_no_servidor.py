@@ -0,0 +1,37 @@
+"""sessoes no servidor
+
+Revision ID: f8b3d1e6a2c9
+Revises: e5a9c3d7b2f4
+Create Date: 2026-10-19 18:47:12.630592
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8b3d1e6a2c9'
+down_revision = 'e5a9c3d7b2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sessoes',
+    sa.Column('chave', sa.String(length=64), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('dados', sa.Text(), nullable=False),
+    sa.Column('expira_em', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('chave')
+    )
+    with op.batch_alter_table('sessoes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sessoes_usuario_id'), ['usuario_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_sessoes_expira_em'), ['expira_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sessoes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sessoes_expira_em'))
+        batch_op.drop_index(batch_op.f('ix_sessoes_usuario_id'))
+
+    op.drop_table('sessoes')
@@ -0,0 +1,83 @@
+"""Destinos do outbox de eventos (arquivo local, webhook) e política de retentativa.
+
+O app grava os eventos na tabela eventos_outbox na mesma transação da
+mudança; o despachante (flask outbox-dispatch) lê em lotes e entrega a
+cada destino configurado em OUTBOX_SINKS. Um destino é qualquer objeto
+com `enviar(eventos)`, que recebe uma lista de dicionários e levanta
+exceção se não conseguiu entregar o lote inteiro.
+
+Entrega "pelo menos uma vez": um lote só é marcado como enviado depois
+que todos os destinos aceitaram, então após uma falha (ou queda do
+despachante) os mesmos eventos podem chegar de novo. Os consumidores
+devem descartar repetidos pelo `id` do evento.
+"""
+import importlib
+import json
+import os
+import random
+import urllib.request
+from datetime import timedelta
+
+
+class DestinoArquivo:
+    """Acrescenta cada evento como uma linha JSON no arquivo."""
+
+    def __init__(self, config):
+        self.caminho = config.get("OUTBOX_FILE_PATH") or "outbox_eventos.jsonl"
+
+    def enviar(self, eventos):
+        with open(self.caminho, "a", encoding="utf-8") as arquivo:
+            for evento in eventos:
+                arquivo.write(json.dumps(evento, ensure_ascii=False) + "\n")
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+
+class DestinoWebhook:
+    """POST de {"eventos": [...]} para OUTBOX_WEBHOOK_URL; qualquer resposta não 2xx é falha."""
+
+    def __init__(self, config):
+        self.url = config.get("OUTBOX_WEBHOOK_URL")
+        if not self.url:
+            raise ValueError("Defina OUTBOX_WEBHOOK_URL para usar o destino 'webhook'.")
+        self.timeout = config.get("OUTBOX_WEBHOOK_TIMEOUT") or 10
+
+    def enviar(self, eventos):
+        corpo = json.dumps({"eventos": eventos}, ensure_ascii=False).encode("utf-8")
+        pedido = urllib.request.Request(
+            self.url,
+            data=corpo,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        # urlopen levanta HTTPError para 4xx/5xx
+        with urllib.request.urlopen(pedido, timeout=self.timeout) as resposta:
+            resposta.read()
+
+
+DESTINOS = {
+    "arquivo": DestinoArquivo,
+    "webhook": DestinoWebhook,
+}
+
+
+def carregar_destinos(config):
+    """Instancia os destinos de OUTBOX_SINKS (nomes de DESTINOS ou "modulo:Classe")."""
+    destinos = []
+    for nome in (config.get("OUTBOX_SINKS") or "").split(","):
+        nome = nome.strip()
+        if not nome:
+            continue
+        if nome in DESTINOS:
+            classe = DESTINOS[nome]
+        else:
+            modulo, _, atributo = nome.partition(":")
+            classe = getattr(importlib.import_module(modulo), atributo)
+        destinos.append((nome, classe(config)))
+    return destinos
+
+
+def proxima_tentativa(tentativas, base, maximo):
+    """Espera antes da tentativa seguinte: exponencial com teto e jitter de até 20%."""
+    segundos = min(base * 2 ** max(tentativas - 1, 0), maximo)
+    return timedelta(seconds=segundos * random.uniform(0.8, 1.0))
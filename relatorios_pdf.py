@@ -0,0 +1,97 @@
+"""Geração de PDFs grandes em partes.
+
+O HTML do relatório é produzido em pedaços (N registros cada) por quem chama.
+Cada pedaço vira um PDF parcial num pool de processos (o wkhtmltopdf é o
+gargalo e usa um núcleo só) e no fim as partes são juntadas num arquivo com
+o pypdf. Do HTML só ficam em memória os pedaços em andamento, nunca o
+documento inteiro.
+
+Este módulo não importa o app: os processos do pool só precisam do pdfkit.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfkit
+from pypdf import PdfWriter
+
+
+_pool = None
+_processos_pool = None
+
+
+def _obter_pool(processos):
+    global _pool, _processos_pool
+    if _pool is None or _processos_pool != processos:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=processos)
+        _processos_pool = processos
+    return _pool
+
+
+def _gerar_parte(html, caminho, opcoes):
+    # Roda dentro do pool
+    pdfkit.from_string(html, caminho, options=opcoes)
+    return caminho
+
+
+def juntar_pdfs(caminhos, destino):
+    """Junta os PDFs na ordem num só arquivo, com as páginas e o índice (outline) de cada parte."""
+    escritor = PdfWriter()
+    for caminho in caminhos:
+        escritor.append(caminho)
+    escritor.write(destino)
+    escritor.close()
+    return destino
+
+
+def gerar_pdf_em_partes(partes_html, destino, processos=None, opcoes=None):
+    """Converte cada HTML de `partes_html` (iterável, na ordem) e junta em `destino`.
+
+    No máximo 2 x `processos` partes ficam pendentes ao mesmo tempo, então o
+    iterável é consumido no ritmo da conversão. Retorna o número de partes
+    (0, sem gerar `destino`, se o iterável vier vazio).
+    """
+    processos = processos or os.cpu_count() or 1
+    opcoes = {"encoding": "UTF-8", "quiet": "", **(opcoes or {})}
+    pasta = tempfile.mkdtemp(prefix="relatorio-pdf-")
+
+    try:
+        partes = iter(partes_html)
+        primeira = next(partes, None)
+        segunda = next(partes, None)
+
+        # Nada a exportar: não gera arquivo (quem chamou decide a resposta)
+        if primeira is None:
+            return 0
+
+        # Relatório de uma parte só: converte aqui mesmo, sem pool nem junção
+        if segunda is None:
+            _gerar_parte(primeira, destino, opcoes)
+            return 1
+
+        pool = _obter_pool(processos)
+        caminhos = []
+        pendentes = []
+
+        def enviar(html):
+            caminho = os.path.join(pasta, f"parte-{len(caminhos):05d}.pdf")
+            caminhos.append(caminho)
+            pendentes.append(pool.submit(_gerar_parte, html, caminho, opcoes))
+
+        enviar(primeira)
+        enviar(segunda)
+        for html in partes:
+            if len(pendentes) >= 2 * processos:
+                pendentes.pop(0).result()
+            enviar(html)
+
+        for futuro in pendentes:
+            futuro.result()
+
+        juntar_pdfs(caminhos, destino)
+        return len(caminhos)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,137 @@
+// URLs e estado do atendimento, gravados pelo template em #atendimento-dados
+const atendimento = JSON.parse(
+    document.getElementById("atendimento-dados").textContent
+);
+
+// Senha confirmada há pouco: o servidor dispensa a senha por alguns minutos
+const exigeSenha = atendimento.exige_senha;
+
+function exportWhatsapp() {
+    // Mesmo texto da mensagem de início de atendimento, montado no servidor
+    window.open(atendimento.url_whatsapp, '_blank');
+}
+
+function exportPDF() {
+    window.open(atendimento.url_pdf, '_blank');
+}
+
+function abrirModalWhatsapp() {
+    if (atendimento.em_atendimento) {
+        // Se já está "Em Atendimento", apenas redireciona para WhatsApp sem mostrar o modal
+        confirmarWhatsapp();
+    } else {
+        // Caso contrário, mostra o modal normalmente
+        var modal = new bootstrap.Modal(document.getElementById('whatsappModal'));
+        modal.show();
+    }
+}
+
+function confirmarWhatsapp() {
+    // Abre a rota Flask que altera status e redireciona para WhatsApp, em nova aba
+    window.open(atendimento.url_iniciar_whatsapp, '_blank');
+
+    // Fecha modal
+    var modalEl = document.getElementById('whatsappModal');
+    var modal = bootstrap.Modal.getInstance(modalEl);
+    if (modal) modal.hide();
+}
+
+function valorSenha(id) {
+    const campo = document.getElementById(id);
+    return campo ? campo.value.trim() : "";
+}
+
+function abrirModalCancelar() {
+    var modal = new bootstrap.Modal(document.getElementById('cancelModal'));
+    modal.show();
+}
+
+function confirmarCancelar() {
+    const justificativa = document.getElementById('justificativa').value.trim();
+    const senha = valorSenha('senha');
+
+    if (!justificativa || (exigeSenha && !senha)) {
+        document.getElementById('cancelError').innerText = "Preencha justificativa e senha.";
+        document.getElementById('cancelError').style.display = "block";
+        return;
+    }
+
+    const data = { justificativa, senha };
+
+    fetch(atendimento.url_cancelar, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json"
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            window.location.reload();  // Atualiza a página com status alterado
+        } else {
+            document.getElementById('cancelError').innerText = result.error;
+            document.getElementById('cancelError').style.display = "block";
+        }
+    })
+    .catch(err => {
+        document.getElementById('cancelError').innerText = "Erro ao cancelar atendimento.";
+        document.getElementById('cancelError').style.display = "block";
+    });
+}
+
+// Ao fechar a modal de cancelamento, limpa campos e mensagem de erro
+var cancelModalEl = document.getElementById('cancelModal');
+
+cancelModalEl.addEventListener('hidden.bs.modal', function () {
+    document.getElementById('justificativa').value = '';
+    if (document.getElementById('senha')) document.getElementById('senha').value = '';
+
+    var errorEl = document.getElementById('cancelError');
+    errorEl.innerText = '';
+    errorEl.style.display = 'none';
+});
+
+function confirmarFinalizar() {
+    const conclusao = document.getElementById('conclusao').value.trim();
+    const senha = valorSenha('senhaFinalizar');
+
+    if (!conclusao || (exigeSenha && !senha)) {
+        document.getElementById('finalizarError').innerText = "Preencha a conclusão e a senha.";
+        document.getElementById('finalizarError').style.display = "block";
+        return;
+    }
+
+    const data = { conclusao, senha };
+
+    fetch(atendimento.url_finalizar, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json"
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            window.location.reload();
+        } else {
+            document.getElementById('finalizarError').innerText = result.error;
+            document.getElementById('finalizarError').style.display = "block";
+        }
+    })
+    .catch(err => {
+        document.getElementById('finalizarError').innerText = "Erro ao finalizar atendimento.";
+        document.getElementById('finalizarError').style.display = "block";
+    });
+}
+
+var finalizarModalEl = document.getElementById('finalizarModal');
+
+finalizarModalEl.addEventListener('hidden.bs.modal', function () {
+    document.getElementById('conclusao').value = '';
+    if (document.getElementById('senhaFinalizar')) document.getElementById('senhaFinalizar').value = '';
+    var errorEl = document.getElementById('finalizarError');
+    errorEl.innerText = '';
+    errorEl.style.display = 'none';
+});
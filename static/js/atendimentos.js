@@ -0,0 +1,65 @@
+function toggleAll(source) { document.querySelectorAll('.select-item').forEach(c => c.checked = source.checked); }
+
+$(document).ready(function () {
+    var table = $('#tableAtendimentos').DataTable({
+        order: [[6, "desc"]],
+        columnDefs: [{ orderable:false, targets:[0,8] }],
+        language: {
+            emptyTable:"Nenhum atendimento encontrado",
+            info:"Mostrando _START_ a _END_ de _TOTAL_",
+            lengthMenu:"Mostrar _MENU_",
+            paginate:{ next:"Próximo", previous:"Anterior" }
+        },
+        pageLength: 10,
+        dom:'rt<"bottom"l<"info-wrapper"ip>><"clear">'
+    });
+
+    // Relatório em PDF: marcados (em qualquer página) ou todos os filtrados
+    $('#form-relatorio-pdf').on('submit', function () {
+        const form = $(this);
+        form.find('input[name="ids"]').remove();
+
+        let caixas = table.$('.select-item:checked');
+        if (!caixas.length) caixas = $(table.rows({ search: 'applied' }).nodes()).find('.select-item');
+        caixas.each(function () {
+            $('<input type="hidden" name="ids">').val(this.value).appendTo(form);
+        });
+    });
+
+    // FILTROS
+    $('.search-container').each(function() {
+        const container = $(this);
+        const input = container.find('.filter-search');
+        const optionsDiv = container.find('.options');
+        const colIndex = container.data('col');
+        const column = table.column(colIndex);
+        let selecionados = [];
+        const valores = column.data().unique().sort().toArray();
+
+        function renderOptions(lista) {
+            optionsDiv.empty();
+            lista.forEach(v => {
+                const checked = selecionados.includes(v) ? 'checked' : '';
+                optionsDiv.append(`<div class="option"><input type="checkbox" value="${v}" ${checked}> ${v}</div>`);
+            });
+            optionsDiv.show();
+        }
+
+        // Abrir filtro e fechar os outros
+        input.on("click", function(e){
+            e.stopPropagation();
+
+            // Fecha todos os outros filtros
+            $('.search-container').not(container).find('.options').hide();
+
+            // Alterna o filtro atual
+            optionsDiv.is(":visible") ? optionsDiv.hide() : renderOptions(valores);
+        });
+        input.on("input", function(){ const query=input.val().toLowerCase(); renderOptions(valores.filter(v=>v.toLowerCase().includes(query))); });
+        optionsDiv.on("change","input[type=checkbox]",function(){ const val=$(this).val(); this.checked ? selecionados.push(val) : selecionados=selecionados.filter(v=>v!==val); input.val(selecionados.join(", ")); selecionados.length ? column.search(selecionados.map(v=>'^'+$.fn.dataTable.util.escapeRegex(v)+'$').join('|'),true,false).draw() : column.search('').draw(); });
+        $(document).on("click", function(e){ if(!$(e.target).closest(container).length) optionsDiv.hide(); });
+        container.data('reset', () => { selecionados=[]; input.val(''); column.search('').draw(); });
+    });
+
+    $("#clear-filters").on("click", function(){ $('.search-container').each(function(){ $(this).data('reset')(); }); });
+});
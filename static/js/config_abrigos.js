@@ -0,0 +1,83 @@
+function toggleAll(source){
+    document.querySelectorAll('.select-item').forEach(c => c.checked = source.checked);
+}
+
+$(document).ready(function () {
+
+    const table = $('#tableAbrigos').DataTable({
+        order: [[1, "asc"]],
+        columnDefs: [{ orderable:false, targets:[0,5] }],
+        language:{
+            emptyTable:"Nenhum abrigo encontrado",
+            info:"Mostrando _START_ a _END_ de _TOTAL_",
+            lengthMenu:"Mostrar _MENU_",
+            paginate:{ next:"Próximo", previous:"Anterior" }
+        },
+        pageLength: 10,
+        dom: 'rt<"bottom"l<"info-wrapper"ip>><"clear">'
+    });
+
+    /* === FILTROS === */
+    $('.search-container').each(function(){
+        const container = $(this);
+        const input = container.find('.filter-search');
+        const optionsDiv = container.find('.options');
+        const colIndex = container.data('col');
+        const column = table.column(colIndex);
+
+        let selecionados = [];
+        const valores = column.data().unique().sort().toArray();
+
+        function renderOptions(lista){
+            optionsDiv.empty();
+            lista.forEach(v=>{
+                const checked = selecionados.includes(v) ? "checked" : "";
+                optionsDiv.append(`<div class="option"><input type="checkbox" value="${v}" ${checked}> ${v}</div>`);
+            });
+            optionsDiv.show();
+        }
+
+        // Abrir filtro e fechar os outros
+        input.on("click", function(e){
+            e.stopPropagation();
+
+            // Fecha todos os outros filtros
+            $('.search-container').not(container).find('.options').hide();
+
+            // Alterna o filtro atual
+            optionsDiv.is(":visible") ? optionsDiv.hide() : renderOptions(valores);
+        });
+
+        input.on("input", function(){
+            const q = input.val().toLowerCase();
+            const filtradas = valores.filter(v => v.toLowerCase().includes(q));
+            renderOptions(filtradas);
+        });
+
+        optionsDiv.on("change","input[type=checkbox]",function(){
+            const val = $(this).val();
+            if(this.checked) selecionados.push(val);
+            else selecionados = selecionados.filter(v=>v!==val);
+            input.val(selecionados.join(", "));
+            applyFilter();
+        });
+
+        function applyFilter(){
+            if(selecionados.length){
+                const regex = selecionados.map(v => '^'+v+'$').join('|');
+                column.search(regex,true,false).draw();
+            } else column.search('').draw();
+        }
+
+        $(document).on("click", function(e){
+            if(!$(e.target).closest(container).length) optionsDiv.hide();
+        });
+
+        container.data('reset', () => { selecionados=[]; input.val(''); column.search('').draw(); });
+    });
+
+    $("#clear-filters").on("click", function(){
+        $('.search-container').each(function(){ $(this).data('reset')(); });
+    });
+
+});
@@ -0,0 +1,147 @@
+/* ===============================
+   MAPA + CEP (FINAL CONSOLIDADO)
+================================ */
+
+// ---------- Inputs ----------
+const latInput = document.getElementById('latitude');
+const lngInput = document.getElementById('longitude');
+const cepInput = document.getElementById('cep');
+
+// ---------- Verifica edição ----------
+const hasCoords = latInput.value && lngInput.value;
+
+// ---------- Coordenadas iniciais ----------
+let lat = hasCoords ? parseFloat(latInput.value) : -15.7801;
+let lng = hasCoords ? parseFloat(lngInput.value) : -47.9292;
+
+// ---------- Inicializa mapa (já centralizado no marcador) ----------
+const map = L.map('map').setView(
+    [lat, lng],
+    hasCoords ? 16 : 5
+);
+
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+    attribution: '© OpenStreetMap'
+}).addTo(map);
+
+// ---------- Marcador ----------
+const marker = L.marker([lat, lng], { draggable: true }).addTo(map);
+
+// ---------- Centro baseado no CEP ----------
+let cepCenter = hasCoords ? [lat, lng] : null;
+const cepZoom = 16;
+
+// ---------- Mapa de estados ----------
+const estadosUF = {
+    "Acre": "AC", "Alagoas": "AL", "Amapá": "AP", "Amazonas": "AM",
+    "Bahia": "BA", "Ceará": "CE", "Distrito Federal": "DF",
+    "Espírito Santo": "ES", "Goiás": "GO", "Maranhão": "MA",
+    "Mato Grosso": "MT", "Mato Grosso do Sul": "MS",
+    "Minas Gerais": "MG", "Pará": "PA", "Paraíba": "PB",
+    "Paraná": "PR", "Pernambuco": "PE", "Piauí": "PI",
+    "Rio de Janeiro": "RJ", "Rio Grande do Norte": "RN",
+    "Rio Grande do Sul": "RS", "Rondônia": "RO", "Roraima": "RR",
+    "Santa Catarina": "SC", "São Paulo": "SP", "Sergipe": "SE",
+    "Tocantins": "TO"
+};
+
+// ---------- Reverse Geocoding ----------
+function atualizarEnderecoPorMapa(lat, lng) {
+    fetch(`https://nominatim.openstreetmap.org/reverse?format=json&lat=${lat}&lon=${lng}`)
+        .then(res => res.json())
+        .then(data => {
+            if (!data.address) return;
+
+            const a = data.address;
+
+            $('#cep').val(a.postcode || '');
+            $('#logradouro').val(a.road || '');
+            $('#bairro').val(a.suburb || a.neighbourhood || '');
+            $('#cidade').val(a.city || a.town || a.village || '');
+
+            // Estado (UF)
+            let uf = '';
+            if (a.state_code) {
+                uf = a.state_code.toUpperCase();
+            } else if (a.state && estadosUF[a.state]) {
+                uf = estadosUF[a.state];
+            }
+            $('#estado').val(uf);
+
+            // Atualiza centro do CEP
+            cepCenter = [lat, lng];
+        });
+}
+
+// ---------- Arrastar marcador ----------
+marker.on('dragend', () => {
+    const pos = marker.getLatLng();
+
+    latInput.value = pos.lat.toFixed(6);
+    lngInput.value = pos.lng.toFixed(6);
+
+    atualizarEnderecoPorMapa(pos.lat, pos.lng);
+});
+
+// ---------- Clique no mapa ----------
+map.on('click', e => {
+    const { lat, lng } = e.latlng;
+
+    marker.setLatLng([lat, lng]);
+    latInput.value = lat.toFixed(6);
+    lngInput.value = lng.toFixed(6);
+
+    atualizarEnderecoPorMapa(lat, lng);
+});
+
+// ---------- Buscar CEP ----------
+$('#buscarCep').on('click', () => {
+    const cep = cepInput.value.replace(/\D/g, '');
+    if (cep.length !== 8) {
+        alert('CEP inválido');
+        return;
+    }
+
+    $.getJSON(`https://viacep.com.br/ws/${cep}/json/`, data => {
+        if (data.erro) {
+            alert('CEP não encontrado');
+            return;
+        }
+
+        $('#logradouro').val(data.logradouro);
+        $('#bairro').val(data.bairro);
+        $('#cidade').val(data.localidade);
+        $('#estado').val(data.uf);
+
+        const endereco = `${data.logradouro}, ${data.bairro}, ${data.localidade}, ${data.uf}, Brasil`;
+
+        fetch(`https://nominatim.openstreetmap.org/search?format=json&q=${encodeURIComponent(endereco)}`)
+            .then(r => r.json())
+            .then(result => {
+                if (!result.length) return;
+
+                const lat = parseFloat(result[0].lat);
+                const lon = parseFloat(result[0].lon);
+
+                latInput.value = lat.toFixed(6);
+                lngInput.value = lon.toFixed(6);
+
+                marker.setLatLng([lat, lon]);
+                cepCenter = [lat, lon];
+                map.setView(cepCenter, cepZoom);
+            });
+    });
+});
+
+// ---------- Botão recentralizar ----------
+document.getElementById('btn-recenter').addEventListener('click', () => {
+    if (cepCenter) {
+        map.setView(cepCenter, cepZoom, { animate: true });
+    }
+});
+
+// ---------- Força render correto do mapa ----------
+setTimeout(() => {
+    map.invalidateSize();
+    map.setView([lat, lng], hasCoords ? 16 : 5);
+}, 200);
@@ -0,0 +1,58 @@
+const abrigos = JSON.parse(
+    document.getElementById("abrigos-data").textContent
+);
+
+const map = L.map('map');
+
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+    attribution: '© OpenStreetMap'
+}).addTo(map);
+
+const iconAtivo = L.icon({
+    iconUrl: 'https://maps.google.com/mapfiles/ms/icons/green-dot.png',
+    iconSize: [32, 32],
+    iconAnchor: [16, 32]
+});
+
+const iconInativo = L.icon({
+    iconUrl: 'https://maps.google.com/mapfiles/ms/icons/red-dot.png',
+    iconSize: [32, 32],
+    iconAnchor: [16, 32]
+});
+
+const bounds = L.latLngBounds([]);
+
+abrigos.forEach(a => {
+    if (a.latitude == null || a.longitude == null) return;
+
+    const icon = a.status === "Ativo" ? iconAtivo : iconInativo;
+
+    L.marker([a.latitude, a.longitude], { icon })
+        .addTo(map)
+        .bindPopup(`
+            <strong>${a.nome}</strong><br>
+            <b>Status:</b> ${a.status}<br>
+            <b>Ocupação:</b> ${a.ocupacao}${a.capacidade != null ? ` / ${a.capacidade} (${a.vagas} vagas)` : ''}<br>
+            <b>Endereço:</b> ${a.logradouro}, ${a.bairro}<br>
+            <b>CEP:</b> ${a.cep}
+        `);
+
+    bounds.extend([a.latitude, a.longitude]);
+});
+
+if (bounds.isValid()) {
+    map.fitBounds(bounds, { padding: [50, 50] });
+} else {
+    map.setView([-15.7801, -47.9292], 12);
+}
+
+setTimeout(() => map.invalidateSize(), 300);
+
+// Guarda o centro e zoom inicial do mapa
+let initialCenter = map.getCenter();
+let initialZoom = map.getZoom();
+
+// Botão de recentralizar
+document.getElementById("btn-recenter").addEventListener("click", () => {
+    map.setView(initialCenter, initialZoom, { animate: true });
+});
@@ -0,0 +1,19 @@
+// Mapa com o marcador de um abrigo; coordenadas e nome vêm dos data-* de #map
+var mapaEl = document.getElementById('map');
+var lat = parseFloat(mapaEl.dataset.latitude);
+var lng = parseFloat(mapaEl.dataset.longitude);
+
+var map = L.map('map').setView([lat, lng], 16);
+
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+    attribution: '© OpenStreetMap contributors'
+}).addTo(map);
+
+// Nome como texto (não HTML) no popup
+var popup = document.createElement('span');
+popup.textContent = mapaEl.dataset.nome;
+
+L.marker([lat, lng])
+    .addTo(map)
+    .bindPopup(popup)
+    .openPopup();
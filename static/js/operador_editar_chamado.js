@@ -0,0 +1,62 @@
+// Preencher endereço e coordenadas ao selecionar abrigo
+document.getElementById('abrigo').addEventListener('change', function() {
+    const selected = this.selectedOptions[0];
+    document.getElementById('logradouro').value = selected.dataset.logradouro || '';
+    document.getElementById('bairro').value = selected.dataset.bairro || '';
+    document.getElementById('cep').value = selected.dataset.cep || '';
+
+    // Atualiza Latitude/Longitude
+    if(selected.dataset.latitude && selected.dataset.longitude) {
+        const lat = parseFloat(selected.dataset.latitude);
+        const lng = parseFloat(selected.dataset.longitude);
+
+        document.getElementById('latitude').value = lat.toFixed(6);
+        document.getElementById('longitude').value = lng.toFixed(6);
+
+        marker.setLatLng([lat, lng]);
+        map.setView([lat, lng], 16);
+    }
+});
+
+// Máscara de telefone
+const telefoneInput = document.getElementById('telefone');
+telefoneInput.addEventListener('input', function(e) {
+    let v = this.value.replace(/\D/g, '');
+    if(v.length > 11) v = v.slice(0,11);
+    if(v.length > 6) this.value = `(${v.slice(0,2)}) ${v.slice(2,7)}-${v.slice(7)}`;
+    else if(v.length > 2) this.value = `(${v.slice(0,2)}) ${v.slice(2)}`;
+    else this.value = v ? `(${v}` : '';
+});
+
+// Contador de caracteres
+const descricao = document.getElementById('descricao');
+const contador = document.getElementById('descricao-contador');
+descricao.addEventListener('input', function() {
+    contador.textContent = `${this.value.length} / 1000`;
+});
+
+// Validação
+document.getElementById('editarAtendimentoForm').addEventListener('submit', function(e) {
+    const requiredFields = ['solicitante','telefone','abrigo','descricao'];
+    let valid = true;
+    requiredFields.forEach(id=>{ if(!document.getElementById(id).value.trim()) valid=false; });
+    if(!valid){ e.preventDefault(); alert('Por favor, preencha todos os campos obrigatórios.'); }
+});
+
+// Inicializa mapa
+var latInput = document.getElementById('latitude');
+var lngInput = document.getElementById('longitude');
+var lat = parseFloat(latInput.value) || -15.7801;
+var lng = parseFloat(lngInput.value) || -47.9292;
+
+var map = L.map('map').setView([lat, lng], 16);
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', { attribution: '© OpenStreetMap contributors' }).addTo(map);
+
+var marker = L.marker([lat, lng], { draggable: true }).addTo(map);
+
+// Atualiza inputs ao arrastar marcador
+marker.on('dragend', function() {
+    var pos = marker.getLatLng();
+    latInput.value = pos.lat.toFixed(6);
+    lngInput.value = pos.lng.toFixed(6);
+});
@@ -0,0 +1,205 @@
+// Preencher endereço e coordenadas ao selecionar abrigo
+document.getElementById('abrigo').addEventListener('change', function() {
+    const selected = this.selectedOptions[0];
+
+    document.getElementById('logradouro').value = selected.dataset.logradouro || '';
+    document.getElementById('bairro').value = selected.dataset.bairro || '';
+    document.getElementById('cep').value = selected.dataset.cep || '';
+
+    // Atualiza Latitude/Longitude
+    if(selected.dataset.latitude && selected.dataset.longitude) {
+        const lat = parseFloat(selected.dataset.latitude);
+        const lng = parseFloat(selected.dataset.longitude);
+
+        document.getElementById('latitude').value = lat.toFixed(6);
+        document.getElementById('longitude').value = lng.toFixed(6);
+
+        marker.setLatLng([lat, lng]);
+        map.setView([lat, lng], 16);
+    }
+});
+
+// Máscara de telefone simples
+const telefoneInput = document.getElementById('telefone');
+telefoneInput.addEventListener('input', function(e) {
+    let v = this.value.replace(/\D/g, '');
+    if(v.length > 11) v = v.slice(0,11);
+    if(v.length > 6) this.value = `(${v.slice(0,2)}) ${v.slice(2,7)}-${v.slice(7)}`;
+    else if(v.length > 2) this.value = `(${v.slice(0,2)}) ${v.slice(2)}`;
+    else this.value = v ? `(${v}` : '';
+});
+
+// Contador de caracteres
+const descricao = document.getElementById('descricao');
+const contador = document.getElementById('descricao-contador');
+descricao.addEventListener('input', function() {
+    contador.textContent = `${this.value.length} / 1000`;
+});
+
+// ---------------- FILA OFFLINE ----------------
+// Cada envio vai primeiro para o IndexedDB e depois é sincronizado em lotes
+// com /api/atendimentos/lote. O UUID gerado aqui torna o reenvio seguro.
+const form = document.getElementById('novoAtendimentoForm');
+const avisoFila = document.getElementById('fila-offline');
+const LOTE_MAX = parseInt(form.dataset.loteMax, 10) || 100;
+
+function novoUuid() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    // crypto.randomUUID só existe em HTTPS/localhost
+    const b = crypto.getRandomValues(new Uint8Array(16));
+    b[6] = (b[6] & 0x0f) | 0x40;
+    b[8] = (b[8] & 0x3f) | 0x80;
+    const h = Array.from(b, x => x.toString(16).padStart(2, '0')).join('');
+    return `${h.slice(0,8)}-${h.slice(8,12)}-${h.slice(12,16)}-${h.slice(16,20)}-${h.slice(20)}`;
+}
+
+document.getElementById('cliente_uuid').value = novoUuid();
+
+function abrirFila() {
+    return new Promise((resolve, reject) => {
+        const pedido = indexedDB.open('abrigo-amigo', 1);
+        pedido.onupgradeneeded = () => pedido.result.createObjectStore('atendimentos', { keyPath: 'uuid' });
+        pedido.onsuccess = () => resolve(pedido.result);
+        pedido.onerror = () => reject(pedido.error);
+    });
+}
+
+function operacaoFila(modo, acao) {
+    return abrirFila().then(banco => new Promise((resolve, reject) => {
+        const transacao = banco.transaction('atendimentos', modo);
+        const pedido = acao(transacao.objectStore('atendimentos'));
+        transacao.oncomplete = () => resolve(pedido && pedido.result);
+        transacao.onerror = () => reject(transacao.error);
+    }));
+}
+
+const enfileirar = item => operacaoFila('readwrite', store => store.put(item));
+const pendentes = () => operacaoFila('readonly', store => store.getAll());
+const removerDaFila = uuids => operacaoFila('readwrite', store => { uuids.forEach(u => store.delete(u)); });
+
+function mostrarPendentes(total, mensagem) {
+    if (!total && !mensagem) {
+        avisoFila.hidden = true;
+        return;
+    }
+    avisoFila.hidden = false;
+    avisoFila.textContent = mensagem ||
+        `${total} atendimento(s) salvo(s) neste aparelho aguardando conexão para sincronizar.`;
+}
+
+let sincronizando = null;
+
+// Resolve com true se a fila ficou vazia
+function sincronizar() {
+    if (sincronizando) return sincronizando;
+    sincronizando = (async () => {
+        let itens = await pendentes();
+        const invalidos = [];
+        const duplicados = [];
+        while (itens.length && navigator.onLine) {
+            const lote = itens.slice(0, LOTE_MAX);
+            let resposta;
+            try {
+                resposta = await fetch(form.dataset.urlLote, {
+                    method: 'POST',
+                    credentials: 'same-origin',
+                    headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+                    body: JSON.stringify({ atendimentos: lote })
+                });
+            } catch (erro) {
+                break;  // sem rede: tenta de novo no evento "online"
+            }
+            if (resposta.redirected) {
+                mostrarPendentes(itens.length, 'Sessão expirada: entre novamente para sincronizar os atendimentos salvos neste aparelho.');
+                return false;
+            }
+            if (!resposta.ok) break;
+
+            const { resultados } = await resposta.json();
+            resultados.filter(r => r.status === 'invalido').forEach(r => invalidos.push(r));
+            resultados.filter(r => r.duplicado_de).forEach(r => duplicados.push(r));
+            await removerDaFila(resultados.map(r => r.uuid).filter(Boolean));
+            itens = await pendentes();
+        }
+        if (invalidos.length) {
+            alert('Alguns atendimentos salvos offline foram recusados:\n' +
+                  invalidos.map(r => `- ${r.erro}`).join('\n'));
+        }
+        if (duplicados.length) {
+            alert('Atendimento(s) salvo(s), mas parecem duplicados de chamados em aberto do mesmo telefone:\n' +
+                  duplicados.map(r => `- #${r.id} parece o #${r.duplicado_de}`).join('\n') +
+                  '\nConfira e mescle na tela do atendimento.');
+        }
+        mostrarPendentes(itens.length);
+        return itens.length === 0;
+    })().finally(() => { sincronizando = null; });
+    return sincronizando;
+}
+
+form.addEventListener('submit', async function(e) {
+    const requiredFields = ['solicitante', 'telefone', 'abrigo', 'descricao'];
+    let valid = true;
+    requiredFields.forEach(id => {
+        const field = document.getElementById(id);
+        if(!field.value.trim()) valid = false;
+    });
+    if(!valid) {
+        e.preventDefault();
+        alert('Por favor, preencha todos os campos obrigatórios.');
+        return;
+    }
+
+    // Sem IndexedDB (navegação privada antiga etc.) segue o envio normal
+    if (!window.indexedDB) return;
+    e.preventDefault();
+
+    const item = {
+        uuid: document.getElementById('cliente_uuid').value,
+        solicitante: document.getElementById('solicitante').value.trim(),
+        telefone: document.getElementById('telefone').value.trim(),
+        abrigo_id: document.getElementById('abrigo').value,
+        descricao: document.getElementById('descricao').value.trim(),
+        criado_em: new Date().toISOString()
+    };
+
+    try {
+        await enfileirar(item);
+    } catch (erro) {
+        form.submit();
+        return;
+    }
+
+    if (await sincronizar()) {
+        window.location.href = form.dataset.urlLista;
+        return;
+    }
+
+    // Ficou na fila: limpa o formulário para o próximo chamado
+    form.reset();
+    contador.textContent = '0 / 1000';
+    document.getElementById('cliente_uuid').value = novoUuid();
+});
+
+window.addEventListener('online', sincronizar);
+if (window.indexedDB) {
+    sincronizar();
+    setInterval(() => { if (navigator.onLine) sincronizar(); }, 60000);
+}
+
+// Inicializa mapa
+var latInput = document.getElementById('latitude');
+var lngInput = document.getElementById('longitude');
+var lat = parseFloat(latInput.value) || -15.7801;
+var lng = parseFloat(lngInput.value) || -47.9292;
+
+var map = L.map('map').setView([lat, lng], 5);
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', { attribution: '© OpenStreetMap contributors' }).addTo(map);
+
+var marker = L.marker([lat, lng], { draggable: true }).addTo(map);
+
+// Atualiza inputs ao arrastar marcador
+marker.on('dragend', function() {
+    var pos = marker.getLatLng();
+    latInput.value = pos.lat.toFixed(6);
+    lngInput.value = pos.lng.toFixed(6);
+});
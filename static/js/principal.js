@@ -0,0 +1,28 @@
+// ====== SUBMENU ======
+document.querySelectorAll('.submenu-btn').forEach(button => {
+    button.addEventListener('click', () => {
+        const submenu = button.parentElement;
+        submenu.classList.toggle('open');
+    });
+});
+
+// ====== TOAST FLUTUANTE ======
+document.addEventListener("DOMContentLoaded", function() {
+    const container = document.getElementById("toast-container");
+
+    // Mensagens do Flask, gravadas pelo template em #flash-mensagens
+    const flashMessages = JSON.parse(
+        document.getElementById("flash-mensagens").textContent
+    );
+
+    flashMessages.forEach(([category, message]) => {
+        const toast = document.createElement("div");
+        toast.classList.add("toast", category);
+        toast.innerText = message;
+        container.appendChild(toast);
+
+        setTimeout(() => { toast.classList.add("show"); }, 100);
+        setTimeout(() => { toast.classList.remove("show"); }, 4000);
+        setTimeout(() => { toast.remove(); }, 5000);
+    });
+});
@@ -0,0 +1,98 @@
+function toggleAll(source) {
+    document.querySelectorAll('.select-item').forEach(c => c.checked = source.checked);
+}
+
+$(document).ready(function () {
+    var table = $('#tableUsuarios').DataTable({
+        order: [[2, "asc"]], // Nome
+        columnDefs: [
+            { orderable:false, targets:[0,5] }, // checkbox e ações
+            { visible:false, targets:[1] }      // ID escondido
+        ],
+        language: {
+            emptyTable:"Nenhum usuário encontrado",
+            info:"Mostrando _START_ a _END_ de _TOTAL_",
+            lengthMenu:"Mostrar _MENU_",
+            paginate:{ next:"Próximo", previous:"Anterior" }
+        },
+        pageLength: 10,
+        dom:'rt<"bottom"l<"info-wrapper"ip>><"clear">'
+    });
+
+    // Mapeamento fixo das colunas
+    const colMap = { nome: 2, login: 3, perfil: 4 };
+
+    // FILTROS
+    $('.search-container').each(function() {
+        const container = $(this);
+        const input = container.find('.filter-search');
+        const optionsDiv = container.find('.options');
+        const columnName = container.data('column');
+        const colIndex = colMap[columnName];
+        const column = table.column(colIndex);
+        let selecionados = [];
+
+        // Pega valores únicos da coluna no tbody
+        const valores = column.nodes().to$().map(function(){ 
+            return $(this).text().trim(); 
+        }).get().filter((v,i,a) => a.indexOf(v)===i)
+          .sort((a,b) => a.toLowerCase().localeCompare(b.toLowerCase()));
+
+        function renderOptions(lista) {
+            optionsDiv.empty();
+            lista.forEach(v => {
+                const checked = selecionados.includes(v) ? 'checked' : '';
+                optionsDiv.append(`<div class="option"><input type="checkbox" value="${v}" ${checked}> ${v}</div>`);
+            });
+            optionsDiv.show();
+        }
+
+        // Abrir filtro e fechar os outros
+        input.on("click", function(e){
+            e.stopPropagation();
+
+            // Fecha todos os outros filtros
+            $('.search-container').not(container).find('.options').hide();
+
+            // Alterna o filtro atual
+            optionsDiv.is(":visible") ? optionsDiv.hide() : renderOptions(valores);
+        });
+
+        // Filtrar enquanto digita
+        input.on("input", function(){
+            const query = input.val().toLowerCase();
+            renderOptions(valores.filter(v => v.toLowerCase().includes(query)));
+        });
+
+        // Seleção de opções
+        optionsDiv.on("change","input[type=checkbox]", function(){ 
+            const val = $(this).val(); 
+            this.checked ? selecionados.push(val) : selecionados = selecionados.filter(v => v !== val); 
+            input.val(selecionados.join(", ")); 
+            selecionados.length 
+                ? column.search(selecionados.map(v => '^'+$.fn.dataTable.util.escapeRegex(v)+'$').join('|'),true,false).draw() 
+                : column.search('').draw(); 
+        });
+
+        // Clique fora fecha o filtro
+        $(document).on("click", function(e){
+            if(!$(e.target).closest('.search-container').length){
+                $('.options').hide();
+            }
+        });
+
+        // Reset do filtro
+        container.data('reset', () => { 
+            selecionados = []; 
+            input.val(''); 
+            column.search('').draw(); 
+        });
+    });
+
+    // Botão limpar filtros
+    $("#clear-filters").on("click", function(){ 
+        $('.search-container').each(function(){ 
+            $(this).data('reset')(); 
+        }); 
+    });
+});
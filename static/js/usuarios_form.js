@@ -0,0 +1,13 @@
+document.getElementById("toggleSenha").addEventListener("click", function () {
+    const campo = document.getElementById("senha");
+
+    if (campo.type === "password") {
+        campo.type = "text";
+        this.classList.remove("fa-eye");
+        this.classList.add("fa-eye-slash");
+    } else {
+        campo.type = "password";
+        this.classList.remove("fa-eye-slash");
+        this.classList.add("fa-eye");
+    }
+});
@@ -0,0 +1,105 @@
+"""Configuração dos testes.
+
+O app lê a configuração na importação, então o ambiente (SQLite temporário,
+limite de requisições em memória, hash de senha barato) é montado aqui,
+antes do `import app`. Cada teste começa com o banco recriado.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+PASTA_TEMPORARIA = tempfile.mkdtemp(prefix="abrigo-testes-")
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(PASTA_TEMPORARIA, "testes.db")
+os.environ["RATE_LIMIT_BACKEND"] = "memoria"
+os.environ["SESSION_BACKEND"] = "banco"
+os.environ["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+os.environ["MAINTENANCE_IN_PROCESS"] = "0"
+os.environ["OUTBOX_FILE_PATH"] = os.path.join(PASTA_TEMPORARIA, "outbox_eventos.jsonl")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from flask_login import login_user  # noqa: E402
+
+SENHA = "123"
+
+
+@pytest.fixture(scope="session")
+def app():
+    app_module.app.config["TESTING"] = True
+    yield app_module.app
+    shutil.rmtree(PASTA_TEMPORARIA, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def banco(app):
+    """Banco vazio e estado em memória (índice de busca, limites, cache de sessões) zerado."""
+    with app.app_context():
+        app_module.db.drop_all()
+        app_module.db.create_all()
+
+    app_module.indice_busca.__init__()
+    app_module.limitador.armazenamento = app_module.ArmazenamentoMemoria()
+    if app_module.sessoes_servidor is not None:
+        app_module.sessoes_servidor._cache.clear()
+
+    yield
+
+    with app.app_context():
+        app_module.db.session.remove()
+
+
+@pytest.fixture
+def admin(app):
+    """Id de um usuário Admin com a senha SENHA."""
+    with app.app_context():
+        usuario = app_module.Usuario(
+            login="admin",
+            senha=app_module.gerar_hash_senha(SENHA),
+            perfil="Admin",
+            nome="Administrador",
+        )
+        app_module.db.session.add(usuario)
+        app_module.db.session.commit()
+        return usuario.id
+
+
+@pytest.fixture
+def abrigo(app):
+    """Id de um abrigo ativo com 10 vagas."""
+    with app.app_context():
+        novo = app_module.Abrigo(nome="Escola Municipal", status="Ativo", bairro="Centro", capacidade=10)
+        app_module.db.session.add(novo)
+        app_module.db.session.commit()
+        return novo.id
+
+
+@pytest.fixture
+def logado(app, admin):
+    """Contexto de requisição com o admin logado, para chamar as funções do app direto."""
+    with app.test_request_context():
+        login_user(app_module.db.session.get(app_module.Usuario, admin))
+        yield admin
+
+
+@pytest.fixture
+def cliente(app, admin):
+    """Cliente HTTP já autenticado como o admin."""
+    cliente = app.test_client()
+    resposta = cliente.post("/", data={"login": "admin", "senha": SENHA})
+    assert resposta.status_code == 302
+    return cliente
+
+
+@pytest.fixture
+def novo_atendimento(logado, abrigo):
+    """Cria (e grava) um atendimento aberto no abrigo de teste; devolve o id."""
+    def criar(telefone="(61) 99999-0000", descricao="Família desalojada pela enchente", solicitante="Maria"):
+        atendimento = app_module.criar_atendimento(solicitante, telefone, abrigo, descricao)
+        app_module.db.session.commit()
+        return atendimento.id
+    return criar
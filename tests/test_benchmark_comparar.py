@@ -0,0 +1,59 @@
+from benchmark.executar import comparar
+
+
+def _rota(p50_ms=10.0, sql=4.0, memoria_kb=100.0):
+    return {"p50_ms": p50_ms, "p95_ms": p50_ms, "p99_ms": p50_ms,
+            "sql_por_requisicao": sql, "pico_memoria_kb": memoria_kb}
+
+
+def _resultado(**rotas):
+    return {"rotas": rotas}
+
+
+def test_dentro_da_folga_nao_e_regressao():
+    baseline = _resultado(principal=_rota())
+    atual = _resultado(principal=_rota(p50_ms=14.9, sql=4.0, memoria_kb=129.0))
+
+    assert comparar(atual, baseline) == []
+
+
+def test_melhora_nao_e_regressao():
+    baseline = _resultado(principal=_rota())
+    atual = _resultado(principal=_rota(p50_ms=2.0, sql=1.0, memoria_kb=10.0))
+
+    assert comparar(atual, baseline) == []
+
+
+def test_qualquer_consulta_a_mais_e_regressao():
+    baseline = _resultado(principal=_rota(sql=4.0))
+    atual = _resultado(principal=_rota(sql=5.0))
+
+    assert comparar(atual, baseline) == ["principal: SQL por requisição 4.0 -> 5.0"]
+
+
+def test_latencia_e_memoria_acima_da_folga():
+    baseline = _resultado(principal=_rota(), busca=_rota())
+    atual = _resultado(principal=_rota(p50_ms=15.1), busca=_rota(memoria_kb=131.0))
+
+    assert comparar(atual, baseline) == [
+        "principal: p50 10.0 ms -> 15.1 ms",
+        "busca: pico de memória 100.0 KB -> 131.0 KB",
+    ]
+
+
+def test_folga_configuravel():
+    baseline = _resultado(principal=_rota())
+    atual = _resultado(principal=_rota(p50_ms=12.0, memoria_kb=105.0))
+
+    assert comparar(atual, baseline, tolerancia_latencia=0.1, tolerancia_memoria=0.01) == [
+        "principal: p50 10.0 ms -> 12.0 ms",
+        "principal: pico de memória 100.0 KB -> 105.0 KB",
+    ]
+
+
+def test_rota_sem_baseline_e_ignorada():
+    baseline = _resultado(principal=_rota())
+    atual = _resultado(principal=_rota(), logs_pdf=_rota(sql=50.0))
+
+    assert comparar(atual, baseline) == []
+    assert comparar(atual, {}) == []
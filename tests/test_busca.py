@@ -0,0 +1,86 @@
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import app as app_module
+from app import Atendimento, db
+
+
+def _buscar(cliente, termo, **parametros):
+    resposta = cliente.get("/api/atendimentos/search", query_string={"q": termo, **parametros})
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+
+def test_tokenizar_ignora_acento_plural_e_palavras_vazias():
+    assert app_module.tokenizar("Famílias desalojadas da enchente") == \
+        app_module.tokenizar("familia desalojada enchente")
+
+
+def test_busca_ranqueia_por_relevancia(cliente, novo_atendimento):
+    so_descricao = novo_atendimento(descricao="Casa alagada pela enchente")
+    repetido = novo_atendimento(telefone="(61) 98888-1111", descricao="Enchente levou tudo, enchente de novo")
+    novo_atendimento(telefone="(61) 97777-2222", descricao="Idosa precisa de remédio")
+
+    corpo = _buscar(cliente, "enchentes")
+
+    assert corpo["total"] == 2
+    assert [r["id"] for r in corpo["resultados"]] == [repetido, so_descricao]
+    assert corpo["resultados"][0]["abrigo"] == "Escola Municipal"
+
+
+def test_telefone_por_prefixo_vem_primeiro(cliente, novo_atendimento):
+    novo_atendimento(descricao="Telefone 6198888 anotado errado")
+    pelo_numero = novo_atendimento(telefone="(61) 98888-1111", descricao="Sem energia")
+
+    corpo = _buscar(cliente, "61 98888")
+
+    assert corpo["resultados"][0]["id"] == pelo_numero
+    assert corpo["resultados"][0]["rank"] >= 10
+
+
+def test_paginacao_e_termo_obrigatorio(cliente, novo_atendimento):
+    ids = [novo_atendimento(telefone=f"(61) 9{n}000-0000") for n in range(5)]
+
+    primeira = _buscar(cliente, "desalojada", per_page=2)
+    terceira = _buscar(cliente, "desalojada", per_page=2, page=3)
+
+    assert primeira["total"] == terceira["total"] == 5
+    assert [r["id"] for r in primeira["resultados"]] == ids[:-3:-1]
+    assert [r["id"] for r in terceira["resultados"]] == ids[:1]
+    assert cliente.get("/api/atendimentos/search?q=").status_code == 400
+
+
+def test_indice_acompanha_commit_e_ignora_rollback(cliente, novo_atendimento):
+    atendimento_id = novo_atendimento()
+    assert _buscar(cliente, "desalojada")["total"] == 1
+
+    atendimento = db.session.get(Atendimento, atendimento_id)
+    atendimento.descricao = "Criança com febre"
+    db.session.commit()
+    assert _buscar(cliente, "desalojada")["total"] == 0
+    assert [r["id"] for r in _buscar(cliente, "febre")["resultados"]] == [atendimento_id]
+
+    atendimento.descricao = "Rua interditada"
+    db.session.flush()
+    db.session.rollback()
+    assert _buscar(cliente, "interditada")["total"] == 0
+    assert _buscar(cliente, "febre")["total"] == 1
+
+
+def test_coluna_de_busca_so_existe_no_postgresql(app):
+    tabela = Atendimento.__table__
+
+    with app.app_context():
+        colunas = {coluna["name"] for coluna in inspect(db.engine).get_columns("atendimentos")}
+        indices = {indice["name"] for indice in inspect(db.engine).get_indexes("atendimentos")}
+    assert "busca_vetor" not in colunas
+    assert "ix_atendimentos_busca_vetor" not in indices
+    assert "ix_atendimentos_telefone_normalizado" in indices
+
+    # O create_all no PostgreSQL gera o mesmo esquema da migração
+    dialeto = postgresql.dialect()
+    assert "busca_vetor TSVECTOR GENERATED ALWAYS AS" in str(CreateTable(tabela).compile(dialect=dialeto))
+    indices = {indice.name: str(CreateIndex(indice).compile(dialect=dialeto)) for indice in tabela.indexes}
+    assert indices["ix_atendimentos_busca_vetor"].endswith("USING gin (busca_vetor)")
+    assert indices["ix_atendimentos_telefone_normalizado"].endswith("(telefone_normalizado varchar_pattern_ops)")
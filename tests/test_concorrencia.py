@@ -0,0 +1,105 @@
+import app as app_module
+from app import Atendimento, StatusAtendimento, db
+
+from conftest import SENHA
+
+
+def test_finalizar_atendimento_ja_cancelado_responde_transicao_invalida(app, cliente, novo_atendimento):
+    atendimento_id = novo_atendimento()
+
+    resposta = cliente.post(f"/atendimento/cancelar/{atendimento_id}/ajax",
+                            json={"justificativa": "Trote", "senha": SENHA})
+    assert resposta.get_json() == {"success": True}
+
+    # Segunda aba, aberta antes do cancelamento
+    resposta = cliente.post(f"/finalizar_atendimento/{atendimento_id}", json={"conclusao": "Acolhida"})
+    assert resposta.status_code == 409
+    assert resposta.get_json() == {
+        "success": False,
+        "error": app_module.MENSAGEM_TRANSICAO_INVALIDA.format(status=StatusAtendimento.CANCELADO),
+    }
+
+    with app.app_context():
+        atendimento = db.session.get(Atendimento, atendimento_id)
+        assert atendimento.status == StatusAtendimento.CANCELADO
+        assert atendimento.conclusao is None
+
+
+def _alterar_versao_antes_do_update(monkeypatch, atendimento_id):
+    """Outro processo altera a linha entre a leitura e o UPDATE condicional."""
+    tabela = Atendimento.__table__
+    executar_original = db.session.execute
+    alterou = []
+
+    def executar(comando, *args, **kwargs):
+        if not alterou and getattr(comando, "is_update", False) and comando.table is tabela:
+            alterou.append(True)
+            with db.engine.begin() as outra_conexao:
+                outra_conexao.execute(
+                    tabela.update().where(tabela.c.id == atendimento_id).values(versao=tabela.c.versao + 1)
+                )
+        return executar_original(comando, *args, **kwargs)
+
+    monkeypatch.setattr(db.session, "execute", executar, raising=False)
+
+
+def test_transicao_nao_aplica_sobre_versao_alterada(app, logado, novo_atendimento, monkeypatch):
+    atendimento_id = novo_atendimento()
+
+    with monkeypatch.context() as patch:
+        _alterar_versao_antes_do_update(patch, atendimento_id)
+        assert app_module.executar_transicao(atendimento_id, "iniciar") is None
+        assert app_module.motivo_falha_transicao(atendimento_id, "iniciar") == app_module.MENSAGEM_CONFLITO
+    db.session.rollback()
+
+    assert db.session.get(Atendimento, atendimento_id).status == StatusAtendimento.ABERTO
+
+
+def _mensagens(cliente):
+    with cliente.session_transaction() as sessao:
+        return [mensagem for _, mensagem in sessao.get("_flashes", [])]
+
+
+def test_whatsapp_em_atendimento_finalizado_avisa_transicao_invalida(app, cliente, novo_atendimento):
+    atendimento_id = novo_atendimento()
+    assert cliente.post(f"/finalizar_atendimento/{atendimento_id}",
+                        json={"conclusao": "Acolhida", "senha": SENHA}).get_json() == {"success": True}
+
+    resposta = cliente.get(f"/atendimento/whatsapp/{atendimento_id}")
+
+    assert resposta.status_code == 302
+    assert resposta.headers["Location"].endswith("/atendimentos")
+    assert _mensagens(cliente) == [
+        app_module.MENSAGEM_TRANSICAO_INVALIDA.format(status=StatusAtendimento.ATENDIDO)
+    ]
+
+
+def test_whatsapp_com_versao_alterada_avisa_conflito(app, cliente, novo_atendimento, monkeypatch):
+    atendimento_id = novo_atendimento()
+    _alterar_versao_antes_do_update(monkeypatch, atendimento_id)
+
+    resposta = cliente.get(f"/atendimento/whatsapp/{atendimento_id}")
+
+    assert resposta.headers["Location"].endswith("/atendimentos")
+    assert _mensagens(cliente) == [app_module.MENSAGEM_CONFLITO]
+
+
+def test_edicao_com_versao_antiga_nao_grava(app, cliente, novo_atendimento, abrigo):
+    atendimento_id = novo_atendimento()
+    with app.app_context():
+        versao_formulario = db.session.get(Atendimento, atendimento_id).versao
+
+    formulario = {"solicitante": "João", "telefone": "(61) 98888-0000", "abrigo": abrigo,
+                  "descricao": "Primeira edição", "versao": versao_formulario}
+    assert cliente.post(f"/atendimento/editar/{atendimento_id}", data=formulario).status_code == 302
+
+    # Mesmo formulário, enviado de novo com a versão de antes da primeira edição
+    resposta = cliente.post(f"/atendimento/editar/{atendimento_id}",
+                            data={**formulario, "descricao": "Edição atrasada"})
+    assert resposta.status_code == 302
+    assert resposta.headers["Location"].endswith(f"/atendimento/editar/{atendimento_id}")
+
+    with app.app_context():
+        atendimento = db.session.get(Atendimento, atendimento_id)
+        assert atendimento.descricao == "Primeira edição"
+        assert atendimento.versao == versao_formulario + 1
@@ -0,0 +1,118 @@
+import pytest
+
+import app as app_module
+
+from conftest import SENHA
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def armazenamento(request, tmp_path):
+    if request.param == "sqlite":
+        return app_module.ArmazenamentoSQLite(str(tmp_path / "rate_limit.sqlite3"))
+    return app_module.ArmazenamentoMemoria()
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """time.time() controlado pelo teste: relogio[0] é o instante atual."""
+    instante = [600.0]
+    monkeypatch.setattr(app_module.time, "time", lambda: instante[0])
+    return instante
+
+
+def test_bloqueia_acima_do_limite_na_janela(armazenamento, relogio):
+    limitador = app_module.LimitadorTaxa(armazenamento, {"teste": "3/60"})
+
+    assert [limitador.consumir("teste", "ip") for _ in range(3)] == [None, None, None]
+    assert limitador.consumir("teste", "ip") == 60
+
+    relogio[0] += 45
+    assert limitador.consumir("teste", "ip") == 15
+
+    # Outro identificador tem a sua própria contagem
+    assert limitador.consumir("teste", "outro-ip") is None
+
+
+def test_janela_anterior_pesa_pelo_tempo_que_ainda_se_sobrepoe(armazenamento, relogio):
+    limitador = app_module.LimitadorTaxa(armazenamento, {"teste": "3/60"})
+    for _ in range(3):
+        assert limitador.consumir("teste", "ip") is None
+
+    # Meio da janela seguinte: as 3 da anterior valem 1,5
+    relogio[0] = 690.0
+    assert limitador.consumir("teste", "ip") is None
+    assert limitador.consumir("teste", "ip") is not None
+
+    # Duas janelas depois as 3 primeiras já não contam
+    relogio[0] = 780.0
+    assert limitador.consumir("teste", "ip") is None
+    assert limitador.consumir("teste", "ip") is None
+
+
+def test_resetar_libera_o_identificador(armazenamento, relogio):
+    limitador = app_module.LimitadorTaxa(armazenamento, {"teste": "2/60"})
+    limitador.consumir("teste", "admin")
+    limitador.consumir("teste", "admin")
+    assert limitador.consumir("teste", "admin") is not None
+
+    limitador.resetar("teste", "admin")
+
+    assert limitador.consumir("teste", "admin") is None
+
+
+def test_confirmacao_de_senha_responde_429_acima_do_limite(cliente):
+    limite, _ = app_module.limitador.regras["confirmacao_senha"]
+
+    for _ in range(limite):
+        resposta = cliente.post("/finalizar_atendimento/999", json={"conclusao": "ok", "senha": "errada"})
+        assert resposta.status_code == 200
+        assert resposta.get_json()["error"] == "Senha incorreta."
+
+    resposta = cliente.post("/finalizar_atendimento/999", json={"conclusao": "ok", "senha": "errada"})
+    assert resposta.status_code == 429
+    assert int(resposta.headers["Retry-After"]) >= 1
+
+
+def test_confirmacao_recente_nao_consome_o_limite(cliente):
+    limite, _ = app_module.limitador.regras["confirmacao_senha"]
+
+    # A primeira ação confirma a senha; as seguintes não verificam o hash
+    resposta = cliente.post("/finalizar_atendimento/999", json={"conclusao": "ok", "senha": SENHA})
+    assert resposta.get_json()["error"] == "Atendimento não encontrado."
+
+    for _ in range(limite + 5):
+        resposta = cliente.post("/finalizar_atendimento/999", json={"conclusao": "ok", "senha": ""})
+        assert resposta.status_code == 200
+        assert resposta.get_json()["error"] == "Atendimento não encontrado."
+
+
+def test_resetar_nao_alcanca_identificadores_com_o_mesmo_prefixo(armazenamento, relogio):
+    limitador = app_module.LimitadorTaxa(armazenamento, {"teste": "1/60"})
+    for identificador in ("::1", "::1:2", "joao", "joao:60"):
+        assert limitador.consumir("teste", identificador) is None
+
+    limitador.resetar("teste", "::1")
+    limitador.resetar("teste", "joao")
+
+    assert limitador.consumir("teste", "::1") is None
+    assert limitador.consumir("teste", "joao") is None
+    assert limitador.consumir("teste", "::1:2") is not None
+    assert limitador.consumir("teste", "joao:60") is not None
+
+
+def test_janelas_expiradas_sao_removidas_com_o_tempo(armazenamento, relogio):
+    limitador = app_module.LimitadorTaxa(armazenamento, {"teste": "5/60"})
+    for n in range(10):
+        limitador.consumir("teste", f"antigo-{n}")
+
+    # Janelas depois, com índices que não são múltiplos de nada em especial:
+    # a limpeza vem do número de operações, não da janela em que caem
+    relogio[0] += 3 * 60 + 7
+    for n in range(1000):
+        assert limitador.consumir("teste", f"ip-{n}") is None
+
+    if isinstance(armazenamento, app_module.ArmazenamentoSQLite):
+        chaves = [linha[0] for linha in armazenamento._conexao().execute("SELECT chave FROM rate_limit")]
+    else:
+        chaves = [chave for chave, _ in armazenamento.contadores]
+    assert not [chave for chave in chaves if "antigo" in chave]
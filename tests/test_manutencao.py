@@ -0,0 +1,102 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import app as app_module
+from app import TarefaManutencao, db
+
+TAREFA = "tarefa_de_teste"
+
+
+@pytest.fixture
+def contexto(app):
+    with app.app_context():
+        yield
+
+
+def _linha(nome=TAREFA):
+    return db.session.get(TarefaManutencao, nome, populate_existing=True)
+
+
+def _alterar(nome=TAREFA, **valores):
+    tabela = TarefaManutencao.__table__
+    db.session.execute(tabela.update().where(tabela.c.nome == nome).values(**valores))
+    db.session.commit()
+
+
+def _registrar(monkeypatch, funcao):
+    monkeypatch.setitem(app_module.TAREFAS_MANUTENCAO, TAREFA,
+                        SimpleNamespace(nome=TAREFA, funcao=funcao, por_processo=False))
+
+
+def test_trava_so_vale_para_um_processo_ate_expirar(contexto):
+    assert app_module._travar_tarefa(TAREFA, forcar=True)
+    assert not app_module._travar_tarefa(TAREFA, forcar=True)
+    assert _linha().travada_por == app_module._identidade_processo()
+
+    # O processo que tinha a trava morreu: depois da validade outro assume
+    _alterar(travada_ate=app_module.agora() - timedelta(seconds=1))
+    assert app_module._travar_tarefa(TAREFA, forcar=True)
+
+
+def test_forcar_ignora_o_horario_mas_nao_a_trava(contexto):
+    assert app_module._travar_tarefa(TAREFA)
+    _alterar(travada_por=None, travada_ate=None, proxima_execucao=app_module.agora() + timedelta(hours=1))
+
+    assert not app_module._travar_tarefa(TAREFA)
+    assert app_module._travar_tarefa(TAREFA, forcar=True)
+    assert not app_module._travar_tarefa(TAREFA, forcar=True)
+
+
+def test_renovacao_estende_a_trava_enquanto_roda(app, contexto, monkeypatch):
+    monkeypatch.setitem(app.config, "MAINTENANCE_LOCK_TTL", 0.6)
+    assert app_module._travar_tarefa(TAREFA, forcar=True)
+    travada_ate = _linha().travada_ate
+
+    parar = app_module._manter_trava(TAREFA)
+    try:
+        time.sleep(0.9)
+    finally:
+        parar.set()
+
+    assert _linha().travada_ate > travada_ate
+    assert not app_module._travar_tarefa(TAREFA, forcar=True)
+
+
+def test_executar_tarefa_grava_metricas_e_solta_a_trava(app, contexto, monkeypatch):
+    _registrar(monkeypatch, lambda: "3 itens")
+
+    assert app_module.executar_tarefa(TAREFA, forcar=True)
+
+    tarefa = _linha()
+    assert tarefa.execucoes == 1
+    assert tarefa.falhas == 0
+    assert tarefa.ultimo_resultado == "3 itens"
+    assert tarefa.travada_por is None and tarefa.travada_ate is None
+    assert tarefa.proxima_execucao is not None
+
+
+def test_falha_conta_e_nao_segura_a_trava(contexto, monkeypatch):
+    def falhar():
+        raise RuntimeError("banco fora do ar")
+    _registrar(monkeypatch, falhar)
+
+    assert app_module.executar_tarefa(TAREFA, forcar=True)
+
+    tarefa = _linha()
+    assert (tarefa.execucoes, tarefa.falhas) == (1, 1)
+    assert tarefa.ultimo_erro == "RuntimeError: banco fora do ar"
+    assert tarefa.travada_por is None
+
+
+def test_nao_roda_com_a_trava_em_outro_processo(contexto, monkeypatch):
+    chamadas = []
+    _registrar(monkeypatch, lambda: chamadas.append(1))
+    assert app_module._travar_tarefa(TAREFA, forcar=True)
+    _alterar(travada_por="outro-servidor:123", travada_ate=app_module.agora() + timedelta(minutes=5))
+
+    assert not app_module.executar_tarefa(TAREFA, forcar=True)
+    assert chamadas == []
+    assert _linha().execucoes == 0
@@ -0,0 +1,82 @@
+import app as app_module
+from app import (Abrigo, Atendimento, HistoricoStatusAtendimento, LogSistema, RelatorioAtendimentoDiario,
+                 RelatorioResolucaoOperador, StatusAtendimento, db)
+
+
+def _historico(atendimento_id):
+    return [
+        (h.status_anterior, h.status_novo)
+        for h in HistoricoStatusAtendimento.query.filter_by(atendimento_id=atendimento_id)
+        .order_by(HistoricoStatusAtendimento.id)
+    ]
+
+
+def _relatorios():
+    diario = sorted(
+        (r.dia, r.abrigo_id, r.total, r.abertos, r.em_atendimento, r.atendidos, r.cancelados)
+        for r in RelatorioAtendimentoDiario.query
+    )
+    resolucao = sorted(
+        (r.dia, r.operador_id, r.atendidos, r.cancelados, r.segundos_resolucao)
+        for r in RelatorioResolucaoOperador.query
+    )
+    return diario, resolucao
+
+
+def test_mesclar_duplicado_no_principal(logado, novo_atendimento, abrigo):
+    principal_id = novo_atendimento()
+    duplicado_id = novo_atendimento(telefone="(61) 98888-1111", descricao="Criança com febre no abrigo")
+    assert db.session.get(Abrigo, abrigo).ocupacao == 2
+
+    principal = app_module.mesclar_atendimentos(principal_id, duplicado_id)
+    db.session.commit()
+
+    assert principal.id == principal_id
+    assert f"[Atendimento #{duplicado_id}] Criança com febre no abrigo" in principal.descricao
+
+    duplicado = db.session.get(Atendimento, duplicado_id, populate_existing=True)
+    assert duplicado.status == StatusAtendimento.MESCLADO
+    assert duplicado.duplicado_de_id == principal_id
+    assert duplicado.finalizado_em is not None
+
+    # Cada um mantém o próprio histórico
+    assert _historico(principal_id) == [(None, StatusAtendimento.ABERTO)]
+    assert _historico(duplicado_id) == [
+        (None, StatusAtendimento.ABERTO),
+        (StatusAtendimento.ABERTO, StatusAtendimento.MESCLADO),
+    ]
+
+    logs = LogSistema.query.filter_by(acao="Mesclar Atendimentos").order_by(LogSistema.entidade_id).all()
+    assert [log.entidade_id for log in logs] == sorted([principal_id, duplicado_id])
+
+    assert db.session.get(Abrigo, abrigo, populate_existing=True).ocupacao == 1
+
+
+def test_relatorios_nao_contam_mesclado_como_cancelado(logado, novo_atendimento):
+    principal_id = novo_atendimento()
+    duplicado_id = novo_atendimento(telefone="(61) 98888-1111")
+    app_module.mesclar_atendimentos(principal_id, duplicado_id)
+    db.session.commit()
+
+    incrementais = _relatorios()
+    app_module.reconstruir_relatorios()
+    db.session.commit()
+
+    assert incrementais[0] and _relatorios() == incrementais
+    assert all(linha[6] == 0 for linha in incrementais[0])
+    assert all(linha[3] == 0 for linha in incrementais[1])
+
+
+def test_nao_mescla_atendimento_encerrado(logado, novo_atendimento):
+    principal_id = novo_atendimento()
+    duplicado_id = novo_atendimento(telefone="(61) 98888-1111")
+    app_module.executar_transicao(duplicado_id, "cancelar", justificativa_cancelamento="Trote")
+    db.session.commit()
+
+    assert app_module.mesclar_atendimentos(principal_id, duplicado_id) is None
+    assert app_module.mesclar_atendimentos(duplicado_id, principal_id) is None
+    assert app_module.mesclar_atendimentos(principal_id, principal_id) is None
+    db.session.rollback()
+
+    assert db.session.get(Atendimento, principal_id).status == StatusAtendimento.ABERTO
+    assert LogSistema.query.filter_by(acao="Mesclar Atendimentos").count() == 0
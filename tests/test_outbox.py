@@ -0,0 +1,50 @@
+import app as app_module
+from app import Abrigo, EventoOutbox, db
+
+
+def _ocupacoes(abrigo_id):
+    return [
+        evento.dados["ocupacao"]
+        for evento in EventoOutbox.query.filter_by(tipo="abrigo.ocupacao_alterada", entidade_id=abrigo_id)
+        .order_by(EventoOutbox.id)
+    ]
+
+
+def test_abrir_e_encerrar_atendimento_grava_a_ocupacao(logado, novo_atendimento, abrigo):
+    atendimento_id = novo_atendimento()
+    assert _ocupacoes(abrigo) == [1]
+
+    app_module.executar_transicao(atendimento_id, "cancelar", justificativa_cancelamento="Trote")
+    db.session.commit()
+
+    assert _ocupacoes(abrigo) == [1, 0]
+    evento = EventoOutbox.query.filter_by(tipo="abrigo.ocupacao_alterada").order_by(EventoOutbox.id.desc()).first()
+    assert evento.dados == {"id": abrigo, "ocupacao": 0, "capacidade": 10}
+
+
+def test_evento_de_ocupacao_sai_junto_com_o_rollback(logado, abrigo):
+    assert app_module.ocupar_vaga(abrigo)
+    db.session.rollback()
+
+    assert _ocupacoes(abrigo) == []
+    assert db.session.get(Abrigo, abrigo).ocupacao == 0
+
+
+def test_recalcular_ocupacao_so_registra_o_que_mudou(logado, novo_atendimento, abrigo):
+    novo_atendimento()
+    outro = Abrigo(nome="Ginásio", status="Ativo", capacidade=5)
+    db.session.add(outro)
+    db.session.commit()
+    db.session.execute(Abrigo.__table__.update().where(Abrigo.id == abrigo).values(ocupacao=4))
+    db.session.commit()
+
+    app_module.recalcular_ocupacao()
+
+    assert db.session.get(Abrigo, abrigo, populate_existing=True).ocupacao == 1
+    assert _ocupacoes(abrigo) == [1, 1]
+    assert _ocupacoes(outro.id) == []
+
+
+def test_dados_do_abrigo_incluem_a_ocupacao(logado, novo_atendimento, abrigo):
+    novo_atendimento()
+    assert app_module.dados_abrigo(db.session.get(Abrigo, abrigo))["ocupacao"] == 1
@@ -0,0 +1,115 @@
+from io import BytesIO
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+
+import app as app_module
+import relatorios_pdf
+from app import Atendimento, db
+
+
+def _pdf(caminho, larguras, titulo=None):
+    escritor = PdfWriter()
+    for largura in larguras:
+        escritor.add_blank_page(width=largura, height=100)
+    if titulo:
+        escritor.add_outline_item(titulo, 0)
+    escritor.write(caminho)
+    return str(caminho)
+
+
+def _larguras(origem):
+    return [int(pagina.mediabox.width) for pagina in PdfReader(origem).pages]
+
+
+def _html_para_pdf(html, caminho, options=None):
+    # No lugar do wkhtmltopdf: "200,201" vira um PDF com páginas dessas larguras
+    _pdf(caminho, [int(largura) for largura in html.split(",")])
+
+
+@pytest.fixture
+def pdfkit_falso(monkeypatch):
+    """Troca o wkhtmltopdf por _html_para_pdf, inclusive nos processos do pool (criados depois, por fork)."""
+    monkeypatch.setattr(relatorios_pdf.pdfkit, "from_string", _html_para_pdf)
+    monkeypatch.setattr(relatorios_pdf, "_pool", None)
+    yield
+    if relatorios_pdf._pool is not None:
+        relatorios_pdf._pool.shutdown()
+
+
+def test_juntar_pdfs_mantem_paginas_ordem_e_indice(tmp_path):
+    partes = [
+        _pdf(tmp_path / "a.pdf", [100, 101], titulo="Parte A"),
+        _pdf(tmp_path / "b.pdf", [200, 201, 202], titulo="Parte B"),
+        _pdf(tmp_path / "c.pdf", [300]),
+    ]
+
+    relatorios_pdf.juntar_pdfs(partes, tmp_path / "final.pdf")
+
+    leitor = PdfReader(tmp_path / "final.pdf")
+    assert _larguras(tmp_path / "final.pdf") == [100, 101, 200, 201, 202, 300]
+    assert [item.title for item in leitor.outline] == ["Parte A", "Parte B"]
+    assert [leitor.get_destination_page_number(item) for item in leitor.outline] == [0, 2]
+
+
+def test_gerar_em_partes_no_pool(tmp_path, pdfkit_falso, monkeypatch):
+    monkeypatch.setattr(relatorios_pdf.tempfile, "tempdir", str(tmp_path))
+    destino = tmp_path / "relatorio.pdf"
+
+    partes = relatorios_pdf.gerar_pdf_em_partes(
+        (html for html in ["100,101", "200", "300,301,302", "400"]), str(destino), processos=2
+    )
+
+    assert partes == 4
+    assert _larguras(destino) == [100, 101, 200, 300, 301, 302, 400]
+    # As partes temporárias são apagadas
+    assert [p.name for p in tmp_path.iterdir()] == ["relatorio.pdf"]
+
+
+def test_uma_parte_so_nao_usa_o_pool(tmp_path, pdfkit_falso):
+    destino = tmp_path / "relatorio.pdf"
+
+    assert relatorios_pdf.gerar_pdf_em_partes(["100,101"], str(destino)) == 1
+    assert _larguras(destino) == [100, 101]
+    assert relatorios_pdf._pool is None
+
+
+def test_sem_partes_nao_gera_arquivo(tmp_path, pdfkit_falso):
+    destino = tmp_path / "relatorio.pdf"
+
+    assert relatorios_pdf.gerar_pdf_em_partes(iter([]), str(destino)) == 0
+    assert not destino.exists()
+
+
+def test_paginar_por_chave(logado, novo_atendimento):
+    ids = [novo_atendimento(telefone=f"(61) 9{n}000-0000") for n in range(5)]
+
+    crescente = app_module.paginar(Atendimento.query, Atendimento.id, 2)
+    assert [[a.id for a in pagina] for pagina in crescente] == [ids[0:2], ids[2:4], ids[4:]]
+
+    decrescente = list(app_module.paginar(Atendimento.query, Atendimento.id, 5, decrescente=True))
+    assert [[a.id for a in pagina] for pagina in decrescente] == [ids[::-1]]
+    # Página entregue sai da sessão
+    assert all(atendimento not in db.session for atendimento in decrescente[0])
+
+
+def test_exportar_atendimentos_em_partes(app, cliente, novo_atendimento, pdfkit_falso, monkeypatch):
+    monkeypatch.setitem(app.config, "PDF_CHUNK_SIZE", 2)
+    monkeypatch.setattr(app_module, "render_template",
+                        lambda modelo, atendimentos: ",".join(str(100 + a.id) for a in atendimentos))
+    for n in range(5):
+        novo_atendimento(telefone=f"(61) 9{n}000-0000")
+
+    resposta = cliente.get("/atendimentos/relatorio/pdf")
+
+    assert resposta.status_code == 200
+    assert resposta.mimetype == "application/pdf"
+    assert int(resposta.headers["Content-Length"]) == len(resposta.data)
+    assert _larguras(BytesIO(resposta.data)) == [101, 102, 103, 104, 105]
+
+
+def test_exportar_sem_atendimentos_volta_para_a_lista(cliente, pdfkit_falso):
+    resposta = cliente.get("/atendimentos/relatorio/pdf")
+
+    assert resposta.status_code == 302
+    assert resposta.headers["Location"].endswith("/atendimentos")
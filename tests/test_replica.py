@@ -0,0 +1,113 @@
+import pytest
+import sqlalchemy
+from flask import g
+from flask_login import login_user
+
+import app as app_module
+from app import Abrigo, Atendimento, Usuario, db
+
+from conftest import SENHA
+
+
+@pytest.fixture
+def replica(app, tmp_path, monkeypatch):
+    """Segundo SQLite no bind "replica", com o esquema e sem dados (atrasado em relação ao principal)."""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    motor = sqlalchemy.create_engine(url)
+    db.metadata.create_all(motor)
+    with app.app_context():
+        monkeypatch.setitem(db.engines, "replica", motor)
+    monkeypatch.setitem(app.config, "SQLALCHEMY_BINDS", {"replica": url})
+    yield motor
+    motor.dispose()
+
+
+def _criar_atendimento(app, admin, abrigo):
+    # Contexto próprio: com o `logado` aberto, o cliente reaproveitaria o
+    # mesmo contexto da aplicação (e o mesmo `g`) em todas as requisições
+    with app.test_request_context():
+        login_user(db.session.get(Usuario, admin))
+        atendimento = app_module.criar_atendimento("Maria", "(61) 99999-0000", abrigo, "Família desalojada")
+        db.session.commit()
+        return atendimento.id
+
+
+def _nao_encontrados(cliente, atendimento_id):
+    resposta = cliente.get(f"/api/atendimentos/whatsapp?ids={atendimento_id}")
+    assert resposta.status_code == 200
+    return resposta.get_json()["nao_encontrados"]
+
+
+def test_get_bind_so_le_da_replica_nas_rotas_marcadas(app, replica):
+    with app.app_context():
+        assert db.session.get_bind() is db.engine
+
+    with app.test_request_context():
+        assert db.session.get_bind() is db.engine
+
+        g.usar_replica = True
+        assert db.session.get_bind() is replica
+        assert db.session.get_bind(clause=Atendimento.__table__.update()) is db.engine
+        assert db.session.get_bind(clause=Atendimento.__table__.insert()) is db.engine
+
+        sessao = db.session()
+        sessao._flushing = True
+        try:
+            assert sessao.get_bind() is db.engine
+        finally:
+            sessao._flushing = False
+
+
+def test_gravacao_em_rota_de_leitura_vai_para_o_principal(app, replica):
+    with app.test_request_context():
+        g.usar_replica = True
+        db.session.add(Abrigo(nome="Ginásio", status="Ativo"))
+        db.session.commit()
+        assert g.houve_escrita
+
+    with app.app_context():
+        assert Abrigo.query.filter_by(nome="Ginásio").count() == 1
+    with replica.connect() as conexao:
+        assert conexao.execute(sqlalchemy.select(sqlalchemy.func.count()).select_from(Abrigo.__table__)).scalar() == 0
+
+
+def test_leitura_logo_apos_escrita_fica_no_principal(app, replica, cliente, admin, abrigo):
+    atendimento_id = _criar_atendimento(app, admin, abrigo)
+    # O próprio login grava (log de acesso); começa fora da janela
+    with cliente.session_transaction() as sessao:
+        sessao["escrita_ate"] = 0
+
+    # Sem escrita recente a rota lê da réplica, que ainda não tem o chamado
+    assert _nao_encontrados(cliente, atendimento_id) == [atendimento_id]
+
+    resposta = cliente.post(f"/atendimento/cancelar/{atendimento_id}/ajax",
+                            json={"justificativa": "Trote", "senha": SENHA})
+    assert resposta.get_json() == {"success": True}
+    with cliente.session_transaction() as sessao:
+        assert sessao["escrita_ate"] > 0
+
+    # Dentro de REPLICA_STICKY_SECONDS o próprio usuário lê do principal
+    assert _nao_encontrados(cliente, atendimento_id) == []
+
+    with cliente.session_transaction() as sessao:
+        sessao["escrita_ate"] -= app.config["REPLICA_STICKY_SECONDS"] + 1
+    assert _nao_encontrados(cliente, atendimento_id) == [atendimento_id]
+
+
+def test_sem_replica_nao_marca_escrita(app, cliente, admin, abrigo):
+    atendimento_id = _criar_atendimento(app, admin, abrigo)
+
+    cliente.post(f"/atendimento/cancelar/{atendimento_id}/ajax", json={"justificativa": "Trote", "senha": SENHA})
+
+    assert _nao_encontrados(cliente, atendimento_id) == []
+    with cliente.session_transaction() as sessao:
+        assert "escrita_ate" not in sessao
+
+
+def test_pdf_do_atendimento_exige_login(app, admin, abrigo):
+    atendimento_id = _criar_atendimento(app, admin, abrigo)
+
+    resposta = app.test_client().get(f"/atendimento/{atendimento_id}/pdf")
+
+    assert resposta.status_code == 302
+    assert f"/atendimento/{atendimento_id}/pdf" not in resposta.headers["Location"].split("?")[0]
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+import app as app_module
+from app import SessaoUsuario
+
+
+@pytest.fixture
+def armazenamento(tmp_path):
+    return app_module.ArmazenamentoSessaoSQLite(str(tmp_path / "sessoes.sqlite3"))
+
+
+def _gravar(armazenamento, sid, usuario_id, validade=3600):
+    chave = app_module.InterfaceSessaoServidor._chave(sid)
+    dados = app_module.InterfaceSessaoServidor.serializer.dumps({"_user_id": str(usuario_id)})
+    armazenamento.gravar(chave, dados, usuario_id, time.time() + validade)
+    return chave
+
+
+def test_revogacao_vale_nos_outros_workers_depois_do_ttl_do_cache(armazenamento):
+    worker_a = app_module.InterfaceSessaoServidor(armazenamento, validade_cache=5)
+    worker_b = app_module.InterfaceSessaoServidor(armazenamento, validade_cache=5)
+    chave = _gravar(armazenamento, "sid-1", usuario_id=7)
+    agora = time.time()
+
+    assert worker_a._ler(chave, agora) is not None
+    assert worker_b._ler(chave, agora) is not None
+
+    worker_b.revogar_usuario(7)
+
+    # Quem revogou esquece na hora; o outro worker ainda usa o cache até o TTL
+    assert worker_b._ler(chave, agora + 1) is None
+    assert worker_a._ler(chave, agora + 4) is not None
+    assert worker_a._ler(chave, agora + 6) is None
+
+
+def test_cache_respeita_o_tamanho_maximo(armazenamento):
+    interface = app_module.InterfaceSessaoServidor(armazenamento, tamanho_cache=2)
+    chaves = [_gravar(armazenamento, f"sid-{n}", usuario_id=n) for n in range(3)]
+    agora = time.time()
+
+    for chave in chaves:
+        interface._ler(chave, agora)
+
+    assert list(interface._cache) == chaves[1:]
+
+
+def test_sessao_expirada_abre_uma_nova(app, armazenamento):
+    interface = app_module.InterfaceSessaoServidor(armazenamento)
+    _gravar(armazenamento, "sid-valida", usuario_id=1)
+    _gravar(armazenamento, "sid-expirada", usuario_id=1, validade=-1)
+    nome_cookie = app.config["SESSION_COOKIE_NAME"]
+
+    with app.test_request_context(headers={"Cookie": f"{nome_cookie}=sid-valida"}) as contexto:
+        sessao = interface.open_session(app, contexto.request)
+        assert not sessao.new
+        assert sessao["_user_id"] == "1"
+
+    with app.test_request_context(headers={"Cookie": f"{nome_cookie}=sid-expirada"}) as contexto:
+        sessao = interface.open_session(app, contexto.request)
+        assert sessao.new
+        assert sessao.sid != "sid-expirada"
+        assert dict(sessao) == {}
+
+
+def test_limpar_expiradas(armazenamento):
+    _gravar(armazenamento, "sid-valida", usuario_id=1)
+    _gravar(armazenamento, "sid-expirada", usuario_id=1, validade=-1)
+
+    assert app_module.InterfaceSessaoServidor(armazenamento).limpar_expiradas() == 1
+
+
+def test_login_grava_so_o_id_no_cookie_e_logout_apaga(app, cliente):
+    cookie = cliente.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    with app.app_context():
+        sessao = SessaoUsuario.query.one()
+        assert sessao.chave == app_module.InterfaceSessaoServidor._chave(cookie.value)
+        assert cookie.value not in sessao.dados
+
+    cliente.get("/logout")
+
+    with app.app_context():
+        assert SessaoUsuario.query.count() == 0
+
+
+def test_revogar_sessoes_do_usuario_desloga(app, cliente, admin):
+    assert cliente.get("/principal").status_code == 200
+
+    with app.app_context():
+        app_module.revogar_sessoes_usuario(admin)
+
+    resposta = cliente.get("/principal")
+    assert resposta.status_code == 302
+    assert resposta.headers["Location"].startswith("/")
+    assert "/principal" not in resposta.headers["Location"]
@@ -0,0 +1,65 @@
+import uuid
+
+from app import Abrigo, Atendimento, db
+
+
+def _item(abrigo_id, **campos):
+    return {
+        "uuid": str(uuid.uuid4()),
+        "solicitante": "Maria",
+        "telefone": "(61) 99999-0000",
+        "abrigo_id": abrigo_id,
+        "descricao": "Água entrando na casa",
+        "criado_em": "2024-05-04T10:30:00-03:00",
+        **campos,
+    }
+
+
+def test_reenviar_o_lote_nao_duplica(app, cliente, abrigo):
+    itens = [_item(abrigo), _item(abrigo, telefone="(61) 98888-1111", descricao="Idosa ilhada")]
+
+    primeira = cliente.post("/api/atendimentos/lote", json={"atendimentos": itens}).get_json()["resultados"]
+    assert [r["status"] for r in primeira] == ["criado", "criado"]
+
+    # Resposta perdida: o navegador manda tudo de novo
+    segunda = cliente.post("/api/atendimentos/lote", json={"atendimentos": itens}).get_json()["resultados"]
+    assert [r["status"] for r in segunda] == ["duplicado", "duplicado"]
+    assert [r["id"] for r in segunda] == [r["id"] for r in primeira]
+
+    with app.app_context():
+        assert Atendimento.query.count() == 2
+        assert db.session.get(Abrigo, abrigo).ocupacao == 2
+
+
+def test_uuid_repetido_no_mesmo_lote_cria_uma_vez(app, cliente, abrigo):
+    item = _item(abrigo)
+    resultados = cliente.post("/api/atendimentos/lote", json={"atendimentos": [item, dict(item)]}).get_json()["resultados"]
+
+    assert [r["status"] for r in resultados] == ["criado", "duplicado"]
+    assert resultados[0]["id"] == resultados[1]["id"]
+    with app.app_context():
+        assert Atendimento.query.count() == 1
+
+
+def test_itens_invalidos_nao_impedem_os_validos(app, cliente, abrigo):
+    itens = [
+        _item(abrigo, uuid="nao-e-uuid"),
+        _item(abrigo, solicitante=""),
+        _item(abrigo + 100),
+        _item(abrigo),
+    ]
+    resultados = cliente.post("/api/atendimentos/lote", json={"atendimentos": itens}).get_json()["resultados"]
+
+    assert [r["status"] for r in resultados] == ["invalido", "invalido", "invalido", "criado"]
+    assert resultados[2]["erro"] == "Abrigo não encontrado"
+    with app.app_context():
+        assert Atendimento.query.count() == 1
+
+
+def test_lote_acima_do_maximo(app, cliente, abrigo, monkeypatch):
+    monkeypatch.setitem(app.config, "SYNC_BATCH_MAX", 2)
+    resposta = cliente.post("/api/atendimentos/lote", json={"atendimentos": [_item(abrigo) for _ in range(3)]})
+
+    assert resposta.status_code == 413
+    with app.app_context():
+        assert Atendimento.query.count() == 0
@@ -0,0 +1,75 @@
+import pytest
+
+import app as app_module
+from app import Abrigo, Atendimento, HistoricoStatusAtendimento, StatusAtendimento, db
+
+TODAS_AS_TRANSICOES = [
+    (acao, status)
+    for acao in StatusAtendimento.TRANSICOES
+    for status in StatusAtendimento.TODOS
+]
+
+
+def _historico(atendimento_id):
+    return [
+        (h.status_anterior, h.status_novo)
+        for h in HistoricoStatusAtendimento.query.filter_by(atendimento_id=atendimento_id)
+        .order_by(HistoricoStatusAtendimento.id)
+    ]
+
+
+@pytest.mark.parametrize("acao,status", TODAS_AS_TRANSICOES)
+def test_so_aplica_a_partir_das_origens_permitidas(logado, novo_atendimento, acao, status):
+    atendimento_id = novo_atendimento()
+    db.session.execute(
+        Atendimento.__table__.update().where(Atendimento.id == atendimento_id).values(status=status)
+    )
+
+    origens, destino = StatusAtendimento.TRANSICOES[acao]
+    resultado = app_module.executar_transicao(atendimento_id, acao)
+
+    if status in origens:
+        assert resultado.status == destino
+        assert resultado.status_anterior == status
+    else:
+        assert resultado is None
+        assert db.session.get(Atendimento, atendimento_id, populate_existing=True).status == status
+
+
+def test_ciclo_completo_grava_historico_e_libera_vaga(logado, novo_atendimento, abrigo):
+    atendimento_id = novo_atendimento()
+    assert db.session.get(Abrigo, abrigo).ocupacao == 1
+
+    iniciado = app_module.executar_transicao(atendimento_id, "iniciar", atendente_id=logado)
+    assert (iniciado.status_anterior, iniciado.status) == (StatusAtendimento.ABERTO, StatusAtendimento.EM_ATENDIMENTO)
+    assert iniciado.finalizado_em is None
+    assert app_module.executar_transicao(atendimento_id, "iniciar") is None
+
+    finalizado = app_module.executar_transicao(atendimento_id, "finalizar", conclusao="Família acolhida")
+    db.session.commit()
+
+    atendimento = db.session.get(Atendimento, atendimento_id, populate_existing=True)
+    assert atendimento.status == StatusAtendimento.ATENDIDO
+    assert atendimento.conclusao == "Família acolhida"
+    assert atendimento.finalizado_em is not None
+    assert atendimento.versao == finalizado.versao == 3
+    assert _historico(atendimento_id) == [
+        (None, StatusAtendimento.ABERTO),
+        (StatusAtendimento.ABERTO, StatusAtendimento.EM_ATENDIMENTO),
+        (StatusAtendimento.EM_ATENDIMENTO, StatusAtendimento.ATENDIDO),
+    ]
+    assert db.session.get(Abrigo, abrigo, populate_existing=True).ocupacao == 0
+
+    # Status final: nenhuma transição sai dele
+    for acao in StatusAtendimento.TRANSICOES:
+        assert app_module.executar_transicao(atendimento_id, acao) is None
+
+
+def test_transicao_e_desfeita_com_rollback(logado, novo_atendimento):
+    atendimento_id = novo_atendimento()
+
+    assert app_module.executar_transicao(atendimento_id, "cancelar", justificativa_cancelamento="Trote")
+    db.session.rollback()
+
+    assert db.session.get(Atendimento, atendimento_id).status == StatusAtendimento.ABERTO
+    assert _historico(atendimento_id) == [(None, StatusAtendimento.ABERTO)]